@@ -1,14 +1,27 @@
 """Main FastAPI application for Generic AgentCore Runtime."""
 
+import asyncio
 import json
 import logging
+import time
 import traceback
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.background import BackgroundTask
 
 from src.agent import AgentManager
-from src.utils import clean_ws_directory, create_error_response, create_ws_directory
+from src.config import get_max_request_bytes, get_warmup_model_ids, get_warmup_regions, is_mcp_warmup_enabled
+from src.mcp_pool import get_mcp_client_pool
+from src.metrics import INVOCATIONS_IN_FLIGHT, PHASE_SECONDS, instrument_events, record_error, register_gauge, render_metrics
+from src.prometheus import CONTENT_TYPE
+from src.stream import create_stream_encoder, start_event_channel
+from src.types import ModelInfo
+from src.utils import RequestTooLargeError, create_error_response, parse_request_body, read_request_body
+from src.warmup import WarmUp
+from src.workspace import get_workspace_manager
 
 # Configure root logger
 logging.basicConfig(
@@ -18,15 +31,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm AWS clients and the default MCP servers in the background so startup is not delayed"""
+    warm_up.start(agent_manager.tool_manager, get_warmup_regions(), get_warmup_model_ids(), is_mcp_warmup_enabled())
+    yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Generic AgentCore Runtime",
     description="AWS Bedrock AgentCore Runtime with Strands Agent and MCP support",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Initialize agent manager
 agent_manager = AgentManager()
+warm_up = WarmUp()
+
+register_gauge(
+    "agentcore_mcp_leases_in_flight",
+    "Leases held on each pooled MCP server",
+    ("server",),
+    lambda: {(name,): client["leases"] for name, client in get_mcp_client_pool().stats()["clients"].items()},
+)
 
 
 @app.get("/ping")
@@ -35,41 +64,65 @@ async def ping():
     return {"status": "healthy", "service": "generic-agent-core-runtime"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness: which AWS clients and MCP servers are warm (503 until the warm-up finishes)"""
+    status = warm_up.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Operational metrics in the Prometheus text format"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.post("/invocations")
 async def invocations(request: Request):
     """Main invocation endpoint required by AgentCore
 
     Expects request with messages, system_prompt, prompt, and model
     """
+    started_at = time.monotonic()
+
     # Setup session and workspace
     headers = dict(request.headers)
     session_id = headers.get("x-amzn-bedrock-agentcore-runtime-session-id")
     trace_id = headers.get("x-amzn-trace-id")
-    agent_manager.set_session_info(session_id, trace_id)
-    create_ws_directory()
+    workspace_manager = get_workspace_manager()
+    workspace_dir = workspace_manager.create()
+    streaming = False
+    INVOCATIONS_IN_FLIGHT.inc()
 
     try:
-        # Parse request body
-        body = await request.body()
+        # Parse request body off the event loop so other streams and /ping stay responsive
         try:
-            request_data = json.loads(body.decode())
-            # Handle AWS Lambda integration format
-            if "input" in request_data and isinstance(request_data["input"], dict):
-                request_data = request_data["input"]
+            with PHASE_SECONDS.time(phase="body_parse"):
+                body = await read_request_body(request, get_max_request_bytes())
+                agent_request = await asyncio.to_thread(parse_request_body, body)
+        except RequestTooLargeError as e:
+            logger.error(f"Request too large: {e}")
+            record_error(e)
+            return create_error_response(str(e))
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON: {e}")
+            record_error(e)
             return create_error_response("Invalid JSON in request body")
+        except ValidationError as e:
+            logger.error(f"Invalid request: {e}")
+            record_error(e)
+            return create_error_response(f"Invalid request: {e}")
 
         # Extract fields
-        messages = request_data.get("messages", [])
-        system_prompt = request_data.get("system_prompt")
-        prompt = request_data.get("prompt", [])
-        model_info = request_data.get("model", {})
-        user_id = request_data.get("user_id")
-        mcp_servers = request_data.get("mcp_servers")
-        agent_session_id = request_data.get("session_id")
-        agent_id = request_data.get("agent_id")
-        code_execution_enabled = request_data.get("code_execution_enabled", False)
+        messages = agent_request.messages
+        system_prompt = agent_request.system_prompt
+        prompt = agent_request.prompt
+        model_info = agent_request.model.model_dump(exclude_none=True) if isinstance(agent_request.model, ModelInfo) else agent_request.model
+        user_id = agent_request.user_id
+        mcp_servers = agent_request.mcp_servers
+        agent_session_id = agent_request.session_id
+        agent_id = agent_request.agent_id
+        code_execution_enabled = agent_request.code_execution_enabled
 
         # Validate required fields
         if not model_info:
@@ -78,30 +131,48 @@ async def invocations(request: Request):
             return create_error_response("Either prompt or messages is required")
 
         # Stream response
+        encoder = create_stream_encoder(headers)
+
         async def generate():
-            try:
-                async for chunk in agent_manager.process_request_streaming(
-                    messages=messages,
-                    system_prompt=system_prompt,
-                    prompt=prompt,
-                    model_info=model_info,
-                    user_id=user_id,
-                    mcp_servers=mcp_servers,
-                    session_id=agent_session_id or session_id,
-                    agent_id=agent_id,
-                    code_execution_enabled=code_execution_enabled,
-                ):
-                    yield chunk
-            finally:
-                clean_ws_directory()
-
-        return StreamingResponse(generate(), media_type="text/event-stream")
+            events = agent_manager.process_request_streaming(
+                messages=messages,
+                system_prompt=system_prompt,
+                prompt=prompt,
+                model_info=model_info,
+                user_id=user_id,
+                mcp_servers=mcp_servers,
+                session_id=agent_session_id or session_id,
+                agent_id=agent_id,
+                code_execution_enabled=code_execution_enabled,
+                workspace_dir=workspace_dir,
+                trace_id=trace_id,
+            )
+            events = instrument_events(events, started_at)
+            # The agent runs on its own task so a slow client never stalls the model loop
+            async for chunk in encoder.encode(start_event_channel(events)):
+                yield chunk
+
+        body = generate()
+
+        async def finish():
+            # Runs after the response even if the client disconnected before the stream started, when generate()
+            # never ran; closing it first stops the agent before its workspace is released
+            await body.aclose()
+            workspace_manager.release(workspace_dir)
+            INVOCATIONS_IN_FLIGHT.dec()
+
+        streaming = True
+        return StreamingResponse(body, media_type=encoder.media_type, background=BackgroundTask(finish))
     except Exception as e:
         logger.error(f"Error processing request: {e}")
         logger.error(traceback.format_exc())
+        record_error(e)
         return create_error_response(str(e))
     finally:
-        clean_ws_directory()
+        # The response releases the workspace once the stream finishes
+        if not streaming:
+            workspace_manager.release(workspace_dir)
+            INVOCATIONS_IN_FLIGHT.dec()
 
 
 if __name__ == "__main__":
@@ -1,51 +1,36 @@
 """Agent management for the agent core runtime."""
 
-import json
+import asyncio
 import logging
 from collections.abc import AsyncGenerator
 from typing import Any
 
-import boto3
 from strands import Agent as StrandsAgent
-from strands.models import BedrockModel
 
-from .config import extract_model_info, get_max_iterations, get_system_prompt, supports_prompt_cache, supports_tools_cache
+from .aws_clients import get_aws_client_registry
+from .config import TOOL_EXECUTION_MODES, WORKSPACE_DIR, extract_model_info, get_max_iterations, get_system_prompt, get_tool_execution_settings, get_tool_output_settings, get_tool_selection_top_k
+from .context import InvocationContext
+from .metrics import AGENT_ITERATIONS, PHASE_SECONDS, record_error
+from .telemetry import tracer
+from .tool_execution import ToolExecutionPolicy
+from .tool_index import get_query_text
+from .tool_outputs import ToolOutputSpiller, ToolOutputStore
 from .tools import ToolManager
 from .types import Message, ModelInfo
-from .utils import (
-    process_messages,
-    process_prompt,
-)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-class IterationLimitExceededError(Exception):
-    """Exception raised when iteration limit is exceeded"""
-
-    pass
-
-
 class AgentManager:
     """Manages Strands agent creation and execution."""
 
     def __init__(self):
         self.tool_manager = ToolManager()
         self.max_iterations = get_max_iterations()
-        self.iteration_count = 0
-
-    def set_session_info(self, session_id: str, trace_id: str):
-        """Set session and trace IDs"""
-        self.tool_manager.set_session_info(session_id, trace_id)
-
-    def iteration_limit_handler(self, **ev):
-        if ev.get("init_event_loop"):
-            self.iteration_count = 0
-        if ev.get("start_event_loop"):
-            self.iteration_count += 1
-            if self.iteration_count > self.max_iterations:
-                raise IterationLimitExceededError(f"Event loop reached maximum iteration count ({self.max_iterations}). Please contact the administrator.")
+        self.tool_output_settings = get_tool_output_settings()
+        self.tool_execution_mode = get_tool_execution_settings()["mode"]
+        self.tool_selection_top_k = get_tool_selection_top_k()
 
     async def process_request_streaming(
         self,
@@ -58,64 +43,73 @@ class AgentManager:
         session_id: str | None = None,
         agent_id: str | None = None,
         code_execution_enabled: bool | None = False,
-    ) -> AsyncGenerator[str]:
-        """Process a request and yield streaming responses as raw events"""
+        workspace_dir: str = WORKSPACE_DIR,
+        trace_id: str | None = None,
+        tool_execution_mode: str | None = None,
+    ) -> AsyncGenerator[dict[str, Any]]:
+        """Process a request and yield streaming responses as raw events
+
+        tool_execution_mode sets how the tool calls of one model turn run
+        (sequential, concurrent or bounded) and defaults to TOOL_EXECUTION_MODE.
+        """
+        # Uploads are keyed by the session when one is provided, otherwise by the trace
+        context = InvocationContext(
+            session_id=session_id,
+            trace_id=session_id or trace_id,
+            workspace_dir=workspace_dir,
+            max_iterations=self.max_iterations,
+            mcp_lease=self.tool_manager.create_mcp_lease(),
+            tool_output_spiller=ToolOutputSpiller(
+                ToolOutputStore(workspace_dir),
+                threshold_chars=self.tool_output_settings["threshold_chars"],
+                preview_chars=self.tool_output_settings["preview_chars"],
+            ),
+        )
         try:
-            # Set session info if provided
-            if session_id:
-                self.set_session_info(session_id, session_id)
-
             # Extract model info
             model_id, region = extract_model_info(model_info)
 
             # Combine system prompts
-            combined_system_prompt = get_system_prompt(system_prompt)
+            combined_system_prompt = get_system_prompt(system_prompt, workspace_dir)
 
             # Get tools (MCP handling is done in ToolManager)
-            tools = self.tool_manager.get_tools_with_options(code_execution_enabled=code_execution_enabled, mcp_servers=mcp_servers)
-            logger.info(f"Loaded {len(tools)} tools (code execution: {code_execution_enabled})")
+            with PHASE_SECONDS.time(phase="tool_loading"), tracer.start_as_current_span("agent.load_tools", attributes={"agent.code_execution_enabled": bool(code_execution_enabled)}) as span:
+                tools = await self.tool_manager.get_tools_with_options(context, code_execution_enabled=code_execution_enabled, mcp_servers=mcp_servers)
+                if tool_execution_mode not in TOOL_EXECUTION_MODES:
+                    tool_execution_mode = self.tool_execution_mode
+                policy = ToolExecutionPolicy(tool_execution_mode, self.tool_manager.server_limits)
+                # Servers the user picked are offered in full; the default catalog is narrowed to the request
+                if mcp_servers is None:
+                    tools = self.tool_manager.select_relevant_tools(tools, get_query_text(prompt, messages), self.tool_selection_top_k, policy)
+                tools = policy.wrap_all(tools)
+                span.set_attribute("agent.tool_count", len(tools))
+            logger.info(f"Loaded {len(tools)} tools (code execution: {code_execution_enabled}, tool execution: {tool_execution_mode})")
 
             # Log agent info
             if agent_id:
                 logger.debug(f"Processing agent: {agent_id}")
 
-            # Create boto3 session and Bedrock model
-            session = boto3.Session(region_name=region)
-
-            # Configure caching based on model support (loaded from environment variable)
-            bedrock_model_params = {
-                "model_id": model_id,
-                "boto_session": session,
-            }
-
-            # Only enable caching for officially supported models
-            if supports_prompt_cache(model_id):
-                bedrock_model_params["cache_prompt"] = "default"
-
-                if supports_tools_cache(model_id):
-                    bedrock_model_params["cache_tools"] = "default"
-
-            bedrock_model = BedrockModel(**bedrock_model_params)
-
-            # Process messages and prompt using utility functions
-            processed_messages = process_messages(messages)
-            processed_prompt = process_prompt(prompt)
-
-            # Create Strands agent and stream response
-            agent = StrandsAgent(
-                system_prompt=combined_system_prompt,
-                messages=processed_messages,
-                model=bedrock_model,
-                tools=tools,
-                callback_handler=self.iteration_limit_handler,
-            )
-
-            async for event in agent.stream_async(processed_prompt):
+            with PHASE_SECONDS.time(phase="model_construction"):
+                # Reuse the process-wide Bedrock model and client for this model and region
+                bedrock_model = await asyncio.to_thread(get_aws_client_registry().get_bedrock_model, model_id, region)
+
+                # Create Strands agent and stream response
+                agent = StrandsAgent(
+                    system_prompt=combined_system_prompt,
+                    messages=messages,
+                    model=bedrock_model,
+                    tools=tools,
+                    callback_handler=context.iteration_limit_handler,
+                    hooks=[context.tool_output_spiller],
+                )
+
+            async for event in agent.stream_async(prompt):
                 if "event" in event:
-                    yield json.dumps(event, ensure_ascii=False) + "\n"
+                    yield event
 
         except Exception as e:
             logger.error(f"Error processing agent request: {e}", exc_info=True)
+            record_error(e)
             error_event = {
                 "event": {
                     "internalServerException": {
@@ -123,8 +117,14 @@ class AgentManager:
                     }
                 }
             }
-            yield json.dumps(error_event, ensure_ascii=False) + "\n"
+            yield error_event
         finally:
-            # Cleanup is handled automatically by the dynamic MCP client
+            if context.iteration_count:
+                AGENT_ITERATIONS.observe(context.iteration_count)
+            spiller = context.tool_output_spiller
+            if spiller.spills:
+                logger.info(f"Spilled {spiller.spills} large tool outputs to the workspace, saving ~{spiller.tokens_saved} tokens")
+            # Return MCP clients to the pool so later invocations can reuse them
+            context.close()
             if user_id:
                 logger.debug(f"Session cleanup for user {user_id} handled automatically")
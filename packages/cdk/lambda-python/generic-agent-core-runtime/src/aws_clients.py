@@ -0,0 +1,113 @@
+"""Process-wide AWS sessions, clients and Bedrock models for the agent core runtime."""
+
+import logging
+import threading
+import time
+from typing import Any
+
+import boto3
+from botocore.config import Config
+from strands.models import BedrockModel
+
+from .config import get_aws_client_settings, get_s3_endpoint_url, supports_prompt_cache, supports_tools_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AWSClientRegistry:
+    """Caches boto3 sessions, clients and Bedrock models across invocations.
+
+    boto3 clients are thread-safe once created, so one client per (service, region)
+    is shared by every invocation, and each Bedrock model keeps the bedrock-runtime
+    client it creates from the shared session. Reusing them keeps resolved
+    credentials, endpoints and open HTTPS connections warm instead of paying for
+    them on each request. Creation itself is not thread-safe, so it happens under a lock.
+    """
+
+    def __init__(self, max_pool_connections: int, connect_timeout: float, read_timeout: float, max_attempts: int):
+        self.client_config = Config(
+            max_pool_connections=max_pool_connections,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retries={"max_attempts": max_attempts, "mode": "standard"},
+            tcp_keepalive=True,
+        )
+        self._sessions: dict[str, boto3.Session] = {}
+        self._clients: dict[tuple[str, str], Any] = {}
+        self._models: dict[tuple[str, str, bool, bool], BedrockModel] = {}
+        self._lock = threading.RLock()
+
+    def get_session(self, region: str) -> boto3.Session:
+        """Get the shared boto3 session for a region"""
+        with self._lock:
+            session = self._sessions.get(region)
+            if session is None:
+                session = boto3.Session(region_name=region)
+                self._sessions[region] = session
+            return session
+
+    def get_client(self, service_name: str, region: str) -> Any:
+        """Get the shared client for a service in a region"""
+        key = (service_name, region)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                endpoint_url = get_s3_endpoint_url() if service_name == "s3" else None
+                client = self.get_session(region).client(service_name, config=self.client_config, endpoint_url=endpoint_url)
+                self._clients[key] = client
+            return client
+
+    def get_bedrock_model(self, model_id: str, region: str) -> BedrockModel:
+        """Get the shared Bedrock model for a model ID in a region, with prompt caching where supported"""
+        # Only enable caching for officially supported models
+        cache_prompt = supports_prompt_cache(model_id)
+        cache_tools = cache_prompt and supports_tools_cache(model_id)
+        key = (model_id, region, cache_prompt, cache_tools)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                bedrock_model_params = {
+                    "model_id": model_id,
+                    "boto_session": self.get_session(region),
+                    "boto_client_config": self.client_config,
+                }
+                if cache_prompt:
+                    bedrock_model_params["cache_prompt"] = "default"
+                if cache_tools:
+                    bedrock_model_params["cache_tools"] = "default"
+                model = BedrockModel(**bedrock_model_params)
+                self._models[key] = model
+            return model
+
+    def warm_up(self, regions: list[str], model_ids: list[str]):
+        """Resolve credentials, create the S3 client and build the Bedrock models for each region ahead of the first request
+
+        Each Bedrock model sends its requests through the bedrock-runtime client it
+        creates, so building the shared models the first requests will use spares them
+        that client setup.
+        """
+        for region in regions:
+            started_at = time.monotonic()
+            try:
+                credentials = self.get_session(region).get_credentials()
+                if credentials is not None:
+                    credentials.get_frozen_credentials()
+                self.get_client("s3", region)
+                for model_id in model_ids:
+                    self.get_bedrock_model(model_id, region)
+                logger.info(f"Warmed up AWS clients for {region} in {time.monotonic() - started_at:.2f}s")
+            except Exception as e:
+                logger.warning(f"Failed to warm up AWS clients for {region}: {e}")
+
+
+_aws_client_registry: AWSClientRegistry | None = None
+_aws_client_registry_lock = threading.Lock()
+
+
+def get_aws_client_registry() -> AWSClientRegistry:
+    """Get the process-wide AWS client registry"""
+    global _aws_client_registry
+    with _aws_client_registry_lock:
+        if _aws_client_registry is None:
+            _aws_client_registry = AWSClientRegistry(**get_aws_client_settings())
+        return _aws_client_registry
@@ -13,14 +13,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Root under which every invocation gets its own workspace directory
 WORKSPACE_DIR = "/tmp/ws"
 
+DEFAULT_WORKSPACE_QUOTA_BYTES = 2 * 1024 * 1024 * 1024
+DEFAULT_WORKSPACE_ORPHAN_TTL = 3600.0  # seconds before an untracked workspace is considered abandoned
+
 DEFAULT_MAX_ITERATIONS = 20
 
-FIXED_SYSTEM_PROMPT = f"""## About File Output
-- You are running on AWS Bedrock AgentCore. Therefore, when writing files, always write them under `{WORKSPACE_DIR}`.
-- Similarly, if you need a workspace, please use the `{WORKSPACE_DIR}` directory. Do not ask the user about their current workspace. It's always `{WORKSPACE_DIR}`.
-- Also, users cannot directly access files written under `{WORKSPACE_DIR}`. So when submitting these files to users, *always upload them to S3 using the `upload_file_to_s3_and_retrieve_s3_url` tool and provide the S3 URL*. The S3 URL must be included in the final output.
+DEFAULT_MODEL_ID = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"  # used when a request names no model
+
+# MCP client pool defaults
+DEFAULT_MCP_STARTUP_TIMEOUT = 30.0  # seconds to wait for a server to start and list its tools, at most strands' 30s start timeout
+DEFAULT_MCP_POOL_MAX_CLIENTS = 16  # started clients kept warm across invocations
+DEFAULT_MCP_POOL_MAX_LEASES = 32  # concurrent invocations sharing a single client
+DEFAULT_MCP_POOL_IDLE_TTL = 900.0  # seconds before an unused client is stopped
+DEFAULT_MCP_HEALTH_CHECK_INTERVAL = 30.0  # seconds between pings of an idle client
+DEFAULT_MCP_RESTART_BACKOFF = 5.0  # seconds before starting a server again after it failed to start, doubling per consecutive failure
+DEFAULT_MCP_RESTART_BACKOFF_MAX = 300.0
+
+# MCP tool schema cache defaults
+DEFAULT_MCP_TOOL_CACHE_DIR = "/tmp/.mcp-tool-cache"
+DEFAULT_MCP_TOOL_CACHE_TTL = 86400.0  # seconds before cached schemas are refreshed from the server
+DEFAULT_MCP_MAX_CONCURRENT_CALLS = 4  # calls in flight per server in bounded mode, unless its mcp.json entry sets maxConcurrentCalls
+DEFAULT_MCP_TOOL_RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # budget for results of tools with a toolCache policy in mcp.json
+
+# Pinned MCP server packages installed at image build time (see mcp_artifacts.py)
+DEFAULT_MCP_ARTIFACT_DIR = "/opt/mcp-artifacts"
+
+# AWS client registry defaults
+DEFAULT_AWS_MAX_POOL_CONNECTIONS = 50  # HTTP connections kept per client, shared by concurrent invocations
+DEFAULT_AWS_CONNECT_TIMEOUT = 10.0
+DEFAULT_AWS_READ_TIMEOUT = 300.0  # ConverseStream responses can pause for long tool-heavy turns
+DEFAULT_AWS_MAX_ATTEMPTS = 3
+
+# S3 artifact upload defaults
+DEFAULT_S3_UPLOAD_CONCURRENCY = 8  # files uploaded in parallel by the batch upload tool
+DEFAULT_S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_S3_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+DEFAULT_S3_MULTIPART_CONCURRENCY = 10  # parts uploaded in parallel for a single large file
+DEFAULT_S3_MAX_BATCH_FILES = 200
+DEFAULT_S3_UPLOADED_KEY_CACHE_SIZE = 10000  # content-addressed keys remembered across a trace's invocations
+
+DEFAULT_MAX_REQUEST_BYTES = 100 * 1024 * 1024
+
+# Decoded attachment cache defaults
+DEFAULT_DECODE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Response stream defaults
+DEFAULT_STREAM_FLUSH_INTERVAL = 0.03  # seconds a buffered event may wait for more deltas before it is sent
+DEFAULT_STREAM_FLUSH_BYTES = 8192
+DEFAULT_STREAM_BUFFER_EVENTS = 1024  # events the agent may run ahead of the client
+DEFAULT_STREAM_SLOW_CONSUMER_POLICY = "coalesce"  # coalesce, drop or abort once the buffer is full
+DEFAULT_STREAM_STALL_TIMEOUT = 300.0  # seconds a full buffer may go unread before the abort policy cancels the agent
+
+DEFAULT_TOOL_SELECTION_TOP_K = 15  # default-server MCP tools offered per request, the rest on request (0 offers every tool)
+
+TOOL_EXECUTION_MODES = ("sequential", "concurrent", "bounded")
+DEFAULT_TOOL_EXECUTION_MODE = "bounded"  # concurrent, with calls to each MCP server capped
+
+# Tool outputs larger than the threshold are stored in the workspace and shown to the model as a preview (0 disables spilling)
+DEFAULT_TOOL_OUTPUT_SPILL_CHARS = 20000
+DEFAULT_TOOL_OUTPUT_PREVIEW_CHARS = 2000  # split between the head and tail of the output
+DEFAULT_TOOL_OUTPUT_PAGE_LINES = 200  # lines returned by read_tool_output when the model does not ask for a count
+
+FIXED_SYSTEM_PROMPT = """## About File Output
+- You are running on AWS Bedrock AgentCore. Therefore, when writing files, always write them under `{workspace_dir}`.
+- Similarly, if you need a workspace, please use the `{workspace_dir}` directory. Do not ask the user about their current workspace. It's always `{workspace_dir}`.
+- Also, users cannot directly access files written under `{workspace_dir}`. So when submitting these files to users, *always upload them to S3 using the `upload_file_to_s3_and_retrieve_s3_url` tool and provide the S3 URL*. The S3 URL must be included in the final output.
+- When submitting several files (for example multiple charts or a whole output directory), upload them in one call with the `upload_files_to_s3_and_retrieve_s3_urls` tool instead of calling the single-file tool repeatedly.
 - If the output file is an image file, the S3 URL output must be in Markdown format.
 """
 
@@ -55,12 +116,13 @@ def get_uv_environment() -> dict[str, str]:
     }
 
 
-def get_system_prompt(user_system_prompt: str = None) -> str:
-    """Combine user system prompt with fixed system prompt"""
+def get_system_prompt(user_system_prompt: str = None, workspace_dir: str = WORKSPACE_DIR) -> str:
+    """Combine user system prompt with fixed system prompt for the invocation's workspace"""
+    fixed_system_prompt = FIXED_SYSTEM_PROMPT.format(workspace_dir=workspace_dir)
     if user_system_prompt:
-        return f"{user_system_prompt}\n{FIXED_SYSTEM_PROMPT}"
+        return f"{user_system_prompt}\n{fixed_system_prompt}"
     else:
-        return FIXED_SYSTEM_PROMPT
+        return fixed_system_prompt
 
 
 def extract_model_info(model_info: Any) -> tuple[str, str]:
@@ -71,7 +133,7 @@ def extract_model_info(model_info: Any) -> tuple[str, str]:
         model_id = model_info
         region = aws_creds.get("AWS_REGION", "us-east-1")
     else:
-        model_id = model_info.get("modelId", "us.anthropic.claude-3-5-sonnet-20241022-v2:0")
+        model_id = model_info.get("modelId", DEFAULT_MODEL_ID)
         region = model_info.get("region", aws_creds.get("AWS_REGION", "us-east-1"))
 
     return model_id, region
@@ -86,6 +148,176 @@ def get_max_iterations() -> int:
         return DEFAULT_MAX_ITERATIONS
 
 
+def get_env_number(name: str, default: float) -> float:
+    """Get a numeric setting from environment or fall back to the default"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning(f"Invalid {name} value. Defaulting to {default}.")
+        return default
+
+
+def get_env_flag(name: str, default: bool) -> bool:
+    """Get a boolean setting from environment or fall back to the default"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_mcp_pool_settings() -> dict[str, float]:
+    """Get MCP client pool sizing and timeout settings from environment"""
+    return {
+        "startup_timeout": get_env_number("MCP_STARTUP_TIMEOUT", DEFAULT_MCP_STARTUP_TIMEOUT),
+        "max_clients": int(get_env_number("MCP_POOL_MAX_CLIENTS", DEFAULT_MCP_POOL_MAX_CLIENTS)),
+        "max_leases": int(get_env_number("MCP_POOL_MAX_LEASES", DEFAULT_MCP_POOL_MAX_LEASES)),
+        "idle_ttl": get_env_number("MCP_POOL_IDLE_TTL", DEFAULT_MCP_POOL_IDLE_TTL),
+        "health_check_interval": get_env_number("MCP_HEALTH_CHECK_INTERVAL", DEFAULT_MCP_HEALTH_CHECK_INTERVAL),
+        "restart_backoff": get_env_number("MCP_RESTART_BACKOFF", DEFAULT_MCP_RESTART_BACKOFF),
+        "max_restart_backoff": get_env_number("MCP_RESTART_BACKOFF_MAX", DEFAULT_MCP_RESTART_BACKOFF_MAX),
+    }
+
+
+def get_workspace_settings() -> dict[str, Any]:
+    """Get workspace root, disk quota and orphan cleanup settings from environment"""
+    return {
+        "root": os.environ.get("WORKSPACE_DIR", WORKSPACE_DIR),
+        "quota_bytes": int(get_env_number("WORKSPACE_QUOTA_BYTES", DEFAULT_WORKSPACE_QUOTA_BYTES)),
+        "orphan_ttl": get_env_number("WORKSPACE_ORPHAN_TTL", DEFAULT_WORKSPACE_ORPHAN_TTL),
+    }
+
+
+def get_mcp_tool_cache_settings() -> dict[str, Any]:
+    """Get MCP tool schema cache location and lifetime from environment"""
+    return {
+        "cache_dir": os.environ.get("MCP_TOOL_CACHE_DIR", DEFAULT_MCP_TOOL_CACHE_DIR),
+        "ttl": get_env_number("MCP_TOOL_CACHE_TTL", DEFAULT_MCP_TOOL_CACHE_TTL),
+    }
+
+
+def get_mcp_tool_result_cache_settings() -> dict[str, int]:
+    """Get the byte budget of the MCP tool result cache from environment"""
+    return {"max_bytes": int(get_env_number("MCP_TOOL_RESULT_CACHE_MAX_BYTES", DEFAULT_MCP_TOOL_RESULT_CACHE_MAX_BYTES))}
+
+
+def get_mcp_artifact_settings() -> dict[str, Any]:
+    """Get the pinned MCP artifact store location and whether servers launch from it from environment"""
+    return {
+        "root": os.environ.get("MCP_ARTIFACT_DIR", DEFAULT_MCP_ARTIFACT_DIR),
+        "enabled": get_env_flag("MCP_USE_ARTIFACTS", True),
+    }
+
+
+def get_aws_client_settings() -> dict[str, Any]:
+    """Get connection pool, timeout and retry settings for AWS clients from environment"""
+    return {
+        "max_pool_connections": int(get_env_number("AWS_MAX_POOL_CONNECTIONS", DEFAULT_AWS_MAX_POOL_CONNECTIONS)),
+        "connect_timeout": get_env_number("AWS_CONNECT_TIMEOUT", DEFAULT_AWS_CONNECT_TIMEOUT),
+        "read_timeout": get_env_number("AWS_READ_TIMEOUT", DEFAULT_AWS_READ_TIMEOUT),
+        "max_attempts": int(get_env_number("AWS_MAX_ATTEMPTS", DEFAULT_AWS_MAX_ATTEMPTS)),
+    }
+
+
+def get_s3_endpoint_url() -> str | None:
+    """Get the S3 endpoint override (e.g. a local S3 stand-in) from environment, if any"""
+    return os.environ.get("S3_ENDPOINT_URL") or None
+
+
+def get_s3_upload_settings() -> dict[str, int]:
+    """Get parallelism and multipart transfer settings for S3 uploads from environment"""
+    return {
+        "concurrency": int(get_env_number("S3_UPLOAD_CONCURRENCY", DEFAULT_S3_UPLOAD_CONCURRENCY)),
+        "multipart_threshold": int(get_env_number("S3_MULTIPART_THRESHOLD", DEFAULT_S3_MULTIPART_THRESHOLD)),
+        "multipart_chunksize": int(get_env_number("S3_MULTIPART_CHUNKSIZE", DEFAULT_S3_MULTIPART_CHUNKSIZE)),
+        "multipart_concurrency": int(get_env_number("S3_MULTIPART_CONCURRENCY", DEFAULT_S3_MULTIPART_CONCURRENCY)),
+        "max_files": int(get_env_number("S3_MAX_BATCH_FILES", DEFAULT_S3_MAX_BATCH_FILES)),
+    }
+
+
+def get_uploaded_key_cache_size() -> int:
+    """Get how many uploaded S3 keys the process remembers from environment"""
+    return int(get_env_number("S3_UPLOADED_KEY_CACHE_SIZE", DEFAULT_S3_UPLOADED_KEY_CACHE_SIZE))
+
+
+def get_max_request_bytes() -> int:
+    """Get the largest accepted /invocations body size from environment"""
+    return int(get_env_number("MAX_REQUEST_BYTES", DEFAULT_MAX_REQUEST_BYTES))
+
+
+def get_decode_cache_max_bytes() -> int:
+    """Get the byte budget of the decoded attachment cache from environment (0 disables it)"""
+    return int(get_env_number("DECODE_CACHE_MAX_BYTES", DEFAULT_DECODE_CACHE_MAX_BYTES))
+
+
+def get_stream_settings() -> dict[str, float]:
+    """Get response stream batching settings from environment (an interval of 0 sends every event as it arrives)"""
+    return {
+        "flush_interval": get_env_number("STREAM_FLUSH_INTERVAL", DEFAULT_STREAM_FLUSH_INTERVAL),
+        "flush_bytes": int(get_env_number("STREAM_FLUSH_BYTES", DEFAULT_STREAM_FLUSH_BYTES)),
+    }
+
+
+def get_stream_buffer_settings() -> dict[str, Any]:
+    """Get the bound and slow-consumer policy of the buffer between the agent and the response from environment"""
+    return {
+        "max_events": int(get_env_number("STREAM_BUFFER_EVENTS", DEFAULT_STREAM_BUFFER_EVENTS)),
+        "policy": os.environ.get("STREAM_SLOW_CONSUMER_POLICY", DEFAULT_STREAM_SLOW_CONSUMER_POLICY),
+        "stall_timeout": get_env_number("STREAM_STALL_TIMEOUT", DEFAULT_STREAM_STALL_TIMEOUT),
+    }
+
+
+def get_tool_execution_settings() -> dict[str, Any]:
+    """Get how the tool calls of a model turn are run and the default per-server cap from environment"""
+    mode = os.environ.get("TOOL_EXECUTION_MODE", DEFAULT_TOOL_EXECUTION_MODE)
+    if mode not in TOOL_EXECUTION_MODES:
+        logger.warning(f"Invalid TOOL_EXECUTION_MODE value. Defaulting to {DEFAULT_TOOL_EXECUTION_MODE}.")
+        mode = DEFAULT_TOOL_EXECUTION_MODE
+    return {
+        "mode": mode,
+        "max_concurrent_calls": int(get_env_number("MCP_MAX_CONCURRENT_CALLS", DEFAULT_MCP_MAX_CONCURRENT_CALLS)),
+    }
+
+
+def get_tool_selection_top_k() -> int:
+    """Get how many of the default MCP servers' tools are offered to the model per request from environment"""
+    return int(get_env_number("TOOL_SELECTION_TOP_K", DEFAULT_TOOL_SELECTION_TOP_K))
+
+
+def get_tool_output_settings() -> dict[str, int]:
+    """Get the size above which tool outputs are spilled to the workspace and how much of them the model sees from environment"""
+    return {
+        "threshold_chars": int(get_env_number("TOOL_OUTPUT_SPILL_CHARS", DEFAULT_TOOL_OUTPUT_SPILL_CHARS)),
+        "preview_chars": int(get_env_number("TOOL_OUTPUT_PREVIEW_CHARS", DEFAULT_TOOL_OUTPUT_PREVIEW_CHARS)),
+        "page_lines": int(get_env_number("TOOL_OUTPUT_PAGE_LINES", DEFAULT_TOOL_OUTPUT_PAGE_LINES)),
+    }
+
+
+def get_warmup_regions() -> list[str]:
+    """Get regions whose AWS clients are created at startup (comma-separated WARMUP_REGIONS, defaults to AWS_REGION)"""
+    regions = os.environ.get("WARMUP_REGIONS")
+    if regions is None:
+        return [get_aws_credentials()["AWS_REGION"]]
+    return [region.strip() for region in regions.split(",") if region.strip()]
+
+
+def get_warmup_model_ids() -> list[str]:
+    """Get models whose Bedrock clients are created at startup in each warm-up region (comma-separated WARMUP_MODEL_IDS, defaults to DEFAULT_MODEL_ID)"""
+    model_ids = os.environ.get("WARMUP_MODEL_IDS")
+    if model_ids is None:
+        return [DEFAULT_MODEL_ID]
+    return [model_id.strip() for model_id in model_ids.split(",") if model_id.strip()]
+
+
+def is_mcp_warmup_enabled() -> bool:
+    """Check if the servers in mcp.json should be started in the background at container start"""
+    return get_env_flag("WARMUP_MCP_SERVERS", True)
+
+
+def is_lazy_mcp_spawn_enabled() -> bool:
+    """Check if MCP servers with cached tool schemas should start on first tool use"""
+    return get_env_flag("MCP_LAZY_SPAWN", True)
+
+
 # CRI (Cross-Region Inference) prefix pattern
 CRI_PREFIX_PATTERN = re.compile(r"^(global|us|eu|apac|jp)\.")
 
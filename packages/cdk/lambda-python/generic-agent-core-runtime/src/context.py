@@ -0,0 +1,49 @@
+"""Request-scoped state for the agent core runtime."""
+
+from .mcp_pool import MCPLease
+from .telemetry import CycleSpans
+from .tool_outputs import ToolOutputSpiller
+
+
+class IterationLimitExceededError(Exception):
+    """Exception raised when iteration limit is exceeded"""
+
+    pass
+
+
+class InvocationContext:
+    """State owned by a single /invocations stream.
+
+    Anything that differs between concurrent invocations (iteration count, IDs used
+    for S3 keys, workspace, leased MCP clients, spilled tool outputs) lives here instead of on the shared
+    AgentManager or ToolManager, so one process can serve overlapping streams.
+    """
+
+    def __init__(self, session_id: str | None, trace_id: str | None, workspace_dir: str, max_iterations: int, mcp_lease: MCPLease, tool_output_spiller: ToolOutputSpiller):
+        self.session_id = session_id
+        self.trace_id = trace_id
+        self.workspace_dir = workspace_dir
+        self.max_iterations = max_iterations
+        self.mcp_lease = mcp_lease
+        # Stores oversized tool outputs in the workspace and counts the tokens this saves
+        self.tool_output_spiller = tool_output_spiller
+        self.iteration_count = 0
+        self.cycle_spans = CycleSpans()
+
+    def iteration_limit_handler(self, **ev):
+        if ev.get("init_event_loop"):
+            self.iteration_count = 0
+        if ev.get("start_event_loop"):
+            self.iteration_count += 1
+            self.cycle_spans.start(self.iteration_count)
+            if self.iteration_count > self.max_iterations:
+                error = IterationLimitExceededError(f"Event loop reached maximum iteration count ({self.max_iterations}). Please contact the administrator.")
+                self.cycle_spans.end(error)
+                raise error
+        elif "event" in ev:
+            self.cycle_spans.record(ev["event"])
+
+    def close(self):
+        """Release resources held for the invocation"""
+        self.cycle_spans.end()
+        self.mcp_lease.release()
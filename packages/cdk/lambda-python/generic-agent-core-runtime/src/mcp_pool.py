@@ -0,0 +1,360 @@
+"""Process-wide MCP client pool for the agent core runtime."""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+from typing import Any
+
+from mcp import StdioServerParameters, stdio_client
+from strands.tools.mcp import MCPClient
+
+from .config import get_mcp_pool_settings
+from .mcp_artifacts import get_mcp_artifact_store
+from .metrics import MCP_ARTIFACT_SAVED_SECONDS, MCP_SERVER_LAUNCHES
+from .telemetry import tracer
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_TIMEOUT = 5.0
+# strands' MCPClient.start() gives up on a server that has not initialized within 30 seconds
+MAX_STARTUP_TIMEOUT = 30.0
+REAP_INTERVAL = 60.0
+
+
+def get_server_config_hash(server_config: dict) -> str:
+    """Hash the parts of a server configuration that affect the spawned process"""
+    relevant = {key: server_config.get(key) for key in ("command", "args", "env", "url", "type")}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _create_mcp_client(server_name: str, server_config: dict, uv_env: dict) -> MCPClient:
+    """Create and start an MCP client"""
+    # The task strands runs the transport on: a server that never initialized has no session for client.stop() to close
+    transport: dict[str, Any] = {}
+
+    @asynccontextmanager
+    async def spawn():
+        transport["loop"] = asyncio.get_running_loop()
+        transport["task"] = asyncio.current_task()
+        try:
+            async with stdio_client(
+                StdioServerParameters(
+                    command=server_config["command"],
+                    args=server_config.get("args", []),
+                    env={**uv_env, **server_config.get("env", {})},
+                )
+            ) as streams:
+                yield streams
+        except asyncio.CancelledError:
+            # Leaving stdio_client has already terminated the process
+            logger.info(f"Cancelled start of MCP server {server_name}")
+
+    client = MCPClient(spawn)
+    try:
+        client.start()
+    except Exception:
+        if "task" in transport:
+            try:
+                transport["loop"].call_soon_threadsafe(transport["task"].cancel)
+            except RuntimeError:
+                # The loop has already finished, so the transport is already closed
+                pass
+        raise
+    return client
+
+
+def _stop_mcp_client(server_name: str, client: MCPClient):
+    """Stop an MCP client, ignoring errors from servers that already exited"""
+    try:
+        client.stop(None, None, None)
+        logger.info(f"Stopped MCP client: {server_name}")
+    except Exception as e:
+        logger.warning(f"Error stopping MCP client for {server_name}: {e}")
+
+
+class PooledMCPClient:
+    """A started MCP client and its tools, shared across invocations."""
+
+    def __init__(self, server_name: str, config_hash: str, client: MCPClient, tools: list[Any]):
+        self.server_name = server_name
+        self.config_hash = config_hash
+        self.client = client
+        self.tools = tools
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+        # Set while a health check runs; acquirers wait rather than lease a client that may be discarded
+        self.checking = False
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.server_name, self.config_hash
+
+    def is_healthy(self, executor: ThreadPoolExecutor) -> bool:
+        """Check that the server answers within the health check timeout"""
+        try:
+            # MCPClient does not expose a public health check, so ping through the session it keeps on its background thread
+            if not self.client._is_session_active():
+                return False
+            session = self.client._background_thread_session
+            check = self.client._invoke_on_background_thread(session.send_ping())
+        except AttributeError:
+            # Strands releases without these internals: listing tools is a public round trip to the server
+            check = executor.submit(self.client.list_tools_sync)
+        except Exception as e:
+            logger.warning(f"Health check failed for MCP server {self.server_name}: {e}")
+            return False
+        try:
+            check.result(timeout=HEALTH_CHECK_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Health check failed for MCP server {self.server_name}: {e}")
+            return False
+        self.last_checked = time.monotonic()
+        return True
+
+
+class MCPClientPool:
+    """Keeps started MCP clients warm across invocations.
+
+    Clients are keyed by server name and configuration hash, so editing a server's
+    command, args or env starts a fresh client. Starts are single-flight per key and
+    bounded by a per-server timeout; a server that is still starting when the timeout
+    expires is added to the pool once it comes up. A server that fails to start is not
+    started again until a backoff, doubling per consecutive failure, has passed. Idle
+    clients are evicted LRU-style, and a reaper thread stops them even when no
+    invocation arrives.
+    """
+
+    def __init__(
+        self,
+        startup_timeout: float,
+        max_clients: int,
+        max_leases: int,
+        idle_ttl: float,
+        health_check_interval: float,
+        restart_backoff: float,
+        max_restart_backoff: float,
+    ):
+        self.startup_timeout = startup_timeout
+        self.max_clients = max_clients
+        self.max_leases = max_leases
+        self.idle_ttl = idle_ttl
+        self.health_check_interval = health_check_interval
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self._condition = threading.Condition()
+        self._clients: OrderedDict[tuple[str, str], PooledMCPClient] = OrderedDict()
+        self._starting: dict[tuple[str, str], Future] = {}
+        # Consecutive start failures per key and when the server may be started again
+        self._failures: dict[tuple[str, str], tuple[int, float]] = {}
+        self._executor = ThreadPoolExecutor(thread_name_prefix="mcp-pool")
+        self._closed = threading.Event()
+        self._reaper: threading.Thread | None = None
+
+    def acquire(self, server_name: str, server_config: dict, uv_env: dict) -> PooledMCPClient | None:
+        """Lease a started client for the server, starting it if needed.
+
+        Returns None if the server fails to start, does not become available
+        within its startup timeout, or is backing off after failed starts.
+        """
+        key = (server_name, get_server_config_hash(server_config))
+        timeout = min(float(server_config.get("startupTimeout", self.startup_timeout)), MAX_STARTUP_TIMEOUT)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                self._start_reaper()
+                self._evict_idle()
+                entry = self._clients.get(key)
+                if entry is None:
+                    future = self._starting.get(key)
+                    if future is None:
+                        failures, retry_at = self._failures.get(key, (0, 0.0))
+                        if retry_at > time.monotonic():
+                            logger.warning(f"MCP server {server_name} failed to start {failures} times in a row, not starting it for another {retry_at - time.monotonic():.0f}s")
+                            return None
+                        # Run the start in the caller's context so its span nests under the caller's
+                        future = self._executor.submit(contextvars.copy_context().run, self._start, server_name, server_config, uv_env)
+                        self._starting[key] = future
+                        future.add_done_callback(lambda f, key=key: self._on_started(key, f))
+                elif entry.checking or entry.leases >= self.max_leases:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(timeout=remaining):
+                        logger.error(f"Timed out waiting for a lease on MCP server {server_name} ({entry.leases} active)")
+                        return None
+                    continue
+                elif entry.leases == 0 and time.monotonic() - entry.last_checked > self.health_check_interval:
+                    entry.checking = True
+                else:
+                    entry.leases += 1
+                    entry.last_used = time.monotonic()
+                    self._clients.move_to_end(key)
+                    return entry
+
+            if entry is None:
+                try:
+                    future.result(timeout=max(deadline - time.monotonic(), 0))
+                except FutureTimeoutError:
+                    logger.error(f"MCP server {server_name} did not start within {timeout}s, continuing without it")
+                    return None
+                except Exception as e:
+                    logger.error(f"Error creating MCP client for {server_name}: {e}")
+                    return None
+                continue
+
+            healthy = entry.is_healthy(self._executor)
+            with self._condition:
+                entry.checking = False
+                if not healthy:
+                    self._discard(entry)
+                self._condition.notify_all()
+
+    def release(self, entry: PooledMCPClient):
+        """Return a leased client to the pool"""
+        with self._condition:
+            entry.leases = max(entry.leases - 1, 0)
+            entry.last_used = time.monotonic()
+            self._condition.notify_all()
+
+    def stats(self) -> dict[str, Any]:
+        """Summarize pooled clients for logging and readiness reporting"""
+        with self._condition:
+            return {
+                "clients": {entry.server_name: {"leases": entry.leases, "tools": len(entry.tools)} for entry in self._clients.values()},
+                "starting": [name for name, _ in self._starting],
+            }
+
+    def shutdown(self):
+        """Stop every pooled client"""
+        self._closed.set()
+        with self._condition:
+            entries = list(self._clients.values())
+            self._clients.clear()
+        for entry in entries:
+            _stop_mcp_client(entry.server_name, entry.client)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self, server_name: str, server_config: dict, uv_env: dict) -> PooledMCPClient:
+        started_at = time.monotonic()
+        # The pool and schema cache stay keyed by the configuration as written in mcp.json
+        launch_config, artifact = get_mcp_artifact_store().resolve(server_config)
+        source = "pinned" if artifact else "unpinned"
+        with tracer.start_as_current_span("mcp.spawn", attributes={"mcp.server.name": server_name, "mcp.server.command": launch_config.get("command", ""), "mcp.server.source": source}) as span:
+            client = _create_mcp_client(server_name, launch_config, uv_env)
+            try:
+                tools = client.list_tools_sync()
+            except Exception:
+                _stop_mcp_client(server_name, client)
+                raise
+            span.set_attribute("mcp.tool_count", len(tools))
+        MCP_SERVER_LAUNCHES.inc(server=server_name, source=source)
+        if artifact:
+            MCP_ARTIFACT_SAVED_SECONDS.inc(artifact["install_seconds"], server=server_name)
+            detail = f"pinned {artifact['version']}, skipped an install of ~{artifact['install_seconds']:.1f}s"
+        else:
+            detail = source
+        logger.info(f"Started MCP server {server_name} with {len(tools)} tools in {time.monotonic() - started_at:.2f}s ({detail})")
+        return PooledMCPClient(server_name, get_server_config_hash(server_config), client, list(tools))
+
+    def _on_started(self, key: tuple[str, str], future: Future):
+        with self._condition:
+            self._starting.pop(key, None)
+            if not future.cancelled() and future.exception() is None:
+                self._clients[key] = future.result()
+                self._failures.pop(key, None)
+                self._evict_over_capacity()
+            elif not future.cancelled():
+                failures = self._failures.get(key, (0, 0.0))[0] + 1
+                self._failures[key] = (failures, time.monotonic() + min(self.restart_backoff * 2 ** (failures - 1), self.max_restart_backoff))
+            self._condition.notify_all()
+
+    def _discard(self, entry: PooledMCPClient):
+        if self._clients.get(entry.key) is not entry or entry.leases > 0:
+            return
+        del self._clients[entry.key]
+        logger.info(f"Restarting unhealthy MCP server: {entry.server_name}")
+        self._executor.submit(_stop_mcp_client, entry.server_name, entry.client)
+
+    def _start_reaper(self):
+        if (self._reaper is None or not self._reaper.is_alive()) and not self._closed.is_set():
+            self._reaper = threading.Thread(target=self._reap, name="mcp-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        while not self._closed.wait(max(min(self.idle_ttl, REAP_INTERVAL), 1.0)):
+            with self._condition:
+                self._evict_idle()
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for entry in list(self._clients.values()):
+            if entry.leases == 0 and now - entry.last_used > self.idle_ttl:
+                self._evict(entry)
+
+    def _evict_over_capacity(self):
+        for entry in list(self._clients.values()):
+            if len(self._clients) <= self.max_clients:
+                break
+            if entry.leases == 0:
+                self._evict(entry)
+
+    def _evict(self, entry: PooledMCPClient):
+        del self._clients[entry.key]
+        logger.info(f"Evicting idle MCP server: {entry.server_name}")
+        self._executor.submit(_stop_mcp_client, entry.server_name, entry.client)
+
+
+class MCPLease:
+    """Pooled MCP clients held by a single invocation."""
+
+    def __init__(self, pool: MCPClientPool, uv_env: dict):
+        self._pool = pool
+        self._uv_env = uv_env
+        self._entries: dict[str, PooledMCPClient] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, server_name: str, server_config: dict) -> PooledMCPClient | None:
+        """Lease the server's client once for this invocation"""
+        with self._lock:
+            if server_name in self._entries:
+                return self._entries[server_name]
+
+        entry = self._pool.acquire(server_name, server_config, self._uv_env)
+        if entry is None:
+            return None
+
+        with self._lock:
+            if server_name in self._entries:
+                self._pool.release(entry)
+                return self._entries[server_name]
+            self._entries[server_name] = entry
+            return entry
+
+    def release(self):
+        """Return every client leased by this invocation to the pool"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._pool.release(entry)
+
+
+_mcp_client_pool: MCPClientPool | None = None
+_mcp_client_pool_lock = threading.Lock()
+
+
+def get_mcp_client_pool() -> MCPClientPool:
+    """Get the process-wide MCP client pool"""
+    global _mcp_client_pool
+    with _mcp_client_pool_lock:
+        if _mcp_client_pool is None:
+            _mcp_client_pool = MCPClientPool(**get_mcp_pool_settings())
+        return _mcp_client_pool
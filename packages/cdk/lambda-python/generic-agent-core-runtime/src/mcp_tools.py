@@ -0,0 +1,255 @@
+"""Cached MCP tool schemas and results and lazily started MCP tools for the agent core runtime."""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from opentelemetry.trace import Status, StatusCode
+from strands.types.tools import AgentTool, ToolGenerator, ToolResult, ToolSpec, ToolUse
+
+from .mcp_pool import MCPLease, get_server_config_hash
+from .metrics import MCP_TOOL_RESULT_CACHE
+from .telemetry import tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHED_RESULT_MAX_BYTES = 1024 * 1024  # largest result cached for a tool whose toolCache entry sets no maxBytes
+
+
+class ToolSchemaCache:
+    """Disk-backed cache of each MCP server's tool specs.
+
+    Entries are keyed by server name and the hash of its command/args/env, so a
+    config change never serves stale schemas.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._memory: dict[str, tuple[float, list[ToolSpec]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, server_name: str, server_config: dict) -> list[ToolSpec] | None:
+        """Get cached tool specs for the server, or None on a miss"""
+        path = self._path(server_name, server_config)
+        with self._lock:
+            cached = self._memory.get(path)
+        if cached is None:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                cached = (data["cached_at"], data["tools"])
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable tool schema cache for {server_name}: {e}")
+                return None
+            with self._lock:
+                self._memory[path] = cached
+
+        cached_at, tool_specs = cached
+        if time.time() - cached_at > self.ttl:
+            return None
+        return tool_specs
+
+    def put(self, server_name: str, server_config: dict, tool_specs: list[ToolSpec]):
+        """Store the server's tool specs in memory and on disk"""
+        path = self._path(server_name, server_config)
+        cached_at = time.time()
+        with self._lock:
+            previous = self._memory.get(path)
+            self._memory[path] = (cached_at, tool_specs)
+        if previous is not None and previous[1] == tool_specs and cached_at - previous[0] < self.ttl / 2:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"server": server_name, "cached_at": cached_at, "tools": tool_specs}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write tool schema cache for {server_name}: {e}")
+
+    def _path(self, server_name: str, server_config: dict) -> str:
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in server_name)
+        return os.path.join(self.cache_dir, f"{safe_name}-{get_server_config_hash(server_config)}.json")
+
+
+class ToolResultCache:
+    """In-memory cache of MCP tool results shared by every invocation in the process.
+
+    Only tools given a TTL in their server's mcp.json metadata are cached, keyed by
+    server name, configuration hash, tool name and canonicalized arguments. Identical
+    calls made while one is in flight wait for its result instead of calling the
+    server again. Entries are evicted LRU-style once the cache exceeds its byte budget.
+    The cache has no lock: it binds to the event loop that first uses it and raises
+    RuntimeError if used from another loop or thread.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, ToolResult]] = OrderedDict()
+        self._bytes = 0
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @staticmethod
+    def make_key(server_name: str, server_config: dict, tool_name: str, arguments: Any) -> str:
+        return json.dumps([server_name, get_server_config_hash(server_config), tool_name, arguments], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+    async def get_or_call(self, key: str, ttl: float, max_entry_bytes: int, call: Callable[[], Awaitable[ToolResult]]) -> tuple[ToolResult, str]:
+        """Return the cached result for the key or join or make the call, along with whether it was a hit, coalesced or a miss"""
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif loop is not self._loop:
+            raise RuntimeError("ToolResultCache is bound to the event loop that first used it and cannot be shared with another loop")
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached, "hit"
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            # Shielded so a caller that gives up does not cancel the call for the others
+            return await asyncio.shield(future), "coalesced"
+
+        future = asyncio.ensure_future(call())
+        self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._on_done(key, f, ttl, max_entry_bytes))
+        return await asyncio.shield(future), "miss"
+
+    def _get(self, key: str) -> ToolResult | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self._bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _on_done(self, key: str, future: asyncio.Future, ttl: float, max_entry_bytes: int):
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if result.get("status") != "success":
+            return
+        size = len(json.dumps(result["content"], ensure_ascii=False).encode())
+        if size > min(max_entry_bytes, self.max_bytes):
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (time.monotonic() + ttl, size, result)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+
+def get_tool_cache_policy(server_config: dict, tool_name: str) -> dict[str, float] | None:
+    """Get a tool's result cache TTL and entry size limit from its server's mcp.json metadata, or None if it is not cached"""
+    policy = server_config.get("metadata", {}).get("toolCache", {}).get(tool_name)
+    if not policy:
+        return None
+    try:
+        ttl = float(policy["ttl"])
+        max_bytes = int(policy.get("maxBytes", DEFAULT_CACHED_RESULT_MAX_BYTES))
+    except (KeyError, TypeError, ValueError):
+        logger.warning(f"Ignoring invalid toolCache entry for {tool_name}: {policy}")
+        return None
+    return {"ttl": ttl, "max_bytes": max_bytes} if ttl > 0 else None
+
+
+class MCPProxyTool(AgentTool):
+    """Agent tool backed by a pooled MCP server.
+
+    The tool is registered from its cached spec, and the server is leased
+    (and started, if it is not already running) only when the model calls it.
+    Tools with a toolCache policy in mcp.json answer repeated calls from the
+    result cache without touching the server. A copy made by limited_by holds a
+    semaphore only while it calls the server, so cached results never wait for it.
+    """
+
+    def __init__(self, tool_spec: ToolSpec, server_name: str, server_config: dict, mcp_lease: MCPLease, schema_cache: ToolSchemaCache, result_cache: ToolResultCache):
+        super().__init__()
+        self._tool_spec = tool_spec
+        self.server_name = server_name
+        self.server_config = server_config
+        self._mcp_lease = mcp_lease
+        self._schema_cache = schema_cache
+        self._result_cache = result_cache
+        self._cache_policy = get_tool_cache_policy(server_config, tool_spec["name"])
+        self._call_limit: asyncio.Semaphore | None = None
+
+    @property
+    def tool_name(self) -> str:
+        return self._tool_spec["name"]
+
+    @property
+    def tool_spec(self) -> ToolSpec:
+        return self._tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return "python"
+
+    async def stream(self, tool_use: ToolUse, invocation_state: dict[str, Any], **kwargs: Any) -> ToolGenerator:
+        # The span is closed before yielding, since the generator may resume in another context
+        with tracer.start_as_current_span("mcp.tool_call", attributes={"mcp.server.name": self.server_name, "gen_ai.tool.name": self.tool_name, "gen_ai.tool.call.id": tool_use["toolUseId"]}) as span:
+            if self._cache_policy is None:
+                result = await self._call(tool_use)
+            else:
+                key = ToolResultCache.make_key(self.server_name, self.server_config, self.tool_name, tool_use["input"])
+                result, outcome = await self._result_cache.get_or_call(key, self._cache_policy["ttl"], self._cache_policy["max_bytes"], lambda: self._call(tool_use))
+                # A shared result carries the toolUseId of the call that produced it
+                result = {**result, "toolUseId": tool_use["toolUseId"]}
+                MCP_TOOL_RESULT_CACHE.inc(server=self.server_name, tool=self.tool_name, result=outcome)
+                span.set_attribute("mcp.result_cache", outcome)
+            span.set_attribute("gen_ai.tool.status", result["status"])
+            if result["status"] == "error":
+                span.set_status(Status(StatusCode.ERROR))
+        yield result
+
+    def limited_by(self, semaphore: asyncio.Semaphore) -> "MCPProxyTool":
+        """Copy of the tool whose calls to the server each hold the semaphore"""
+        limited = copy.copy(self)
+        limited._call_limit = semaphore
+        return limited
+
+    async def _call(self, tool_use: ToolUse) -> ToolResult:
+        if self._call_limit is None:
+            return await self._call_server(tool_use)
+        async with self._call_limit:
+            return await self._call_server(tool_use)
+
+    async def _call_server(self, tool_use: ToolUse) -> ToolResult:
+        entry = await asyncio.to_thread(self._mcp_lease.acquire, self.server_name, self.server_config)
+        if entry is None:
+            return {
+                "toolUseId": tool_use["toolUseId"],
+                "status": "error",
+                "content": [{"text": f"MCP server {self.server_name} is unavailable. Please try another tool."}],
+            }
+
+        # Keep the cache in sync with what the running server actually exposes
+        self._schema_cache.put(self.server_name, self.server_config, [t.tool_spec for t in entry.tools])
+
+        return await entry.client.call_tool_async(
+            tool_use_id=tool_use["toolUseId"],
+            name=self.tool_name,
+            arguments=tool_use["input"],
+        )
@@ -0,0 +1,343 @@
+"""Response stream encoding for the agent core runtime."""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
+
+from .config import get_stream_buffer_settings, get_stream_settings
+
+logger = logging.getLogger(__name__)
+
+# AgentCore only forwards custom headers with this prefix to the runtime
+STREAM_FORMAT_HEADER = "x-amzn-bedrock-agentcore-runtime-custom-stream-format"
+
+SLOW_CONSUMER_POLICIES = ("coalesce", "drop", "abort")
+
+MEDIA_TYPES = {
+    "ndjson": "text/event-stream",
+    "compact": "text/event-stream",
+}
+
+# Short names for the event keys used in compact framing. Internal clients reverse the mapping.
+SHORT_KEYS = {
+    "event": "e",
+    "messageStart": "ms",
+    "messageStop": "me",
+    "contentBlockStart": "cs",
+    "contentBlockDelta": "cd",
+    "contentBlockStop": "ce",
+    "contentBlockIndex": "i",
+    "metadata": "md",
+    "internalServerException": "err",
+    "start": "s",
+    "delta": "d",
+    "text": "t",
+    "reasoningContent": "r",
+    "signature": "sg",
+    "toolUse": "tu",
+    "toolUseId": "id",
+    "name": "n",
+    "input": "in",
+    "role": "ro",
+    "stopReason": "sr",
+    "message": "m",
+    "usage": "u",
+    "metrics": "mt",
+    "inputTokens": "it",
+    "outputTokens": "ot",
+    "totalTokens": "tt",
+    "cacheReadInputTokens": "cr",
+    "cacheWriteInputTokens": "cw",
+    "latencyMs": "l",
+    "timeToFirstTokenMs": "ft",
+    "turns": "tn",
+    "toolCalls": "tc",
+}
+
+
+def dumps(event: dict[str, Any]) -> bytes:
+    """Serialize an event to compact UTF-8 JSON"""
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+
+def shorten_keys(value: Any) -> Any:
+    """Rename event keys to their compact-framing short names"""
+    if isinstance(value, dict):
+        return {SHORT_KEYS.get(key, key): shorten_keys(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [shorten_keys(item) for item in value]
+    return value
+
+
+def get_delta_text(event: dict[str, Any]) -> tuple[str, Any, str] | None:
+    """Get (kind, content block index, text) of a delta that can be concatenated with its neighbours"""
+    if len(event) != 1 or "event" not in event:
+        return None
+    inner = event["event"]
+    if len(inner) != 1 or "contentBlockDelta" not in inner:
+        return None
+    block_delta = inner["contentBlockDelta"]
+    delta = block_delta.get("delta")
+    if not isinstance(delta, dict) or len(delta) != 1:
+        return None
+
+    index = block_delta.get("contentBlockIndex")
+    if isinstance(delta.get("text"), str):
+        return "text", index, delta["text"]
+    reasoning = delta.get("reasoningContent")
+    if isinstance(reasoning, dict) and reasoning.keys() == {"text"} and isinstance(reasoning["text"], str):
+        return "reasoningContent", index, reasoning["text"]
+    tool_use = delta.get("toolUse")
+    if isinstance(tool_use, dict) and tool_use.keys() == {"input"} and isinstance(tool_use["input"], str):
+        return "toolUse", index, tool_use["input"]
+    return None
+
+
+def build_delta_event(kind: str, index: Any, text: str) -> dict[str, Any]:
+    """Build a content block delta event carrying concatenated text"""
+    if kind == "text":
+        delta = {"text": text}
+    elif kind == "reasoningContent":
+        delta = {"reasoningContent": {"text": text}}
+    else:
+        delta = {"toolUse": {"input": text}}
+    block_delta = {"delta": delta}
+    if index is not None:
+        block_delta["contentBlockIndex"] = index
+    return {"event": {"contentBlockDelta": block_delta}}
+
+
+class EventChannel:
+    """Bounded buffer between the agent and the HTTP response.
+
+    The agent's event generator is drained by its own task, so the model loop and
+    tool execution do not wait on a slow client while there is room. Once max_events
+    are buffered the slow-consumer policy applies to new deltas: "coalesce" merges
+    them into the last buffered delta of the same block, "drop" discards them, and
+    "abort" coalesces until the client has read nothing for stall_timeout seconds,
+    then cancels the agent and ends the stream with an error. An event the policy
+    cannot absorb, such as a block start or stop, waits for the client to make room,
+    and the stream is aborted the same way if the client stalls. The buffer never
+    holds more than max_events, plus the final error event of an aborted stream.
+    """
+
+    def __init__(self, max_events: int = 1024, policy: str = "coalesce", stall_timeout: float = 300.0):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            logger.warning(f"Unknown slow consumer policy {policy}, using coalesce")
+            policy = "coalesce"
+        self.max_events = max_events
+        self.policy = policy
+        self.stall_timeout = stall_timeout
+        self.coalesced = 0
+        self.dropped = 0
+        self._events: deque[dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._done = False
+        self._last_read = time.monotonic()
+        self._task: asyncio.Task | None = None
+
+    def start(self, events: AsyncIterator[dict[str, Any]]):
+        """Start draining the agent's events on a separate task"""
+        self._task = asyncio.create_task(self._fill(events))
+
+    async def get(self, timeout: float | None = None) -> dict[str, Any] | None:
+        """Wait for the next event, or None once the stream has ended.
+
+        Raises TimeoutError if no event arrives within the timeout.
+        """
+        while not self._events:
+            if self._done:
+                return None
+            self._ready.clear()
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        self._last_read = time.monotonic()
+        self._room.set()
+        return self._events.popleft()
+
+    def close(self):
+        """Cancel the agent if it is still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self.coalesced or self.dropped:
+            logger.warning(f"Slow client: {self.coalesced} deltas coalesced and {self.dropped} dropped ({self.policy})")
+
+    async def _fill(self, events: AsyncIterator[dict[str, Any]]):
+        try:
+            async for event in events:
+                if not await self._put(event):
+                    break
+        except Exception as e:
+            logger.error(f"Error producing stream events: {e}", exc_info=True)
+            self._events.append({"event": {"internalServerException": {"message": f"An error occurred while processing your request: {str(e)}"}}})
+        finally:
+            self._done = True
+            self._ready.set()
+            aclose = getattr(events, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _put(self, event: dict[str, Any]) -> bool:
+        while len(self._events) >= self.max_events:
+            if self.policy == "abort" and time.monotonic() - self._last_read > self.stall_timeout:
+                return self._abort()
+            if self._absorb(event):
+                return True
+
+            # Nothing to merge the event into, so wait for the client to read
+            self._room.clear()
+            try:
+                await asyncio.wait_for(self._room.wait(), max(self.stall_timeout - (time.monotonic() - self._last_read), 0))
+            except TimeoutError:
+                return self._abort()
+
+        self._events.append(event)
+        self._ready.set()
+        return True
+
+    def _absorb(self, event: dict[str, Any]) -> bool:
+        """Drop or coalesce a delta into a full buffer, returning False if the policy cannot absorb it"""
+        delta = get_delta_text(event)
+        if delta is None:
+            return False
+        if self.policy == "drop":
+            self.dropped += 1
+            return True
+        last = get_delta_text(self._events[-1])
+        if last is not None and last[:2] == delta[:2]:
+            self._events[-1] = build_delta_event(delta[0], delta[1], last[2] + delta[2])
+            self.coalesced += 1
+            return True
+        return False
+
+    def _abort(self) -> bool:
+        logger.warning(f"Client read nothing for {self.stall_timeout}s, aborting the stream")
+        self._events.append({"event": {"internalServerException": {"message": "The stream was aborted because the client stopped reading."}}})
+        return False
+
+
+class StreamEncoder:
+    """Serializes stream events into as few HTTP chunks as the latency budget allows.
+
+    Adjacent text, reasoning and tool input deltas of the same content block are
+    merged into one event, and events are written in batches. A batch is flushed
+    when it grows past flush_bytes, when its oldest event has waited flush_interval
+    seconds (even if no further event arrives), or when a structural event (block
+    start/stop, message stop, metadata) arrives. The first delta is always sent
+    immediately so time to first token is unchanged.
+    """
+
+    def __init__(self, stream_format: str = "ndjson", flush_interval: float = 0.03, flush_bytes: int = 8192):
+        if stream_format not in MEDIA_TYPES:
+            logger.warning(f"Unknown stream format {stream_format}, using ndjson")
+            stream_format = "ndjson"
+        self.stream_format = stream_format
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.events = 0
+        self.chunks = 0
+        self.bytes = 0
+        self._buffer: list[bytes] = []
+        self._buffered_bytes = 0
+        self._buffered_at: float | None = None
+        self._pending: tuple[str, Any] | None = None
+        self._pending_parts: list[str] = []
+        self._pending_size = 0
+        self._sent_delta = False
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.stream_format]
+
+    async def encode(self, channel: EventChannel) -> AsyncGenerator[bytes]:
+        """Encode the events of a channel into response chunks"""
+        try:
+            while True:
+                try:
+                    event = await channel.get(self._time_until_flush())
+                except TimeoutError:
+                    yield self.flush()
+                    continue
+                if event is None:
+                    break
+                if self.add(event):
+                    yield self.flush()
+            if self._buffered_at is not None:
+                yield self.flush()
+        finally:
+            channel.close()
+            logger.info(f"Streamed {self.events} events in {self.chunks} chunks ({self.bytes} bytes, {self.stream_format})")
+
+    def add(self, event: dict[str, Any]) -> bool:
+        """Buffer an event and return whether the buffer should be flushed now"""
+        self.events += 1
+        now = time.monotonic()
+        if self._buffered_at is None:
+            self._buffered_at = now
+
+        delta = get_delta_text(event)
+        if delta is None:
+            self._close_pending()
+            self._write(event)
+            return True
+
+        kind, index, text = delta
+        if self._pending != (kind, index):
+            self._close_pending()
+            self._pending = (kind, index)
+        self._pending_parts.append(text)
+        self._pending_size += len(text)
+
+        if not self._sent_delta:
+            self._sent_delta = True
+            return True
+        return self.flush_interval <= 0 or self._buffered_bytes + self._pending_size >= self.flush_bytes or now - self._buffered_at >= self.flush_interval
+
+    def flush(self) -> bytes:
+        """Return everything buffered as a single chunk"""
+        self._close_pending()
+        chunk = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        self._buffered_at = None
+        self.chunks += 1
+        self.bytes += len(chunk)
+        return chunk
+
+    def _time_until_flush(self) -> float | None:
+        if self._buffered_at is None:
+            return None
+        return max(self._buffered_at + self.flush_interval - time.monotonic(), 0)
+
+    def _close_pending(self):
+        if self._pending is None:
+            return
+        kind, index = self._pending
+        self._write(build_delta_event(kind, index, "".join(self._pending_parts)))
+        self._pending = None
+        self._pending_parts.clear()
+        self._pending_size = 0
+
+    def _write(self, event: dict[str, Any]):
+        if self.stream_format == "compact":
+            event = shorten_keys(event)
+        data = dumps(event) + b"\n"
+        self._buffer.append(data)
+        self._buffered_bytes += len(data)
+
+
+def create_stream_encoder(headers: dict[str, str]) -> StreamEncoder:
+    """Create a stream encoder for the framing requested in the invocation headers"""
+    stream_format = headers.get(STREAM_FORMAT_HEADER, "ndjson").strip().lower()
+    return StreamEncoder(stream_format, **get_stream_settings())
+
+
+def start_event_channel(events: AsyncIterator[dict[str, Any]]) -> EventChannel:
+    """Start running the agent's event stream into a bounded channel"""
+    channel = EventChannel(**get_stream_buffer_settings())
+    channel.start(events)
+    return channel
@@ -0,0 +1,68 @@
+"""OpenTelemetry spans for the agent core runtime.
+
+The Dockerfile runs the app under opentelemetry-instrument, which installs the
+global tracer provider; without it these spans are no-ops.
+"""
+
+from typing import Any
+
+from opentelemetry import trace
+from opentelemetry.trace import Span, Status, StatusCode
+
+tracer = trace.get_tracer("generic-agent-core-runtime")
+
+# Maps Bedrock usage fields to span attributes
+USAGE_ATTRIBUTES = {
+    "inputTokens": "gen_ai.usage.input_tokens",
+    "outputTokens": "gen_ai.usage.output_tokens",
+    "cacheReadInputTokens": "gen_ai.usage.cache_read_input_tokens",
+    "cacheWriteInputTokens": "gen_ai.usage.cache_write_input_tokens",
+}
+
+
+def record_exception(span: Span, error: BaseException):
+    """Mark a span as failed with the exception"""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+class CycleSpans:
+    """One span per agent event-loop cycle.
+
+    Driven by the Strands callback handler: a cycle's span starts on its
+    start_event_loop callback and ends when the next cycle starts or the
+    invocation finishes, so it covers the model turn and the tools it called.
+    Token usage and tool calls are read from the model's stream events.
+    """
+
+    def __init__(self):
+        self._span: Span | None = None
+        self._tool_calls = 0
+
+    def start(self, index: int):
+        """End the current cycle's span and start the next one"""
+        self.end()
+        self._span = tracer.start_span("agent.cycle", attributes={"agent.cycle.index": index})
+        self._tool_calls = 0
+
+    def record(self, event: dict[str, Any]):
+        """Add a model stream event's usage and tool calls to the current cycle"""
+        if self._span is None or not isinstance(event, dict):
+            return
+        usage = event.get("metadata", {}).get("usage")
+        if usage:
+            for key, attribute in USAGE_ATTRIBUTES.items():
+                if key in usage:
+                    self._span.set_attribute(attribute, usage[key])
+        if "toolUse" in event.get("contentBlockStart", {}).get("start", {}):
+            self._tool_calls += 1
+            self._span.set_attribute("agent.cycle.tool_calls", self._tool_calls)
+
+    def end(self, error: BaseException | None = None):
+        """End the current cycle's span, if any"""
+        if self._span is None:
+            return
+        if error is not None:
+            record_exception(self._span, error)
+        self._span.end()
+        self._span = None
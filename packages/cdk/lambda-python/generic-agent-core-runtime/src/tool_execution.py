@@ -0,0 +1,104 @@
+"""Concurrency policy for the tool calls of a single model turn in the agent core runtime."""
+
+import asyncio
+import logging
+from typing import Any
+
+from strands.types.tools import AgentTool, ToolGenerator, ToolSpec, ToolUse
+
+from .mcp_pool import get_server_config_hash
+from .mcp_tools import MCPProxyTool
+
+logger = logging.getLogger(__name__)
+
+
+class ServerConcurrencyLimits:
+    """Process-wide caps on concurrent calls to each MCP server.
+
+    A server's cap comes from maxConcurrentCalls in its mcp.json entry, falling
+    back to the default; 0 leaves the server uncapped. Caps are shared by every
+    invocation, since concurrent invocations lease the same pooled server process.
+    """
+
+    def __init__(self, default_limit: int):
+        self.default_limit = default_limit
+        self._semaphores: dict[tuple[str, str], asyncio.Semaphore] = {}
+
+    def get(self, server_name: str, server_config: dict) -> asyncio.Semaphore | None:
+        """Get the semaphore bounding calls to the server, or None if it is uncapped"""
+        key = (server_name, get_server_config_hash(server_config))
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            try:
+                limit = int(server_config.get("maxConcurrentCalls", self.default_limit))
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid maxConcurrentCalls for MCP server {server_name}. Defaulting to {self.default_limit}.")
+                limit = self.default_limit
+            if limit <= 0:
+                return None
+            semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(limit))
+        return semaphore
+
+
+class ConcurrencyLimitedTool(AgentTool):
+    """Agent tool that holds a semaphore for the whole of each call to the tool it wraps."""
+
+    def __init__(self, tool: AgentTool, semaphore: asyncio.Semaphore):
+        super().__init__()
+        self._tool = tool
+        self._semaphore = semaphore
+
+    @property
+    def tool_name(self) -> str:
+        return self._tool.tool_name
+
+    @property
+    def tool_spec(self) -> ToolSpec:
+        return self._tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self._tool.tool_type
+
+    async def stream(self, tool_use: ToolUse, invocation_state: dict[str, Any], **kwargs: Any) -> ToolGenerator:
+        async with self._semaphore:
+            async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+                yield event
+
+
+class ToolExecutionPolicy:
+    """How the tool calls of an invocation's model turns run.
+
+    Strands starts every tool call of a turn at once and returns the results in the
+    order the model requested them, so a turn takes as long as its slowest call.
+    The policy wraps the invocation's tools to restrict that:
+
+    - concurrent: calls run as strands starts them
+    - bounded: calls run concurrently, with calls to each MCP server capped by its limit
+    - sequential: one call at a time across all of the invocation's tools
+    """
+
+    def __init__(self, mode: str, server_limits: ServerConcurrencyLimits):
+        self.mode = mode
+        self.server_limits = server_limits
+        self._turn = asyncio.Semaphore(1)
+
+    def wrap(self, tool: Any) -> Any:
+        """Wrap a tool to run as the mode allows, including tools added to the agent later in the invocation"""
+        semaphore = self._get_semaphore(tool)
+        if semaphore is None:
+            return tool
+        # MCP tools hold the semaphore only while calling their server, so result cache hits never queue
+        if isinstance(tool, MCPProxyTool):
+            return tool.limited_by(semaphore)
+        return ConcurrencyLimitedTool(tool, semaphore)
+
+    def _get_semaphore(self, tool: Any) -> asyncio.Semaphore | None:
+        if self.mode == "sequential":
+            return self._turn
+        if self.mode == "bounded" and isinstance(tool, MCPProxyTool):
+            return self.server_limits.get(tool.server_name, tool.server_config)
+        return None
+
+    def wrap_all(self, tools: list[Any]) -> list[Any]:
+        return [self.wrap(tool) for tool in tools]
@@ -0,0 +1,104 @@
+"""Relevance ranking of MCP tools for the agent core runtime."""
+
+import json
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any
+
+from .mcp_tools import MCPProxyTool
+
+REQUEST_MORE_TOOLS_TOOL_NAME = "request_more_tools"
+WORD_PATTERN = re.compile(r"[^\W_]+")
+CAMEL_CASE_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase terms for ranking.
+
+    snake_case, kebab-case and camelCase identifiers are split into words and simple
+    plurals are folded, so "listBuckets" matches "list the bucket". Words in scripts
+    written without spaces, such as Japanese, are indexed as character bigrams.
+    """
+    terms = []
+    for word in WORD_PATTERN.findall(CAMEL_CASE_BOUNDARY.sub(" ", text)):
+        word = word.lower()
+        if word.isascii():
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            terms.append(word)
+        elif len(word) == 1:
+            terms.append(word)
+        else:
+            terms.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def get_query_text(prompt: str | list[dict[str, Any]], messages: list[Any], user_turns: int = 2) -> str:
+    """Text of the prompt and the latest user turns, which tools are ranked against"""
+    turns = [message.get("content", []) for message in messages if isinstance(message, dict) and message.get("role") == "user"][-user_turns:]
+    texts = [prompt] if isinstance(prompt, str) else [block.get("text", "") for block in prompt if isinstance(block, dict)]
+    for content in turns:
+        texts += [content] if isinstance(content, str) else [block.get("text", "") for block in content if isinstance(block, dict)]
+    return "\n".join(text for text in texts if text)
+
+
+def describe_tool(tool: Any) -> str:
+    """Text a tool is indexed by: its name, description and parameter names, plus its server's name and metadata"""
+    spec = tool.tool_spec
+    properties = spec.get("inputSchema", {}).get("json", {}).get("properties", {})
+    parts = [spec["name"], spec.get("description", ""), " ".join(properties)]
+    if isinstance(tool, MCPProxyTool):
+        metadata = tool.server_config.get("metadata", {})
+        parts += [tool.server_name, metadata.get("category", ""), metadata.get("description", "")]
+    return "\n".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def _count_terms(text: str) -> Counter:
+    return Counter(tokenize(text))
+
+
+def summarize_tool(tool: Any) -> str:
+    """The first line of a tool's description"""
+    description = tool.tool_spec.get("description", "").strip()
+    return description.splitlines()[0] if description else ""
+
+
+def estimate_spec_tokens(tool: Any) -> int:
+    """Roughly estimate the tokens a tool's spec adds to every model call (about four characters per token)"""
+    return len(json.dumps(tool.tool_spec, ensure_ascii=False)) // 4
+
+
+class ToolIndex:
+    """Okapi BM25 index over tool descriptions.
+
+    Built per invocation from the tools it may use. Term counts are cached by
+    each tool's indexed text, which rarely changes between invocations, so
+    building the index mostly costs the document frequency pass.
+    """
+
+    def __init__(self, tools: list[Any], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.tools = {tool.tool_name: tool for tool in tools}
+        self._term_counts = {name: _count_terms(describe_tool(tool)) for name, tool in self.tools.items()}
+        self._lengths = {name: sum(counts.values()) for name, counts in self._term_counts.items()}
+        self._average_length = sum(self._lengths.values()) / len(self._lengths) if self._lengths else 0.0
+        document_frequency = Counter(term for counts in self._term_counts.values() for term in counts)
+        count = len(self.tools)
+        self._idf = {term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5)) for term, frequency in document_frequency.items()}
+
+    def search(self, query: str, limit: int, exclude: set[str] | frozenset[str] = frozenset()) -> list[str]:
+        """Return the names of up to limit tools that match the query, most relevant first"""
+        query_terms = [term for term in set(tokenize(query)) if term in self._idf]
+        scores = {}
+        for name, counts in self._term_counts.items():
+            if name in exclude:
+                continue
+            length_norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / self._average_length)
+            score = sum(self._idf[term] * counts[term] * (self.k1 + 1) / (counts[term] + length_norm) for term in query_terms if term in counts)
+            if score > 0:
+                scores[name] = score
+        return sorted(scores, key=lambda name: -scores[name])[:limit]
@@ -0,0 +1,144 @@
+"""Spilling of large tool outputs to the workspace for the agent core runtime."""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from strands.experimental.hooks import AfterToolInvocationEvent
+from strands.hooks import HookProvider, HookRegistry
+
+from .metrics import TOOL_OUTPUT_SPILLS, TOOL_OUTPUT_TOKENS_SAVED
+from .utils import create_id
+
+logger = logging.getLogger(__name__)
+
+TOOL_OUTPUT_DIR = ".tool-outputs"
+READ_TOOL_OUTPUT_TOOL_NAME = "read_tool_output"
+HANDLE_PATTERN = re.compile(r"^[0-9a-f-]{36}$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the tokens a text costs the model (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+
+class ToolOutputStore:
+    """Full tool outputs stored under an invocation's workspace, addressed by handle."""
+
+    def __init__(self, workspace_dir: str):
+        self.directory = os.path.join(workspace_dir, TOOL_OUTPUT_DIR)
+
+    def save(self, text: str) -> str:
+        """Store an output and return its handle"""
+        handle = create_id()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(handle), "w", encoding="utf-8") as f:
+            f.write(text)
+        return handle
+
+    def read_lines(self, handle: str) -> list[str]:
+        """Read a stored output as lines, raising ValueError for an unknown handle"""
+        try:
+            with open(self._path(handle), encoding="utf-8") as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            raise ValueError(f"No stored tool output with handle {handle}") from None
+
+    def page(self, handle: str, offset: int, limit: int, max_chars: int) -> str:
+        """Return up to limit lines of a stored output starting at a 0-based line offset"""
+        lines = self.read_lines(handle)
+        offset = max(offset, 0)
+        selected = lines[offset : offset + max(limit, 1)]
+        body, shown = _join_within(selected, max_chars, lambda line: line)
+        end = offset + shown
+        more = f" Call again with offset={end} to continue." if end < len(lines) else ""
+        return f"[Lines {offset}-{end - 1} of {len(lines)}.{more}]\n{body}" if shown else f"[No lines at offset {offset}; the output has {len(lines)} lines.]"
+
+    def grep(self, handle: str, pattern: str, limit: int, max_chars: int) -> str:
+        """Return the lines of a stored output that match a regular expression, prefixed with their line numbers"""
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid pattern {pattern!r}: {e}") from None
+        matches = [(index, line) for index, line in enumerate(self.read_lines(handle)) if regex.search(line)]
+        body, shown = _join_within(matches[: max(limit, 1)], max_chars, lambda match: f"{match[0]}: {match[1]}")
+        return f"[{len(matches)} matching lines, showing {shown}.]\n{body}" if matches else f"[No lines match {pattern!r}.]"
+
+    def _path(self, handle: str) -> str:
+        if not HANDLE_PATTERN.match(handle):
+            raise ValueError(f"Invalid tool output handle: {handle}")
+        return os.path.join(self.directory, f"{handle}.txt")
+
+
+def _join_within(items: list[Any], max_chars: int, render: Callable[[Any], str]) -> tuple[str, int]:
+    """Join rendered items line by line until the next one would exceed max_chars"""
+    rendered = []
+    total = 0
+    for item in items:
+        line = render(item)
+        if rendered and total + len(line) + 1 > max_chars:
+            break
+        rendered.append(line[:max_chars])
+        total += len(line) + 1
+    return "\n".join(rendered), len(rendered)
+
+
+class ToolOutputSpiller(HookProvider):
+    """Replaces oversized tool results with a preview and a handle to the stored output.
+
+    A tool result whose text exceeds the threshold is written to the invocation's
+    workspace, and the model receives only its head and tail with instructions to
+    page or search the rest through the read_tool_output tool. Results of that tool
+    are never spilled, and non-text content such as images passes through unchanged.
+    """
+
+    def __init__(self, store: ToolOutputStore, threshold_chars: int, preview_chars: int):
+        self.store = store
+        self.threshold_chars = threshold_chars
+        self.preview_chars = preview_chars
+        self.spills = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AfterToolInvocationEvent, self.on_tool_result)
+
+    def on_tool_result(self, event: AfterToolInvocationEvent):
+        tool_name = event.tool_use.get("name", "unknown")
+        if self.threshold_chars <= 0 or tool_name == READ_TOOL_OUTPUT_TOOL_NAME:
+            return
+
+        content = event.result.get("content", [])
+        texts = [block["text"] if "text" in block else json.dumps(block["json"], ensure_ascii=False) for block in content if "text" in block or "json" in block]
+        text = "\n".join(texts)
+        if len(text) <= self.threshold_chars:
+            return
+
+        try:
+            handle = self.store.save(text)
+        except OSError as e:
+            logger.warning(f"Failed to store the output of {tool_name}, passing it through in full: {e}")
+            return
+
+        preview = self._preview(text, handle, tool_name)
+        others = [block for block in content if "text" not in block and "json" not in block]
+        event.result = {**event.result, "content": [{"text": preview}, *others]}
+
+        saved = estimate_tokens(text) - estimate_tokens(preview)
+        with self._lock:
+            self.spills += 1
+            self.tokens_saved += saved
+        TOOL_OUTPUT_SPILLS.inc(tool=tool_name)
+        TOOL_OUTPUT_TOKENS_SAVED.inc(saved, tool=tool_name)
+        logger.info(f"Stored {len(text)} chars of {tool_name} output as {handle}, saving ~{saved} tokens")
+
+    def _preview(self, text: str, handle: str, tool_name: str) -> str:
+        head = text[: self.preview_chars // 2]
+        tail = text[len(text) - self.preview_chars // 2 :]
+        line_count = text.count("\n") + 1
+        omitted = len(text) - len(head) - len(tail)
+        return f'[The output of {tool_name} was {len(text)} characters ({line_count} lines), too large to show in full. It is stored with handle "{handle}"; call {READ_TOOL_OUTPUT_TOOL_NAME} with this handle and an offset to page through it, or with a pattern to search it. The first and last parts follow.]\n{head}\n[... {omitted} characters omitted ...]\n{tail}'
@@ -1,17 +1,25 @@
 """Tool management for the agent core runtime."""
 
+import asyncio
 import json
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
-import boto3
-from mcp import StdioServerParameters, stdio_client
+from opentelemetry import trace
 from strands import tool
-from strands.tools.mcp import MCPClient
 
-from .config import WORKSPACE_DIR, get_aws_credentials, get_uv_environment
+from .config import get_aws_credentials, get_mcp_tool_cache_settings, get_mcp_tool_result_cache_settings, get_s3_upload_settings, get_tool_execution_settings, get_tool_output_settings, get_uv_environment, is_lazy_mcp_spawn_enabled
+from .context import InvocationContext
+from .mcp_pool import MCPLease, get_mcp_client_pool
+from .mcp_tools import MCPProxyTool, ToolResultCache, ToolSchemaCache
+from .metrics import MCP_TOOL_LOAD_SECONDS
+from .telemetry import tracer
+from .tool_execution import ServerConcurrencyLimits, ToolExecutionPolicy
+from .tool_index import REQUEST_MORE_TOOLS_TOOL_NAME, ToolIndex, estimate_spec_tokens, summarize_tool
+from .tool_outputs import READ_TOOL_OUTPUT_TOOL_NAME
+from .uploads import S3ArtifactUploader, find_workspace_files
+from .workspace import is_path_in_workspace
 
 # Import strands-agents code interpreter tool
 try:
@@ -27,124 +35,114 @@ except ImportError as e:
 logger = logging.getLogger(__name__)
 
 
-def _create_mcp_client(server_name: str, server_config: dict, uv_env: dict) -> tuple[str, MCPClient | None]:
-    """Create and start an MCP client (for parallel execution)"""
-    try:
-        client = MCPClient(
-            lambda: stdio_client(
-                StdioServerParameters(
-                    command=server_config["command"],
-                    args=server_config.get("args", []),
-                    env={**uv_env, **server_config.get("env", {})},
-                )
-            )
-        )
-        client.start()
-        return server_name, client
-    except Exception as e:
-        logger.error(f"Error creating MCP client for {server_name}: {e}")
-        return server_name, None
-
-
 class ToolManager:
     """Manages tools including MCP tools and built-in tools."""
 
     def __init__(self):
-        self.mcp_tools = None
-        self.session_id = None
-        self.trace_id = None
-
-    def set_session_info(self, session_id: str, trace_id: str):
-        """Set session and trace IDs for tool operations"""
-        self.session_id = session_id
-        self.trace_id = trace_id
-
-    def load_mcp_tools(self) -> list[Any]:
-        """Load MCP tools from environment variable or mcp.json file"""
-        if self.mcp_tools is not None:
-            return self.mcp_tools
-
+        self.schema_cache = ToolSchemaCache(**get_mcp_tool_cache_settings())
+        self.result_cache = ToolResultCache(**get_mcp_tool_result_cache_settings())
+        self.server_limits = ServerConcurrencyLimits(get_tool_execution_settings()["max_concurrent_calls"])
+
+    def create_mcp_lease(self) -> MCPLease:
+        """Create a lease on pooled MCP clients for a single invocation"""
+        return MCPLease(get_mcp_client_pool(), get_uv_environment())
+
+    def load_mcp_config(self) -> dict[str, dict]:
+        """Load MCP server configurations from the mcp.json file at MCP_CONFIG_PATH"""
+        mcp_config_path = os.environ.get("MCP_CONFIG_PATH")
+        if mcp_config_path and os.path.exists(mcp_config_path):
+            logger.info(f"Loading MCP configuration from {mcp_config_path}")
+            with open(mcp_config_path) as f:
+                mcp_config = json.load(f)
+            return mcp_config.get("mcpServers", {})
+        return {}
+
+    async def load_mcp_tools(self, mcp_lease: MCPLease) -> list[Any]:
+        """Load MCP tools for every server in mcp.json"""
         try:
-            # Log UV environment configuration
-            uv_env = get_uv_environment()
-
-            # Load from MCP_CONFIG_PATH
-            mcp_config_path = os.environ.get("MCP_CONFIG_PATH")
-            if mcp_config_path and os.path.exists(mcp_config_path):
-                logger.info(f"Loading MCP configuration from {mcp_config_path}")
-                with open(mcp_config_path) as f:
-                    mcp_config = json.load(f)
-                mcp_servers = mcp_config.get("mcpServers", {})
-            else:
-                return []
-
-            mcp_clients = []
-
-            with ThreadPoolExecutor() as executor:
-                futures = [executor.submit(_create_mcp_client, name, config, uv_env) for name, config in mcp_servers.items()]
-                for future in futures:
-                    name, client = future.result()
-                    if client:
-                        mcp_clients.append(client)
-
-            # Flatten the tools
-            self.mcp_tools = sum([c.list_tools_sync() for c in mcp_clients], [])
-            logger.info(f"Loaded {len(self.mcp_tools)} MCP tools")
-            return self.mcp_tools
-
+            return await self._lease_mcp_tools(await asyncio.to_thread(self.load_mcp_config), mcp_lease)
         except Exception as e:
             logger.error(f"Error loading MCP tools: {e}")
-            self.mcp_tools = []
-            return self.mcp_tools
+            return []
 
-    def load_mcp_tools_by_names(self, server_names: list[str]) -> list[Any]:
-        """Load MCP tools from environment variable or mcp.json by server names"""
+    async def load_mcp_tools_by_names(self, server_names: list[str], mcp_lease: MCPLease) -> list[Any]:
+        """Load MCP tools from mcp.json by server names"""
         if not server_names:
             return []
 
         try:
-            # Log UV environment configuration
-            uv_env = get_uv_environment()
-
-            # Load from MCP_CONFIG_PATH
-            mcp_config_path = os.environ.get("MCP_CONFIG_PATH")
-            if mcp_config_path and os.path.exists(mcp_config_path):
-                logger.info(f"Loading MCP configuration from {mcp_config_path}")
-                with open(mcp_config_path) as f:
-                    mcp_config = json.load(f)
-                available_servers = mcp_config.get("mcpServers", {})
-            else:
-                return []
-
+            available_servers = await asyncio.to_thread(self.load_mcp_config)
             logger.info(f"Found {len(available_servers)} available MCP servers")
-            mcp_clients = []
-
             servers_to_load = {name: available_servers[name] for name in server_names if name in available_servers}
-
-            with ThreadPoolExecutor() as executor:
-                futures = [executor.submit(_create_mcp_client, name, config, uv_env) for name, config in servers_to_load.items()]
-                for future in futures:
-                    name, client = future.result()
-                    if client:
-                        mcp_clients.append(client)
-                        logger.info(f"Successfully loaded MCP server: {name}")
-
-            # Flatten the tools
-            dynamic_tools = sum([c.list_tools_sync() for c in mcp_clients], [])
-            logger.info(f"Loaded {len(dynamic_tools)} MCP tools from {len(mcp_clients)} servers")
-            return dynamic_tools
-
+            return await self._lease_mcp_tools(servers_to_load, mcp_lease)
         except Exception as e:
             logger.error(f"Error loading MCP tools by names: {e}")
             return []
 
-    def get_upload_tool(self):
+    def warm_up(self) -> dict[str, bool]:
+        """Start every server in mcp.json and cache its tool schemas, returning which servers came up
+
+        The clients stay in the pool after the warm-up's lease is released, so
+        invocations lease them already started.
+        """
+        servers = self.load_mcp_config()
+        mcp_lease = self.create_mcp_lease()
+        try:
+            # Runs on a warm-up worker thread, which has no event loop of its own
+            asyncio.run(self._lease_mcp_tools(servers, mcp_lease, start_all=True))
+        finally:
+            mcp_lease.release()
+        started = get_mcp_client_pool().stats()["clients"]
+        return {name: name in started for name in servers}
+
+    async def _lease_mcp_tools(self, servers: dict[str, dict], mcp_lease: MCPLease, start_all: bool = False) -> list[Any]:
+        """Build MCP tools for the servers, starting only those without cached tool schemas unless start_all is set"""
+        if not servers:
+            return []
+
+        lazy = is_lazy_mcp_spawn_enabled() and not start_all
+        # A server's first lookup reads its cache file from disk
+        cached_specs = await asyncio.to_thread(lambda: {name: self.schema_cache.get(name, config) for name, config in servers.items()}) if lazy else {}
+        servers_to_start = {name: config for name, config in servers.items() if cached_specs.get(name) is None}
+
+        # Starts block on the server process, so each waits on its own thread while the event loop
+        # keeps serving other invocations; to_thread carries the caller's span into the thread
+        def acquire(name: str, config: dict):
+            with MCP_TOOL_LOAD_SECONDS.time(server=name), tracer.start_as_current_span("mcp.load_server", attributes={"mcp.server.name": name}) as span:
+                entry = mcp_lease.acquire(name, config)
+                span.set_attribute("mcp.available", entry is not None)
+            if entry is not None:
+                self.schema_cache.put(name, config, [t.tool_spec for t in entry.tools])
+            return entry
+
+        started = await asyncio.gather(*(asyncio.to_thread(acquire, name, config) for name, config in servers_to_start.items()))
+        entries = dict(zip(servers_to_start, started, strict=True))
+
+        dynamic_tools = []
+        for name, config in servers.items():
+            tool_specs = cached_specs.get(name)
+            if tool_specs is None:
+                entry = entries.get(name)
+                if entry is None:
+                    continue
+                tool_specs = [t.tool_spec for t in entry.tools]
+            dynamic_tools.extend(MCPProxyTool(spec, name, config, mcp_lease, self.schema_cache, self.result_cache) for spec in tool_specs)
+            logger.info(f"Successfully loaded MCP server: {name} ({'cached schemas' if name not in servers_to_start else 'started'})")
+
+        logger.info(f"Loaded {len(dynamic_tools)} MCP tools from {len(servers)} servers ({len(servers) - len(servers_to_start)} from schema cache)")
+        span = trace.get_current_span()
+        span.set_attribute("mcp.schema_cache.hits", len(servers) - len(servers_to_start))
+        span.set_attribute("mcp.schema_cache.misses", len(servers_to_start))
+        return dynamic_tools
+
+    def get_upload_tool(self, context: InvocationContext):
         """Get the S3 upload tool with session context"""
-        trace_id = self.trace_id
+        trace_id = context.trace_id
+        workspace_dir = context.workspace_dir
 
         @tool
-        def upload_file_to_s3_and_retrieve_s3_url(filepath: str) -> str:
-            """Upload the file at /tmp/ws/* and retrieve the s3 path
+        async def upload_file_to_s3_and_retrieve_s3_url(filepath: str) -> str:
+            """Upload a file in the workspace directory and retrieve the s3 path
 
             Args:
                 filepath: The path to the uploading file
@@ -158,17 +156,15 @@ class ToolManager:
             aws_creds = get_aws_credentials()
             region = aws_creds.get("AWS_REGION", "us-east-1")
 
-            if not filepath.startswith(WORKSPACE_DIR):
-                raise ValueError(f"{filepath} does not appear to be a file under the {WORKSPACE_DIR} directory. Files to be uploaded must exist under {WORKSPACE_DIR}.")
+            if not is_path_in_workspace(filepath, workspace_dir):
+                raise ValueError(f"{filepath} does not appear to be a file under the {workspace_dir} directory. Files to be uploaded must exist under {workspace_dir}.")
 
             try:
                 filename = os.path.basename(filepath)
                 key = f"agentcore/{trace_id}/{filename}"
 
-                s3 = boto3.client("s3", region_name=region)
-                s3.upload_file(filepath, bucket, key)
-
-                return f"https://{bucket}.s3.{region}.amazonaws.com/{key}"
+                uploader = S3ArtifactUploader(bucket, region, **get_s3_upload_settings())
+                return await asyncio.to_thread(uploader.upload, filepath, key)
             except Exception as e:
                 logger.error(f"Error uploading file to S3: {e}")
                 # For local testing, provide a fallback
@@ -176,6 +172,117 @@ class ToolManager:
 
         return upload_file_to_s3_and_retrieve_s3_url
 
+    def get_batch_upload_tool(self, context: InvocationContext):
+        """Get the batch S3 upload tool with session context"""
+        trace_id = context.trace_id
+        workspace_dir = context.workspace_dir
+
+        @tool
+        async def upload_files_to_s3_and_retrieve_s3_urls(pattern: str) -> str:
+            """Upload every file in a workspace directory, or matching a glob pattern, and retrieve their s3 paths
+
+            Args:
+                pattern: A directory or glob pattern (e.g. "charts/*.png", "**/*.csv"), absolute or relative to the workspace directory
+            """
+            bucket = os.environ.get("FILE_BUCKET")
+            if not bucket:
+                # For local testing, provide a fallback message
+                logger.warning("FILE_BUCKET environment variable not set. Using local file path for testing.")
+                return f"Local file paths (S3 upload skipped): {pattern}"
+
+            aws_creds = get_aws_credentials()
+            region = aws_creds.get("AWS_REGION", "us-east-1")
+
+            filepaths = await asyncio.to_thread(find_workspace_files, pattern, workspace_dir)
+            if not filepaths:
+                return f"No files under the {workspace_dir} directory match {pattern}."
+
+            uploader = S3ArtifactUploader(bucket, region, **get_s3_upload_settings())
+            results = await asyncio.to_thread(uploader.upload_batch, filepaths, f"agentcore/{trace_id}")
+            return "\n".join(f"{os.path.relpath(filepath, workspace_dir)}: {url}" for filepath, url in results)
+
+        return upload_files_to_s3_and_retrieve_s3_urls
+
+    def get_read_tool_output_tool(self, context: InvocationContext):
+        """Get the tool that pages through or searches tool outputs spilled to the workspace"""
+        store = context.tool_output_spiller.store
+        # Pages stay under the spill threshold, so reading an output never spills it again
+        max_chars = context.tool_output_spiller.threshold_chars
+        page_lines = get_tool_output_settings()["page_lines"]
+
+        @tool(name=READ_TOOL_OUTPUT_TOOL_NAME)
+        async def read_tool_output(handle: str, offset: int = 0, limit: int = page_lines, pattern: str = "") -> str:
+            """Read part of a large tool output that was stored instead of returned in full
+
+            Args:
+                handle: The handle given in place of the full output
+                offset: The 0-based line to start reading from
+                limit: The maximum number of lines (or matching lines, with a pattern) to return
+                pattern: A regular expression; if given, return only matching lines with their line numbers
+            """
+            try:
+                if pattern:
+                    return await asyncio.to_thread(store.grep, handle, pattern, limit, max_chars)
+                return await asyncio.to_thread(store.page, handle, offset, limit, max_chars)
+            except ValueError as e:
+                return str(e)
+
+        return read_tool_output
+
+    def get_request_more_tools_tool(self, index: ToolIndex, reserve: dict[str, Any], policy: ToolExecutionPolicy):
+        """Get the meta-tool that adds tools left out by relevance selection to the running agent"""
+        servers: dict[str, dict] = {}
+        for reserved in reserve.values():
+            servers.setdefault(reserved.server_name, reserved.server_config.get("metadata", {}))
+        catalog = "\n".join(f"- {name}" + (f" ({metadata['category']})" if metadata.get("category") else "") + (f": {metadata['description']}" if metadata.get("description") else "") for name, metadata in servers.items())
+        description = f"""Add tools that are not available yet. Only the tools most relevant to the request were provided; {len(reserve)} more can be added from these MCP servers:
+{catalog}
+
+Describe the task or capability needed, and the best matching tools are added and can be called from the next step on."""
+
+        @tool(name=REQUEST_MORE_TOOLS_TOOL_NAME, description=description)
+        async def request_more_tools(query: str, agent: Any, count: int = 5) -> str:
+            """Add tools that are not available yet
+
+            Args:
+                query: Keywords describing the task or capability needed (e.g. "read AWS documentation page", "draw architecture diagram")
+                count: The maximum number of tools to add
+            """
+            names = index.search(query, max(count, 1), exclude=set(index.tools) - set(reserve))
+            if not names:
+                return f"No more tools match {query!r}. Try other keywords, such as a service or task name."
+            for name in names:
+                agent.tool_registry.register_tool(policy.wrap(reserve.pop(name)))
+            logger.info(f"Added {len(names)} tools on request ({len(reserve)} still held back): {', '.join(names)}")
+            added = "\n".join(f"- {name}: {summarize_tool(index.tools[name])}" for name in names)
+            return f"Added these tools, which can be called from now on:\n{added}"
+
+        return request_more_tools
+
+    def select_relevant_tools(self, tools: list[Any], query: str, top_k: int, policy: ToolExecutionPolicy) -> list[Any]:
+        """Keep the top_k MCP tools most relevant to the query and hold the rest back behind request_more_tools.
+
+        When fewer than top_k tools match the query, such as a query in words no tool
+        description uses, the selection is filled up to top_k in the tools' original order.
+        """
+        mcp_tools = [t for t in tools if isinstance(t, MCPProxyTool)]
+        if top_k <= 0 or len(mcp_tools) <= top_k:
+            return tools
+
+        index = ToolIndex(mcp_tools)
+        selected = set(index.search(query, top_k))
+        for t in mcp_tools:
+            if len(selected) >= top_k:
+                break
+            selected.add(t.tool_name)
+        reserve = {t.tool_name: t for t in mcp_tools if t.tool_name not in selected}
+        saved_tokens = sum(estimate_spec_tokens(t) for t in reserve.values())
+        logger.info(f"Selected {len(selected)} of {len(mcp_tools)} MCP tools for the request, leaving ~{saved_tokens} tokens of tool specs out of each model call")
+        span = trace.get_current_span()
+        span.set_attribute("agent.tool_selection.selected", len(selected))
+        span.set_attribute("agent.tool_selection.held_back", len(reserve))
+        return [t for t in tools if t.tool_name not in reserve] + [self.get_request_more_tools_tool(index, reserve, policy)]
+
     def get_code_interpreter_tool(self) -> list[Any]:
         """Get code interpreter tool if available"""
         code_interpreter_tools = []
@@ -192,11 +299,15 @@ class ToolManager:
 
         return code_interpreter_tools
 
-    def get_tools_with_options(self, code_execution_enabled: bool = False, mcp_servers=None) -> list[Any]:
+    async def get_tools_with_options(self, context: InvocationContext, code_execution_enabled: bool = False, mcp_servers=None) -> list[Any]:
         """
         Get tools with optional code execution and MCP servers.
 
+        Blocking work (MCP server starts, config and cache reads, code interpreter
+        setup) runs on worker threads, so a slow server never stalls other invocations.
+
         Args:
+            context: The invocation's context (trace ID, workspace and leased MCP clients)
             code_execution_enabled: Whether to include code interpreter tools
             mcp_servers: MCP server configurations
                 - None: Load default MCP servers from mcp.json
@@ -215,7 +326,7 @@ class ToolManager:
         if mcp_servers is None:
             # Load default MCP servers from mcp.json
             logger.info("Loading default MCP servers from mcp.json")
-            mcp_tools = self.load_mcp_tools()
+            mcp_tools = await self.load_mcp_tools(context.mcp_lease)
         elif isinstance(mcp_servers, list) and len(mcp_servers) == 0:
             # Empty list: no MCP servers
             logger.info("Empty MCP servers list provided, skipping MCP tools")
@@ -223,25 +334,30 @@ class ToolManager:
         elif isinstance(mcp_servers, list):
             # Load specified MCP servers by name
             logger.info(f"Loading {len(mcp_servers)} user-specified MCP servers by name")
-            mcp_tools = self.load_mcp_tools_by_names(mcp_servers)
+            mcp_tools = await self.load_mcp_tools_by_names(mcp_servers, context.mcp_lease)
         else:
             # Fallback to default
             logger.warning(f"Unexpected mcp_servers type: {type(mcp_servers)}, using default")
-            mcp_tools = self.load_mcp_tools()
+            mcp_tools = await self.load_mcp_tools(context.mcp_lease)
 
         all_tools.extend(mcp_tools)
 
         # Add built-in tools (always included)
-        upload_tool = self.get_upload_tool()
+        upload_tool = self.get_upload_tool(context)
         all_tools.append(upload_tool)
+        all_tools.append(self.get_batch_upload_tool(context))
+        builtin_count = 2
+        if context.tool_output_spiller.threshold_chars > 0:
+            all_tools.append(self.get_read_tool_output_tool(context))
+            builtin_count += 1
 
         # Add code interpreter tools if enabled
         code_interpreter_tools = []
         if code_execution_enabled:
-            code_interpreter_tools = self.get_code_interpreter_tool()
+            code_interpreter_tools = await asyncio.to_thread(self.get_code_interpreter_tool)
             all_tools.extend(code_interpreter_tools)
 
         # Log final tool count
-        logger.info(f"Total tools loaded: {len(all_tools)} (MCP: {len(mcp_tools)}, Built-in: 1, Code Interpreter: {len(code_interpreter_tools)} - {'enabled' if code_execution_enabled else 'disabled'})")
+        logger.info(f"Total tools loaded: {len(all_tools)} (MCP: {len(mcp_tools)}, Built-in: {builtin_count}, Code Interpreter: {len(code_interpreter_tools)} - {'enabled' if code_execution_enabled else 'disabled'})")
 
         return all_tools
@@ -0,0 +1,169 @@
+"""S3 artifact uploads for the agent core runtime."""
+
+import glob
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from .aws_clients import get_aws_client_registry
+from .config import get_s3_endpoint_url, get_uploaded_key_cache_size
+from .workspace import is_path_in_workspace
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_digest(filepath: str) -> str:
+    """Hash a file's content for use in content-addressed S3 keys"""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(filepath, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_workspace_files(pattern: str, workspace_dir: str) -> list[str]:
+    """Expand a directory or glob pattern to the regular files it matches inside the workspace"""
+    if not os.path.isabs(pattern):
+        pattern = os.path.join(workspace_dir, pattern)
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*")
+
+    files = []
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        if os.path.isfile(path) and is_path_in_workspace(path, workspace_dir):
+            files.append(path)
+    return files
+
+
+class UploadedKeyCache:
+    """Content-addressed keys uploaded by this process, mapped to their URLs.
+
+    Batch keys start with the trace's upload prefix, so entries are per trace and
+    survive across the trace's invocations. The least recently used keys are
+    dropped beyond max_entries; a dropped key costs a HEAD request, not an upload.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._urls: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            url = self._urls.get(key)
+            if url is not None:
+                self._urls.move_to_end(key)
+            return url
+
+    def put(self, key: str, url: str):
+        with self._lock:
+            self._urls[key] = url
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.max_entries:
+                self._urls.popitem(last=False)
+
+
+_uploaded_key_cache: UploadedKeyCache | None = None
+_uploaded_key_cache_lock = threading.Lock()
+
+
+def get_uploaded_key_cache() -> UploadedKeyCache:
+    """Get the process-wide cache of uploaded keys"""
+    global _uploaded_key_cache
+    with _uploaded_key_cache_lock:
+        if _uploaded_key_cache is None:
+            _uploaded_key_cache = UploadedKeyCache(get_uploaded_key_cache_size())
+        return _uploaded_key_cache
+
+
+class S3ArtifactUploader:
+    """Uploads workspace files to the file bucket with tuned multipart transfers.
+
+    Batch uploads run files in parallel and use content-addressed keys, so a file
+    whose content was already uploaded for the trace, by any invocation, is
+    returned without uploading it again.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        concurrency: int,
+        multipart_threshold: int,
+        multipart_chunksize: int,
+        multipart_concurrency: int,
+        max_files: int,
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.concurrency = concurrency
+        self.max_files = max_files
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=multipart_concurrency,
+        )
+        self.s3 = get_aws_client_registry().get_client("s3", region)
+
+    def get_object_url(self, key: str) -> str:
+        """Get the URL of an uploaded object"""
+        endpoint_url = get_s3_endpoint_url()
+        if endpoint_url:
+            return f"{endpoint_url.rstrip('/')}/{self.bucket}/{quote(key)}"
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{quote(key)}"
+
+    def upload(self, filepath: str, key: str) -> str:
+        """Upload a file to the key and return its URL"""
+        self.s3.upload_file(filepath, self.bucket, key, Config=self.transfer_config)
+        return self.get_object_url(key)
+
+    def upload_batch(self, filepaths: list[str], key_prefix: str) -> list[tuple[str, str]]:
+        """Upload files in parallel under content-addressed keys.
+
+        A key this process already uploaded is answered from the uploaded key
+        cache; any other key is checked with a HEAD request first, so content
+        uploaded by another process is not uploaded again either.
+
+        Args:
+            filepaths: Files to upload
+            key_prefix: Prefix for the object keys (the trace's upload prefix)
+
+        Returns:
+            (filepath, URL or error message) for each file, in input order
+        """
+        if len(filepaths) > self.max_files:
+            raise ValueError(f"{len(filepaths)} files matched, but at most {self.max_files} can be uploaded at once. Narrow the pattern.")
+
+        uploaded_keys = get_uploaded_key_cache()
+
+        def upload_one(filepath: str) -> tuple[str, str]:
+            try:
+                key = f"{key_prefix}/{get_file_digest(filepath)}/{os.path.basename(filepath)}"
+                url = uploaded_keys.get(key)
+                if url is not None:
+                    return filepath, url
+                url = self.get_object_url(key) if self._exists(key) else self.upload(filepath, key)
+                uploaded_keys.put(key, url)
+                return filepath, url
+            except Exception as e:
+                logger.error(f"Error uploading {filepath} to S3: {e}")
+                return filepath, f"Error uploading to S3: {str(e)}"
+
+        with ThreadPoolExecutor(max_workers=max(min(self.concurrency, len(filepaths)), 1), thread_name_prefix="s3-upload") as executor:
+            return list(executor.map(upload_one, filepaths))
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError:
+            return False
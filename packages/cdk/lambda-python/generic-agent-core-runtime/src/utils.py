@@ -1,36 +1,31 @@
 """Utility functions for the agent core runtime."""
 
 import base64
+import hashlib
+import json
 import logging
-import os
-import pathlib
-import shutil
+import threading
+from collections import OrderedDict
 from typing import Any
 from uuid import uuid4
 
+from starlette.requests import Request
 from strands.types.content import ContentBlock
 
-from .config import WORKSPACE_DIR
+from .config import get_decode_cache_max_bytes
 
 logger = logging.getLogger(__name__)
 
 
-def create_id() -> str:
-    """Generate a unique session ID"""
-    return str(uuid4())
+class RequestTooLargeError(Exception):
+    """Exception raised when a request body exceeds the size limit"""
 
+    pass
 
-def create_ws_directory():
-    """Create workspace directory if it doesn't exist"""
-    logger.info("Create ws directory")
-    pathlib.Path(WORKSPACE_DIR).mkdir(exist_ok=True)
 
-
-def clean_ws_directory():
-    """Clean up workspace directory"""
-    logger.info("Clean ws directory...")
-    if os.path.exists(WORKSPACE_DIR):
-        shutil.rmtree(WORKSPACE_DIR)
+def create_id() -> str:
+    """Generate a unique session ID"""
+    return str(uuid4())
 
 
 def create_error_response(error_message: str) -> dict:
@@ -74,16 +69,84 @@ def decode_base64_string(value: Any) -> bytes:
         raise ValueError(f"Invalid value type: {type(value)}")
 
 
-def convert_content_block_bytes(block: dict[str, Any]) -> dict[str, Any]:
-    """Convert base64 strings to bytes in a content block"""
-    block = block.copy()
+class DecodedPayloadCache:
+    """LRU cache of decoded base64 attachments keyed by a hash of the encoded string.
+
+    Each request resends the whole conversation, so without the cache every image,
+    document and video in the history is decoded again on every turn. Entries are
+    immutable bytes shared by all requests, and the cache evicts least recently used
+    payloads once the decoded size exceeds the byte budget.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, value: Any) -> bytes:
+        """Decode a base64 string, reusing the result for content seen before"""
+        if not isinstance(value, str) or self.max_bytes <= 0:
+            return decode_base64_string(value)
+
+        key = hashlib.sha256(value.encode("utf-8", "surrogatepass")).digest()
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = decode_base64_string(value)
+        if len(data) > self.max_bytes:
+            return data
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
+
+    def stats(self) -> dict[str, int]:
+        """Summarize cache usage for logging"""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+_decode_cache: DecodedPayloadCache | None = None
+_decode_cache_lock = threading.Lock()
+
+
+def get_decode_cache() -> DecodedPayloadCache:
+    """Get the process-wide decoded attachment cache"""
+    global _decode_cache
+    with _decode_cache_lock:
+        if _decode_cache is None:
+            _decode_cache = DecodedPayloadCache(get_decode_cache_max_bytes())
+        return _decode_cache
+
 
-    # Handle image, document, and video blocks
-    for media_type in ["image", "document", "video"]:
-        if media_type in block:
-            media_data = block[media_type]
-            if "source" in media_data and "bytes" in media_data["source"]:
-                media_data["source"]["bytes"] = decode_base64_string(media_data["source"]["bytes"])
+def convert_content_block_bytes(block: dict[str, Any]) -> dict[str, Any]:
+    """Convert base64 strings to bytes in a content block
+
+    The caller's block is left untouched: only the dicts on the path to the decoded
+    bytes are rebuilt, and everything else is shared with the original block.
+    """
+    for media_type in ("image", "document", "video"):
+        media_data = block.get(media_type)
+        if media_data is None:
+            continue
+        source = media_data.get("source")
+        if source is None or "bytes" not in source:
+            continue
+        decoded = get_decode_cache().decode(source["bytes"])
+        block = {**block, media_type: {**media_data, "source": {**source, "bytes": decoded}}}
 
     return block
 
@@ -116,11 +179,14 @@ def process_messages(messages: list[Any] | list[dict[str, Any]]) -> list[Any]:
 
     processed_messages = []
     for message in messages:
-        msg = message.copy()
-        if "content" in msg and isinstance(msg["content"], list):
-            msg["content"] = [convert_content_block_bytes(block) if isinstance(block, dict) else block for block in msg["content"]]
-        processed_messages.append(Message(**msg))
-
+        content = message.get("content")
+        if isinstance(content, list):
+            content = [convert_content_block_bytes(block) if isinstance(block, dict) else block for block in content]
+            processed_messages.append(Message(**{**message, "content": content}))
+        else:
+            processed_messages.append(Message(**message))
+
+    logger.debug(f"Decoded attachment cache: {get_decode_cache().stats()}")
     return processed_messages
 
 
@@ -129,3 +195,47 @@ def process_prompt(prompt: str | list[dict[str, Any]]) -> str | list[ContentBloc
     if isinstance(prompt, list):
         return process_content_blocks(prompt)
     return prompt
+
+
+# Request body utilities
+
+
+async def read_request_body(request: Request, max_bytes: int) -> bytearray:
+    """Read the request body chunk by chunk into a single buffer, enforcing the size limit"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise RequestTooLargeError(f"Request body of {content_length} bytes exceeds the {max_bytes} byte limit")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise RequestTooLargeError(f"Request body exceeds the {max_bytes} byte limit")
+    return body
+
+
+def parse_request_body(body: bytearray) -> Any:
+    """Parse and validate an /invocations body, decoding base64 media into bytes
+
+    This is CPU-heavy for large multimodal requests, so callers run it in a worker
+    thread. While json.loads runs, the body is briefly held as bytes, decoded text
+    and parsed objects together; the raw buffer is cleared as soon as parsing ends
+    so only the parsed request stays alive for the rest of the invocation.
+    """
+    # Import AgentCoreRequest here to avoid circular imports
+    from .types import AgentCoreRequest
+
+    request_data = json.loads(body)
+    body.clear()
+
+    # Handle AWS Lambda integration format
+    if "input" in request_data and isinstance(request_data["input"], dict):
+        request_data = request_data["input"]
+
+    # Decode media before validation so pydantic sees bytes, not base64 text
+    if request_data.get("messages"):
+        request_data["messages"] = process_messages(request_data["messages"])
+    if request_data.get("prompt"):
+        request_data["prompt"] = process_prompt(request_data["prompt"])
+
+    return AgentCoreRequest.model_validate(request_data)
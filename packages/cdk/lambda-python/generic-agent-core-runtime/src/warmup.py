@@ -0,0 +1,79 @@
+"""Background warm-up of the agent core runtime at container start."""
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from .aws_clients import get_aws_client_registry
+from .mcp_pool import get_mcp_client_pool
+from .metrics import PHASE_SECONDS, record_error
+from .tools import ToolManager
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Warms AWS clients and the default MCP servers without blocking startup.
+
+    Each component warms on its own worker thread and reports whether it is
+    pending, warming, warm or failed. Requests never wait for the warm-up as a
+    whole: AWS clients are created under the registry's lock and MCP server
+    starts are single-flight in the pool, so a request that needs a piece still
+    being warmed joins that work and waits only for it.
+    """
+
+    def __init__(self):
+        self._states: dict[str, str] = {}
+        self._mcp_servers: dict[str, bool] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Future | None = None
+
+    def start(self, tool_manager: ToolManager, regions: list[str], model_ids: list[str], warm_mcp_servers: bool = True):
+        """Start warming in the background on the running event loop"""
+        components: dict[str, Callable[[], Any]] = {"aws_clients": lambda: get_aws_client_registry().warm_up(regions, model_ids)}
+        if warm_mcp_servers:
+            components["mcp_servers"] = lambda: self._record_mcp_servers(tool_manager.warm_up())
+        with self._lock:
+            self._states.update(dict.fromkeys(components, "pending"))
+        self._task = asyncio.gather(*(asyncio.to_thread(self._run, name, function) for name, function in components.items()))
+
+    def _run(self, name: str, function: Callable[[], Any]):
+        self._set_state(name, "warming")
+        started_at = time.monotonic()
+        try:
+            with PHASE_SECONDS.time(phase=f"warm_up_{name}"):
+                function()
+        except Exception as e:
+            logger.warning(f"Failed to warm up {name}: {e}")
+            record_error(e)
+            self._set_state(name, "failed")
+            return
+        self._set_state(name, "warm")
+        logger.info(f"Warmed up {name} in {time.monotonic() - started_at:.2f}s")
+
+    def _set_state(self, name: str, state: str):
+        with self._lock:
+            self._states[name] = state
+
+    def _record_mcp_servers(self, servers: dict[str, bool]):
+        with self._lock:
+            self._mcp_servers = servers
+
+    def status(self) -> dict[str, Any]:
+        """Summarize what is warm for the readiness endpoint"""
+        with self._lock:
+            states = dict(self._states)
+            mcp_servers = dict(self._mcp_servers)
+        # Servers warmed at startup may since have been evicted as idle; they restart on next use
+        pool_stats = get_mcp_client_pool().stats()
+        servers = {name: "stopped" if available else "failed" for name, available in mcp_servers.items()}
+        servers.update(dict.fromkeys(pool_stats["starting"], "warming"))
+        servers.update(dict.fromkeys(pool_stats["clients"], "warm"))
+        return {
+            "ready": all(state in ("warm", "failed") for state in states.values()),
+            "components": states,
+            "mcp_servers": servers,
+        }
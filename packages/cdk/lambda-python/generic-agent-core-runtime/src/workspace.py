@@ -0,0 +1,134 @@
+"""Per-invocation workspace directories for the agent core runtime."""
+
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+from .config import get_workspace_settings
+from .utils import create_id
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 30.0
+
+
+def is_path_in_workspace(filepath: str, workspace_dir: str) -> bool:
+    """Check that a path resolves to a location inside the workspace directory"""
+    workspace_root = os.path.realpath(workspace_dir)
+    return os.path.commonpath([os.path.realpath(filepath), workspace_root]) == workspace_root
+
+
+def _get_directory_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class WorkspaceManager:
+    """Creates a workspace directory per invocation and removes released ones in the background.
+
+    Concurrent invocations never share a directory, and deletion happens on a reaper
+    thread instead of the request path. The reaper also removes workspaces abandoned
+    by earlier processes and, when the root grows past the disk quota, deletes
+    inactive workspaces oldest first.
+    """
+
+    def __init__(self, root: str, quota_bytes: int, orphan_ttl: float):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.orphan_ttl = orphan_ttl
+        self._active: set[str] = set()
+        self._lock = threading.Lock()
+        self._released: queue.Queue[str] = queue.Queue()
+        self._reaper: threading.Thread | None = None
+        self._last_sweep = 0.0
+
+    def create(self) -> str:
+        """Create a new workspace directory and return its path"""
+        path = os.path.join(self.root, create_id())
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self._active.add(path)
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(target=self._run, name="workspace-reaper", daemon=True)
+                self._reaper.start()
+        logger.info(f"Created workspace {path}")
+        return path
+
+    def release(self, path: str):
+        """Hand a workspace to the reaper for deletion"""
+        with self._lock:
+            if path not in self._active:
+                return
+            self._active.discard(path)
+        self._released.put(path)
+
+    def _run(self):
+        while True:
+            try:
+                self._remove(self._released.get(timeout=SWEEP_INTERVAL))
+            except queue.Empty:
+                pass
+            if time.monotonic() - self._last_sweep >= SWEEP_INTERVAL:
+                self._sweep()
+
+    def _remove(self, path: str):
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed workspace {path}")
+
+    def _sweep(self):
+        self._last_sweep = time.monotonic()
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+
+        with self._lock:
+            active = set(self._active)
+
+        now = time.time()
+        usage = 0
+        inactive = []
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if path not in active and now - mtime > self.orphan_ttl:
+                self._remove(path)
+                continue
+            size = _get_directory_size(path) if os.path.isdir(path) else 0
+            usage += size
+            if path not in active:
+                inactive.append((mtime, size, path))
+
+        for _, size, path in sorted(inactive):
+            if usage <= self.quota_bytes:
+                break
+            self._remove(path)
+            usage -= size
+
+        if usage > self.quota_bytes:
+            logger.warning(f"Workspaces use {usage} bytes, above the {self.quota_bytes} byte quota, with {len(active)} active")
+
+
+_workspace_manager: WorkspaceManager | None = None
+_workspace_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """Get the process-wide workspace manager"""
+    global _workspace_manager
+    with _workspace_manager_lock:
+        if _workspace_manager is None:
+            _workspace_manager = WorkspaceManager(**get_workspace_settings())
+        return _workspace_manager
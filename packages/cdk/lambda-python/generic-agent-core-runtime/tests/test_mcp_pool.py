@@ -0,0 +1,113 @@
+"""Tests for the process-wide MCP client pool."""
+
+import threading
+import time
+
+import pytest
+
+from src import mcp_pool
+from src.mcp_pool import MCPClientPool
+
+
+class FakeClient:
+    def __init__(self):
+        self.stopped = False
+
+    def list_tools_sync(self):
+        return ["tool"]
+
+    def stop(self, exc_type, exc_val, exc_tb):
+        self.stopped = True
+
+
+def make_pool(**overrides) -> MCPClientPool:
+    settings = {"startup_timeout": 5.0, "max_clients": 4, "max_leases": 4, "idle_ttl": 900.0, "health_check_interval": 30.0, "restart_backoff": 60.0, "max_restart_backoff": 300.0}
+    return MCPClientPool(**{**settings, **overrides})
+
+
+@pytest.fixture
+def starts(monkeypatch):
+    """Record server starts, failing those whose command is "fail" """
+    started = []
+
+    def create(server_name, server_config, uv_env):
+        started.append(server_name)
+        if server_config["command"] == "fail":
+            raise RuntimeError("server exited")
+        return FakeClient()
+
+    monkeypatch.setattr(mcp_pool, "_create_mcp_client", create)
+    return started
+
+
+def test_failed_server_is_not_restarted_until_its_backoff_passes(starts):
+    pool = make_pool()
+
+    assert pool.acquire("flaky", {"command": "fail"}, {}) is None
+    assert pool.acquire("flaky", {"command": "fail"}, {}) is None
+    assert starts == ["flaky"]
+
+    key = next(iter(pool._failures))
+    pool._failures[key] = (1, time.monotonic())
+    assert pool.acquire("flaky", {"command": "fail"}, {}) is None
+    assert starts == ["flaky", "flaky"]
+    assert pool._failures[key][0] == 2
+    pool.shutdown()
+
+
+def test_idle_clients_are_stopped_without_further_acquires(starts, monkeypatch):
+    monkeypatch.setattr(mcp_pool, "REAP_INTERVAL", 0.01)
+    pool = make_pool(idle_ttl=0.05)
+
+    entry = pool.acquire("server", {"command": "ok"}, {})
+    pool.release(entry)
+
+    deadline = time.monotonic() + 5
+    while not entry.client.stopped and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert entry.client.stopped
+    assert pool.stats()["clients"] == {}
+    pool.shutdown()
+
+
+def test_client_is_not_leased_while_a_failing_health_check_runs(starts):
+    pool = make_pool()
+    entry = pool.acquire("server", {"command": "ok"}, {})
+    pool.release(entry)
+    entry.last_checked = time.monotonic() - 60
+
+    checking = threading.Event()
+    hung = threading.Event()
+
+    def ping():
+        # Only the first ping hangs and fails; a ping racing it would succeed and lease the client
+        if checking.is_set():
+            return ["tool"]
+        checking.set()
+        hung.wait(5)
+        raise RuntimeError("server hung")
+
+    entry.client.list_tools_sync = ping
+    leased = []
+    first = threading.Thread(target=lambda: leased.append(pool.acquire("server", {"command": "ok"}, {})))
+    first.start()
+    assert checking.wait(5)
+    second = threading.Thread(target=lambda: leased.append(pool.acquire("server", {"command": "ok"}, {})))
+    second.start()
+    time.sleep(0.1)
+    hung.set()
+    first.join()
+    second.join()
+
+    assert len(leased) == 2
+    assert all(lease is not None and lease is not entry for lease in leased)
+    assert starts == ["server", "server"]
+    pool.shutdown()
+
+
+def test_health_check_falls_back_to_listing_tools_without_strands_internals():
+    pool = make_pool()
+    entry = mcp_pool.PooledMCPClient("server", "hash", FakeClient(), ["tool"])
+
+    assert entry.is_healthy(pool._executor)
+    pool.shutdown()
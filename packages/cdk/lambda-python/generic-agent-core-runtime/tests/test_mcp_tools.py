@@ -0,0 +1,56 @@
+"""Tests for the MCP tool result cache and lazily started MCP tools."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.mcp_tools import MCPProxyTool, ToolResultCache, ToolSchemaCache
+from src.tool_execution import ServerConcurrencyLimits, ToolExecutionPolicy
+
+SERVER_CONFIG = {"command": "server", "metadata": {"toolCache": {"lookup": {"ttl": 60}}}}
+
+
+class FakeLease:
+    def __init__(self):
+        self.calls = 0
+
+    def acquire(self, server_name, server_config):
+        async def call_tool_async(tool_use_id, name, arguments):
+            self.calls += 1
+            return {"toolUseId": tool_use_id, "status": "success", "content": [{"text": "result"}]}
+
+        return SimpleNamespace(tools=[], client=SimpleNamespace(call_tool_async=call_tool_async))
+
+
+async def call(tool, tool_use_id: str):
+    return [event async for event in tool.stream({"toolUseId": tool_use_id, "name": "lookup", "input": {"q": 1}}, {})][-1]
+
+
+def test_cache_hit_does_not_wait_for_the_server_concurrency_limit(tmp_path):
+    async def run():
+        lease = FakeLease()
+        spec = {"name": "lookup", "description": "Look up", "inputSchema": {"json": {"type": "object"}}}
+        tool = MCPProxyTool(spec, "server", SERVER_CONFIG, lease, ToolSchemaCache(str(tmp_path), 60), ToolResultCache(1024 * 1024))
+        policy = ToolExecutionPolicy("bounded", ServerConcurrencyLimits(1))
+        limited = policy.wrap(tool)
+
+        assert (await call(limited, "first"))["status"] == "success"
+        semaphore = policy.server_limits.get("server", SERVER_CONFIG)
+        async with semaphore:
+            result = await asyncio.wait_for(call(limited, "second"), timeout=1)
+        assert result["toolUseId"] == "second"
+        assert lease.calls == 1
+
+    asyncio.run(run())
+
+
+def test_result_cache_rejects_a_second_event_loop():
+    cache = ToolResultCache(1024)
+
+    async def call_tool():
+        return {"toolUseId": "id", "status": "success", "content": []}
+
+    asyncio.run(cache.get_or_call("key", 60, 1024, call_tool))
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_call("key", 60, 1024, call_tool))
@@ -0,0 +1,38 @@
+"""Tests for the Prometheus metrics exposed on /metrics."""
+
+import os
+
+import pytest
+
+from src.prometheus import Counter, Histogram, MetricsRegistry
+
+RUNTIMES_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+
+
+def test_registry_renders_counters_and_histograms_in_the_text_format():
+    registry = MetricsRegistry()
+    calls = registry.register(Counter("calls_total", "Calls", ("tool",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    calls.inc(tool='say "hi"')
+    latency.observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP calls_total Calls",
+        "# TYPE calls_total counter",
+        'calls_total{tool="say \\"hi\\""} 1',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 0',
+        'latency_seconds_bucket{le="1"} 1',
+        'latency_seconds_bucket{le="+Inf"} 1',
+        "latency_seconds_sum 0.5",
+        "latency_seconds_count 1",
+    ]
+
+
+def test_research_runtime_ships_the_same_prometheus_module():
+    research = os.path.join(RUNTIMES_DIR, "research-agent-core-runtime", "src", "prometheus.py")
+    if not os.path.exists(research):
+        pytest.skip("The research runtime is not checked out next to this one")
+    with open(os.path.join(RUNTIMES_DIR, "generic-agent-core-runtime", "src", "prometheus.py")) as generic_file, open(research) as research_file:
+        assert generic_file.read() == research_file.read()
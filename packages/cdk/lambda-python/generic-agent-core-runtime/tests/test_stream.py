@@ -0,0 +1,43 @@
+"""Tests for the buffer between the agent and the HTTP response."""
+
+import asyncio
+
+from src.stream import EventChannel
+
+
+def block_stop(index: int) -> dict:
+    return {"event": {"contentBlockStop": {"contentBlockIndex": index}}}
+
+
+async def produce(count: int):
+    for index in range(count):
+        yield block_stop(index)
+
+
+def test_events_the_policy_cannot_absorb_wait_for_room_instead_of_growing_the_buffer():
+    async def run():
+        channel = EventChannel(max_events=4, policy="coalesce", stall_timeout=5)
+        channel.start(produce(20))
+        await asyncio.sleep(0.05)
+        assert len(channel._events) == 4
+
+        received = []
+        while (event := await channel.get(timeout=1)) is not None:
+            assert len(channel._events) <= 4
+            received.append(event)
+        return received
+
+    assert asyncio.run(run()) == [block_stop(index) for index in range(20)]
+
+
+def test_stream_is_aborted_when_a_full_buffer_is_not_read():
+    async def run():
+        channel = EventChannel(max_events=4, policy="coalesce", stall_timeout=0.1)
+        channel.start(produce(20))
+        await asyncio.sleep(0.3)
+        return list(channel._events)
+
+    events = asyncio.run(run())
+    assert events[:4] == [block_stop(index) for index in range(4)]
+    assert "internalServerException" in events[4]["event"]
+    assert len(events) == 5
@@ -0,0 +1,40 @@
+"""Tests for relevance selection of MCP tools."""
+
+from src.mcp_tools import MCPProxyTool
+from src.tool_execution import ServerConcurrencyLimits, ToolExecutionPolicy
+from src.tool_index import REQUEST_MORE_TOOLS_TOOL_NAME
+from src.tools import ToolManager
+
+
+def make_tools(manager: ToolManager, descriptions: list[str]) -> list[MCPProxyTool]:
+    return [
+        MCPProxyTool(
+            {"name": f"tool_{index}", "description": description, "inputSchema": {"json": {"type": "object", "properties": {}}}},
+            "server",
+            {"command": "server"},
+            None,
+            manager.schema_cache,
+            manager.result_cache,
+        )
+        for index, description in enumerate(descriptions)
+    ]
+
+
+def test_selection_is_filled_to_top_k_in_original_order_when_no_tool_matches():
+    manager = ToolManager()
+    tools = make_tools(manager, ["List the objects in a bucket", "Query a database", "Send an email", "Translate a document", "Read a calendar"])
+    policy = ToolExecutionPolicy("concurrent", ServerConcurrencyLimits(0))
+
+    selected = manager.select_relevant_tools(tools, "zzz qqq", 3, policy)
+
+    assert [t.tool_name for t in selected] == ["tool_0", "tool_1", "tool_2", REQUEST_MORE_TOOLS_TOOL_NAME]
+
+
+def test_matching_tools_are_selected_first_and_the_rest_filled_in_original_order():
+    manager = ToolManager()
+    tools = make_tools(manager, ["List the objects in a bucket", "Query a database", "Send an email", "Translate a document", "Read a calendar"])
+    policy = ToolExecutionPolicy("concurrent", ServerConcurrencyLimits(0))
+
+    selected = manager.select_relevant_tools(tools, "translate this", 3, policy)
+
+    assert [t.tool_name for t in selected] == ["tool_0", "tool_1", "tool_3", REQUEST_MORE_TOOLS_TOOL_NAME]
@@ -0,0 +1,27 @@
+"""Tests for request body parsing."""
+
+import json
+
+from src.types import ModelInfo
+from src.utils import parse_request_body
+
+
+def parse(request: dict):
+    return parse_request_body(bytearray(json.dumps(request).encode()))
+
+
+def test_model_may_be_given_as_a_model_id():
+    assert parse({"prompt": "hi", "model": "anthropic.claude"}).model == "anthropic.claude"
+
+
+def test_model_without_region_leaves_the_region_to_the_environment():
+    model = parse({"prompt": "hi", "model": {"modelId": "anthropic.claude"}}).model
+
+    assert isinstance(model, ModelInfo)
+    assert model.model_dump(exclude_none=True) == {"modelId": "anthropic.claude"}
+
+
+def test_attachments_are_decoded_once_while_parsing():
+    request = parse({"prompt": [{"text": "hi"}], "messages": [{"role": "user", "content": [{"image": {"format": "png", "source": {"bytes": "aGVsbG8="}}}]}], "model": "anthropic.claude"})
+
+    assert request.messages[0]["content"][0]["image"]["source"]["bytes"] == b"hello"
@@ -0,0 +1,123 @@
+"""Fixtures that load the runtimes' modules from their source trees and measure allocations.
+
+Each runtime has its own dependencies, so run the suite for one runtime inside
+that runtime's environment; the other runtimes' benchmarks are skipped when
+their dependencies are missing:
+
+    uv run --project generic-agent-core-runtime --with pytest-benchmark pytest perf/benchmarks/test_generic.py
+    uv run --project research-agent-core-runtime --with pytest-benchmark pytest perf/benchmarks/test_research.py
+    uv run --project ../mcp-api --with pytest-benchmark pytest perf/benchmarks/test_mcp_api.py
+
+Add --benchmark-autosave to store a run, and --benchmark-compare
+--benchmark-compare-fail=mean:10% to fail when a function got slower than the
+last stored run. Allocations per call are saved in each benchmark's extra_info.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import pytest
+
+LAMBDA_PYTHON_DIR = Path(__file__).resolve().parents[2]
+GENERIC_SRC = LAMBDA_PYTHON_DIR / "generic-agent-core-runtime" / "src"
+RESEARCH_SRC = LAMBDA_PYTHON_DIR / "research-agent-core-runtime" / "src"
+MCP_API_APP = LAMBDA_PYTHON_DIR.parent / "mcp-api" / "app.py"
+
+# Calls made under tracemalloc for each benchmark, after the timed rounds
+ALLOCATION_ROUNDS = 3
+
+# Injected by CDK in production; a representative subset for get_supported_cache_fields
+SUPPORTED_CACHE_FIELDS = '{"anthropic.claude-sonnet-4-5-20250929-v1:0": ["system", "messages", "tools"], "anthropic.claude-3-7-sonnet-20250219-v1:0": ["system", "messages", "tools"], "amazon.nova-pro-v1:0": ["system", "messages"], "amazon.nova-lite-v1:0": ["system", "messages"]}'
+
+
+def load_package(name: str, path: Path) -> ModuleType:
+    """Import a source directory as a package under the given name"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path / "__init__.py", submodule_search_locations=[str(path)])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def import_or_skip(name: str) -> ModuleType:
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        pytest.skip(f"{name} needs dependencies that are not installed: {e}")
+
+
+@pytest.fixture(scope="session")
+def generic():
+    """The generic runtime's src package (relative imports, so any name works)"""
+    os.environ.setdefault("SUPPORTED_CACHE_FIELDS", SUPPORTED_CACHE_FIELDS)
+    load_package("generic_runtime", GENERIC_SRC)
+    import_or_skip("generic_runtime.utils")
+    import_or_skip("generic_runtime.config")
+    import_or_skip("generic_runtime.tool_index")
+    return sys.modules["generic_runtime"]
+
+
+@pytest.fixture(scope="session")
+def research():
+    """The research runtime's src package (imported as src, which its modules import from)"""
+    load_package("src", RESEARCH_SRC)
+    import_or_skip("src.utils")
+    import_or_skip("src.converters")
+    return sys.modules["src"]
+
+
+@pytest.fixture(scope="session")
+def mcp_api():
+    """mcp-api's app module, which reads AWS credentials from the environment on import"""
+    for key, value in {"AWS_REGION": "us-east-1", "AWS_ACCESS_KEY_ID": "benchmark", "AWS_SECRET_ACCESS_KEY": "benchmark", "AWS_SESSION_TOKEN": "benchmark"}.items():
+        os.environ.setdefault(key, value)
+    if "mcp_api_app" not in sys.modules:
+        spec = importlib.util.spec_from_file_location("mcp_api_app", MCP_API_APP)
+        module = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(module)
+        except ImportError as e:
+            pytest.skip(f"mcp-api needs dependencies that are not installed: {e}")
+        sys.modules["mcp_api_app"] = module
+    return sys.modules["mcp_api_app"]
+
+
+@pytest.fixture
+def measure(benchmark) -> Callable[..., Any]:
+    """Benchmark a call's time, then record its allocations per call in extra_info.
+
+    peak_alloc_bytes is the most memory the call held at once, and
+    retained_bytes is what was still allocated when it returned (its result
+    plus anything it cached).
+    """
+
+    def run(function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        result = benchmark(function, *args, **kwargs)
+
+        peaks, retained = [], []
+        tracemalloc.start()
+        try:
+            for _ in range(ALLOCATION_ROUNDS):
+                tracemalloc.reset_peak()
+                start, _ = tracemalloc.get_traced_memory()
+                output = function(*args, **kwargs)
+                current, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - start)
+                retained.append(current - start)
+                del output
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_alloc_bytes"] = max(peaks)
+        benchmark.extra_info["retained_bytes"] = min(retained)
+        return result
+
+    return run
@@ -0,0 +1,77 @@
+"""Synthetic request payloads shaped like the frontend's, sized for benchmarking.
+
+Generated deterministically so results are comparable between runs.
+"""
+
+import base64
+import random
+from types import SimpleNamespace
+from typing import Any
+
+TURNS = 200
+IMAGE_BYTES = 20 * 1024 * 1024
+IMAGE_COUNT = 10
+TOOL_RESULT_BLOCKS = 5000
+STREAM_DELTAS = 2000
+TOOL_CATALOG_SIZE = 60
+
+_WORDS = "the agent reads the file then writes a summary of each section with charts and tables for review".split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def image_block(rng: random.Random, size: int) -> dict[str, Any]:
+    return {"image": {"format": "png", "source": {"bytes": base64.b64encode(rng.randbytes(size)).decode()}}}
+
+
+def history(turns: int = TURNS, image_bytes: int = IMAGE_BYTES, image_count: int = IMAGE_COUNT) -> list[dict[str, Any]]:
+    """A conversation of alternating user and assistant turns.
+
+    Images are attached to evenly spaced user turns and share image_bytes between them.
+    """
+    rng = random.Random(0)
+    user_turns = range(0, turns, 2)
+    image_turns = set(user_turns[:: max(len(user_turns) // image_count, 1)][:image_count]) if image_count else set()
+    messages = []
+    for turn in range(turns):
+        if turn in user_turns:
+            content: list[dict[str, Any]] = [{"text": sentence(rng, 80)}]
+            if turn in image_turns:
+                content.append(image_block(rng, image_bytes // image_count))
+            messages.append({"role": "user", "content": content})
+        else:
+            messages.append({"role": "assistant", "content": [{"text": sentence(rng, 300)}]})
+    return messages
+
+
+def prompt_with_images(image_bytes: int = IMAGE_BYTES, image_count: int = IMAGE_COUNT) -> list[dict[str, Any]]:
+    rng = random.Random(1)
+    return [{"text": sentence(rng, 80)}] + [image_block(rng, image_bytes // image_count) for _ in range(image_count)]
+
+
+def tool_result_texts(blocks: int = TOOL_RESULT_BLOCKS) -> list[str]:
+    rng = random.Random(2)
+    return [sentence(rng, 20) for _ in range(blocks)]
+
+
+def stream_deltas(count: int = STREAM_DELTAS) -> list[str]:
+    rng = random.Random(3)
+    return [f"{rng.choice(_WORDS)} " for _ in range(count)]
+
+
+def tool_catalog(count: int = TOOL_CATALOG_SIZE) -> list[SimpleNamespace]:
+    """Tools shaped like MCP tools (a name, a description and an input schema) for ranking"""
+    rng = random.Random(4)
+    return [
+        SimpleNamespace(
+            tool_name=f"tool_{index}",
+            tool_spec={
+                "name": f"tool_{index}",
+                "description": sentence(rng, 60),
+                "inputSchema": {"json": {"type": "object", "properties": {rng.choice(_WORDS): {"type": "string"} for _ in range(4)}}},
+            },
+        )
+        for index in range(count)
+    ]
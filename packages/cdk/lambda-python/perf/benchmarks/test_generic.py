@@ -0,0 +1,84 @@
+"""Benchmarks for the generic runtime's request preprocessing."""
+
+import pytest
+from payloads import history, prompt_with_images, tool_catalog
+
+MODEL_IDS = [
+    "us.anthropic.claude-sonnet-4-5-20250929-v1:0",
+    "global.anthropic.claude-sonnet-4-5-20250929-v1:0",
+    "apac.amazon.nova-pro-v1:0",
+    "amazon.nova-lite-v1:0",
+    "unknown.model-v1:0",
+]
+
+
+@pytest.fixture
+def uncached(generic, monkeypatch):
+    """Disable the decoded attachment cache so every call decodes"""
+    monkeypatch.setattr(generic.utils, "_decode_cache", generic.utils.DecodedPayloadCache(0))
+
+
+@pytest.fixture
+def warm_cache(generic, monkeypatch):
+    """A fresh decoded attachment cache, filled by the benchmark's first call"""
+    monkeypatch.setattr(generic.utils, "_decode_cache", generic.utils.DecodedPayloadCache(256 * 1024 * 1024))
+
+
+@pytest.mark.benchmark(group="generic.process_messages")
+def test_process_messages_text_history(generic, measure):
+    messages = history(image_count=0)
+    assert len(measure(generic.utils.process_messages, messages)) == len(messages)
+
+
+@pytest.mark.benchmark(group="generic.process_messages")
+def test_process_messages_image_history_uncached(generic, measure, uncached):
+    messages = history()
+    assert len(measure(generic.utils.process_messages, messages)) == len(messages)
+
+
+@pytest.mark.benchmark(group="generic.process_messages")
+def test_process_messages_image_history_cached(generic, measure, warm_cache):
+    messages = history()
+    generic.utils.process_messages(messages)
+    assert len(measure(generic.utils.process_messages, messages)) == len(messages)
+
+
+@pytest.mark.benchmark(group="generic.process_prompt")
+def test_process_prompt_text(generic, measure):
+    assert measure(generic.utils.process_prompt, "Summarize the attached report") == "Summarize the attached report"
+
+
+@pytest.mark.benchmark(group="generic.process_prompt")
+def test_process_prompt_images_uncached(generic, measure, uncached):
+    prompt = prompt_with_images()
+    assert len(measure(generic.utils.process_prompt, prompt)) == len(prompt)
+
+
+@pytest.mark.benchmark(group="generic.convert_content_block_bytes")
+def test_convert_content_block_bytes_image_uncached(generic, measure, uncached):
+    block = prompt_with_images(image_count=1)[1]
+    assert isinstance(measure(generic.utils.convert_content_block_bytes, block)["image"]["source"]["bytes"], bytes)
+
+
+@pytest.mark.benchmark(group="generic.convert_content_block_bytes")
+def test_convert_content_block_bytes_text(generic, measure):
+    block = {"text": "no attachment"}
+    assert measure(generic.utils.convert_content_block_bytes, block) is block
+
+
+@pytest.mark.benchmark(group="generic.get_supported_cache_fields")
+def test_get_supported_cache_fields(generic, measure):
+    def lookup_all():
+        return [generic.config.get_supported_cache_fields(model_id) for model_id in MODEL_IDS]
+
+    assert measure(lookup_all)[0] == ["system", "messages", "tools"]
+
+
+@pytest.mark.benchmark(group="generic.tool_index")
+def test_tool_index_build_and_search(generic, measure):
+    tools = tool_catalog()
+
+    def select():
+        return generic.tool_index.ToolIndex(tools).search("summarize each section of the file with charts", 15)
+
+    assert len(measure(select)) == 15
@@ -0,0 +1,32 @@
+"""Benchmarks for mcp-api's per-event extraction helpers."""
+
+import random
+
+import pytest
+from payloads import sentence, tool_result_texts
+
+
+@pytest.fixture(scope="module")
+def tool_result_event():
+    return {"message": {"role": "user", "content": [{"toolResult": {"toolUseId": "tooluse_1", "status": "success", "content": [{"text": text} for text in tool_result_texts()]}}]}}
+
+
+@pytest.fixture(scope="module")
+def assistant_event():
+    text = sentence(random.Random(4), 500)
+    return {"message": {"role": "assistant", "content": [{"text": text}, {"toolUse": {"toolUseId": "tooluse_1", "name": "fetch", "input": {"url": "https://example.com"}}}]}}
+
+
+@pytest.mark.benchmark(group="mcp-api.extract")
+def test_extract_tool_result(mcp_api, measure, tool_result_event):
+    assert measure(mcp_api.extract_tool_result, tool_result_event)
+
+
+@pytest.mark.benchmark(group="mcp-api.extract")
+def test_extract_text(mcp_api, measure, assistant_event):
+    assert measure(mcp_api.extract_text, assistant_event)
+
+
+@pytest.mark.benchmark(group="mcp-api.extract")
+def test_extract_tool_use(mcp_api, measure, assistant_event):
+    assert measure(mcp_api.extract_tool_use, assistant_event)["name"] == "fetch"
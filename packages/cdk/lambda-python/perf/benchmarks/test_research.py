@@ -0,0 +1,62 @@
+"""Benchmarks for the research runtime's history formatting and event conversion."""
+
+import pytest
+from payloads import history, stream_deltas, tool_result_texts
+
+
+@pytest.fixture(scope="module")
+def sdk():
+    return pytest.importorskip("claude_agent_sdk.types")
+
+
+def convert_all(converters, messages):
+    """Run a message sequence through a fresh converter, as one invocation does"""
+    converter = converters.ContentBlockConverter()
+    events = [event for message in messages for event in converter.convert_message_to_events(message)]
+    events.extend(converter.finish())
+    return events
+
+
+@pytest.mark.benchmark(group="research.process_messages")
+def test_process_messages_history(research, measure):
+    messages = history(image_count=0)
+    assert measure(research.utils.process_messages, messages).startswith("Human:")
+
+
+@pytest.mark.benchmark(group="research.process_messages")
+def test_process_messages_image_history(research, measure):
+    # Images are dropped from the transcript, but the blocks are still walked
+    messages = history()
+    assert measure(research.utils.process_messages, messages).startswith("Human:")
+
+
+@pytest.mark.benchmark(group="research.ContentBlockConverter")
+def test_convert_streamed_text(research, measure, sdk):
+    deltas = stream_deltas()
+    stream = [sdk.StreamEvent(uuid="u", session_id="s", event={"type": "message_start", "message": {}})]
+    stream.append(sdk.StreamEvent(uuid="u", session_id="s", event={"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}))
+    stream.extend(sdk.StreamEvent(uuid="u", session_id="s", event={"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": delta}}) for delta in deltas)
+    stream.append(sdk.StreamEvent(uuid="u", session_id="s", event={"type": "content_block_stop", "index": 0}))
+    # The complete message repeats the streamed text and is deduplicated
+    stream.append(sdk.AssistantMessage(content=[sdk.TextBlock(text="".join(deltas))], model="fake"))
+
+    events = measure(convert_all, research.converters, stream)
+    assert sum("contentBlockDelta" in event for event in events) == len(deltas) + 1
+
+
+@pytest.mark.benchmark(group="research.ContentBlockConverter")
+def test_convert_large_tool_result(research, measure, sdk):
+    texts = tool_result_texts()
+    messages = [
+        sdk.AssistantMessage(content=[sdk.ToolUseBlock(id="toolu_1", name="mcp__fetch__fetch", input={"url": "https://example.com"})], model="fake"),
+        sdk.AssistantMessage(content=[sdk.ToolResultBlock(tool_use_id="toolu_1", content=[{"type": "text", "text": text} for text in texts])], model="fake"),
+    ]
+
+    events = measure(convert_all, research.converters, messages)
+    assert any("toolResult" in event.get("contentBlockStart", {}).get("start", {}) for event in events)
+
+
+@pytest.mark.benchmark(group="research.ContentBlockConverter")
+def test_convert_text_messages(research, measure, sdk):
+    messages = [sdk.AssistantMessage(content=[sdk.TextBlock(text=message["content"][0]["text"])], model="fake") for message in history(image_count=0)]
+    assert measure(convert_all, research.converters, messages)
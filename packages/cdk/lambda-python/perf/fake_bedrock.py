@@ -0,0 +1,219 @@
+"""Local stand-in for the Bedrock runtime streaming APIs.
+
+Serves ConverseStream (used by Strands in the generic runtime and mcp-api) and
+InvokeModelWithResponseStream (used by the Claude CLI behind the research
+runtime) in the AWS event stream framing, emitting tokens at a fixed rate.
+
+Depending on the scenario, the first turns call tools before the final answer:
+  text    answer immediately
+  tool    call the fake MCP server's echo tool, then answer
+  upload  write a file with the fake MCP server, upload it to S3, then answer
+
+Point boto3 at it with AWS_ENDPOINT_URL_BEDROCK_RUNTIME, and the Claude CLI
+with ANTHROPIC_BEDROCK_BASE_URL and CLAUDE_CODE_SKIP_BEDROCK_AUTH=1.
+"""
+
+import argparse
+import base64
+import json
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+SCENARIOS = ("text", "tool", "upload")
+
+# Workspace paths appear in backquotes in the runtimes' fixed system prompts
+WORKSPACE_PATTERN = re.compile(r"`(/[^`\s]+)`")
+
+
+def encode_event(headers: dict[str, str], payload: bytes) -> bytes:
+    """Frame a message in the AWS event stream encoding (string headers only)"""
+    encoded_headers = b"".join(bytes([len(name)]) + name.encode() + b"\x07" + struct.pack(">H", len(value.encode())) + value.encode() for name, value in headers.items())
+    prelude = struct.pack(">II", 12 + len(encoded_headers) + len(payload) + 4, len(encoded_headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + encoded_headers + payload
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def encode_json_event(event_type: str, payload: dict[str, Any]) -> bytes:
+    return encode_event({":event-type": event_type, ":content-type": "application/json", ":message-type": "event"}, json.dumps(payload).encode())
+
+
+class FakeModel:
+    """Decides what each model turn returns and paces its tokens"""
+
+    def __init__(self, scenario: str, tokens: int, token_rate: float, first_token_delay: float):
+        self.scenario = scenario
+        self.tokens = tokens
+        self.token_interval = 1 / token_rate if token_rate > 0 else 0
+        self.first_token_delay = first_token_delay
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_tool_call(self, tool_names: list[str], previous_inputs: list[dict[str, Any]], text: str) -> tuple[str, dict[str, Any]] | None:
+        """Get (tool name, input) for the turn, or None to answer.
+
+        Args:
+            tool_names: Tools offered in the request
+            previous_inputs: Inputs of the tool calls already made in the conversation
+            text: System prompt, searched for the invocation's workspace
+        """
+        if self.scenario == "tool":
+            plan = [("echo", {"text": "hello"})]
+        elif self.scenario == "upload":
+            workspace = WORKSPACE_PATTERN.search(text)
+            path = f"{workspace.group(1) if workspace else '/tmp/ws'}/loadtest-{uuid.uuid4().hex[:8]}.txt"
+            # The upload step sends the file written by the previous call
+            written = previous_inputs[0].get("path", path) if previous_inputs else path
+            plan = [("write_file", {"path": path, "size": 256 * 1024}), ("upload_file_to_s3_and_retrieve_s3_url", {"filepath": written})]
+        else:
+            plan = []
+        if len(previous_inputs) >= len(plan):
+            return None
+
+        wanted, tool_input = plan[len(previous_inputs)]
+        for name in tool_names:
+            # The Claude CLI prefixes MCP tools with mcp__<server>__
+            if name == wanted or name.endswith(f"__{wanted}"):
+                return name, tool_input
+        return None
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def answer_tokens(self) -> list[str]:
+        return [f"token{i} " for i in range(self.tokens)]
+
+    def pace(self, index: int):
+        if index == 0 and self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        elif self.token_interval:
+            time.sleep(self.token_interval)
+
+
+class FakeBedrockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    model: FakeModel
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.model.count_request()
+        if self.path.endswith("/converse-stream"):
+            self._stream(self._converse_events(body))
+        elif self.path.endswith("/invoke-with-response-stream"):
+            self._stream(self._anthropic_chunks(body))
+        elif self.path.endswith("/invoke"):
+            self._json({"id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": "fake", "content": [{"type": "text", "text": "ok"}], "stop_reason": "end_turn", "usage": {"input_tokens": 1, "output_tokens": 1}})
+        elif self.path.endswith("/count-tokens"):
+            self._json({"inputTokens": 1})
+        else:
+            self._json({"message": f"Unsupported path {self.path}"}, 404)
+
+    def _json(self, payload: dict[str, Any], status: int = 200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, events):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("x-amzn-RequestId", str(uuid.uuid4()))
+        self.end_headers()
+        try:
+            for data in events:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _converse_events(self, body: dict[str, Any]):
+        messages = body.get("messages", [])
+        tool_names = [tool["toolSpec"]["name"] for tool in body.get("toolConfig", {}).get("tools", []) if "toolSpec" in tool]
+        previous_inputs = [block["toolUse"].get("input", {}) for message in messages for block in message.get("content", []) if "toolUse" in block]
+        system_text = " ".join(block.get("text", "") for block in body.get("system", []))
+        tool_call = self.model.next_tool_call(tool_names, previous_inputs, system_text)
+
+        yield encode_json_event("messageStart", {"role": "assistant"})
+        if tool_call:
+            name, tool_input = tool_call
+            self.model.pace(0)
+            yield encode_json_event("contentBlockStart", {"contentBlockIndex": 0, "start": {"toolUse": {"toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}", "name": name}}})
+            yield encode_json_event("contentBlockDelta", {"contentBlockIndex": 0, "delta": {"toolUse": {"input": json.dumps(tool_input)}}})
+            yield encode_json_event("contentBlockStop", {"contentBlockIndex": 0})
+            yield encode_json_event("messageStop", {"stopReason": "tool_use"})
+            output_tokens = 20
+        else:
+            tokens = self.model.answer_tokens()
+            for i, token in enumerate(tokens):
+                self.model.pace(i)
+                yield encode_json_event("contentBlockDelta", {"contentBlockIndex": 0, "delta": {"text": token}})
+            yield encode_json_event("contentBlockStop", {"contentBlockIndex": 0})
+            yield encode_json_event("messageStop", {"stopReason": "end_turn"})
+            output_tokens = len(tokens)
+        yield encode_json_event("metadata", {"usage": {"inputTokens": 100, "outputTokens": output_tokens, "totalTokens": 100 + output_tokens}, "metrics": {"latencyMs": 1}})
+
+    def _anthropic_chunks(self, body: dict[str, Any]):
+        def chunk(event: dict[str, Any]) -> bytes:
+            return encode_json_event("chunk", {"bytes": base64.b64encode(json.dumps(event).encode()).decode()})
+
+        messages = body.get("messages", [])
+        tool_names = [tool.get("name", "") for tool in body.get("tools", [])]
+        previous_inputs = [block.get("input", {}) for message in messages if isinstance(message.get("content"), list) for block in message["content"] if block.get("type") == "tool_use"]
+        system = body.get("system", "")
+        system_text = system if isinstance(system, str) else " ".join(block.get("text", "") for block in system)
+        tool_call = self.model.next_tool_call(tool_names, previous_inputs, system_text)
+
+        yield chunk({"type": "message_start", "message": {"id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": "fake", "content": [], "stop_reason": None, "usage": {"input_tokens": 100, "output_tokens": 0}}})
+        if tool_call:
+            name, tool_input = tool_call
+            self.model.pace(0)
+            yield chunk({"type": "content_block_start", "index": 0, "content_block": {"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:20]}", "name": name, "input": {}}})
+            yield chunk({"type": "content_block_delta", "index": 0, "delta": {"type": "input_json_delta", "partial_json": json.dumps(tool_input)}})
+            yield chunk({"type": "content_block_stop", "index": 0})
+            stop_reason, output_tokens = "tool_use", 20
+        else:
+            tokens = self.model.answer_tokens()
+            yield chunk({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            for i, token in enumerate(tokens):
+                self.model.pace(i)
+                yield chunk({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}})
+            yield chunk({"type": "content_block_stop", "index": 0})
+            stop_reason, output_tokens = "end_turn", len(tokens)
+        yield chunk({"type": "message_delta", "delta": {"stop_reason": stop_reason, "stop_sequence": None}, "usage": {"output_tokens": output_tokens}})
+        yield chunk({"type": "message_stop"})
+
+
+def start_fake_bedrock(port: int, scenario: str, tokens: int, token_rate: float, first_token_delay: float) -> tuple[ThreadingHTTPServer, FakeModel]:
+    """Serve the fake Bedrock runtime on a background thread"""
+    model = FakeModel(scenario, tokens, token_rate, first_token_delay)
+    handler = type("Handler", (FakeBedrockHandler,), {"model": model})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--scenario", choices=SCENARIOS, default="text")
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens in each final answer")
+    parser.add_argument("--token-rate", type=float, default=100, help="Tokens per second per stream (0 for unthrottled)")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds before each turn's first token")
+    args = parser.parse_args()
+    server, _ = start_fake_bedrock(args.port, args.scenario, args.tokens, args.token_rate, args.first_token_delay)
+    print(f"Fake Bedrock runtime listening on http://127.0.0.1:{args.port} ({args.scenario})")
+    threading.Event().wait()
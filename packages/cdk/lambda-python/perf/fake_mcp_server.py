@@ -0,0 +1,55 @@
+"""Stdio MCP server with tunable startup and tool latency.
+
+Environment:
+  FAKE_MCP_STARTUP_DELAY  seconds to sleep before serving (default 0)
+  FAKE_MCP_TOOL_DELAY     seconds each tool call takes (default 0)
+  FAKE_MCP_RESULT_BYTES   size of the echo tool's result (default: the input text)
+"""
+
+import asyncio
+import os
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+time.sleep(float(os.environ.get("FAKE_MCP_STARTUP_DELAY", "0")))
+
+mcp = FastMCP("fake")
+TOOL_DELAY = float(os.environ.get("FAKE_MCP_TOOL_DELAY", "0"))
+RESULT_BYTES = int(os.environ.get("FAKE_MCP_RESULT_BYTES", "0"))
+
+
+@mcp.tool()
+async def echo(text: str) -> str:
+    """Echo text back
+
+    Args:
+        text: The text to echo
+    """
+    await asyncio.sleep(TOOL_DELAY)
+    if RESULT_BYTES:
+        return (text * (RESULT_BYTES // max(len(text), 1) + 1))[:RESULT_BYTES]
+    return text
+
+
+@mcp.tool()
+async def write_file(path: str, size: int) -> str:
+    """Write a file of the given size
+
+    Args:
+        path: Absolute path of the file
+        size: Size in bytes
+    """
+    await asyncio.sleep(TOOL_DELAY)
+    await asyncio.to_thread(write_random_bytes, path, size)
+    return f"Wrote {size} bytes to {path}"
+
+
+def write_random_bytes(path: str, size: int):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(os.urandom(size))
+
+
+if __name__ == "__main__":
+    mcp.run()
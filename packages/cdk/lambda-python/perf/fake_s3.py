@@ -0,0 +1,126 @@
+"""Local in-memory stand-in for the S3 operations used by the runtimes.
+
+Supports PutObject, HeadObject, GetObject and multipart uploads with path-style
+addressing. Point the runtimes at it with S3_ENDPOINT_URL and AWS_ENDPOINT_URL_S3.
+"""
+
+import argparse
+import hashlib
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class ObjectStore:
+    """Objects and in-progress multipart uploads, kept in memory"""
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.puts = 0
+        self.lock = threading.Lock()
+
+
+class FakeS3Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store: ObjectStore
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def _target(self) -> tuple[str, str, dict[str, list[str]]]:
+        url = urlsplit(self.path)
+        bucket, _, key = url.path.lstrip("/").partition("/")
+        return bucket, unquote(key), parse_qs(url.query, keep_blank_values=True)
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = bytearray()
+            while size := int(self.rfile.readline().split(b";")[0], 16):
+                data += self.rfile.read(size)
+                self.rfile.readline()
+            self.rfile.readline()
+            return bytes(data)
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _reply(self, status: int = 200, body: bytes = b"", headers: dict[str, str] | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _not_found(self):
+        self._reply(404, b"<Error><Code>NoSuchKey</Code></Error>", {"Content-Type": "application/xml"})
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        data = self._body()
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self.store.lock:
+            if "uploadId" in query:
+                self.store.uploads.setdefault(query["uploadId"][0], {})[int(query["partNumber"][0])] = data
+            else:
+                self.store.objects[(bucket, key)] = data
+                self.store.puts += 1
+        self._reply(headers={"ETag": etag})
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        self._body()
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with self.store.lock:
+                self.store.uploads[upload_id] = {}
+            body = f"<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+        elif "uploadId" in query:
+            with self.store.lock:
+                parts = self.store.uploads.pop(query["uploadId"][0], {})
+                self.store.objects[(bucket, key)] = b"".join(parts[number] for number in sorted(parts))
+                self.store.puts += 1
+            body = f'<CompleteMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key><ETag>"{uuid.uuid4().hex}-{len(parts)}"</ETag></CompleteMultipartUploadResult>'
+        else:
+            self._reply(400)
+            return
+        self._reply(body=body.encode(), headers={"Content-Type": "application/xml"})
+
+    def do_HEAD(self):
+        bucket, key, _ = self._target()
+        with self.store.lock:
+            data = self.store.objects.get((bucket, key))
+        if data is None:
+            self._not_found()
+        else:
+            self._reply(headers={"Content-Length": str(len(data)), "ETag": f'"{hashlib.md5(data).hexdigest()}"'})
+
+    def do_GET(self):
+        bucket, key, _ = self._target()
+        with self.store.lock:
+            data = self.store.objects.get((bucket, key))
+        if data is None:
+            self._not_found()
+        else:
+            self._reply(body=data, headers={"Content-Type": "application/octet-stream"})
+
+
+def start_fake_s3(port: int) -> tuple[ThreadingHTTPServer, ObjectStore]:
+    """Serve the fake S3 on a background thread"""
+    store = ObjectStore()
+    handler = type("Handler", (FakeS3Handler,), {"store": store})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+    start_fake_s3(args.port)
+    print(f"Fake S3 listening on http://127.0.0.1:{args.port}")
+    threading.Event().wait()
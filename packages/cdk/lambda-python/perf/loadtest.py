@@ -0,0 +1,402 @@
+"""Load test for the agent runtimes and mcp-api against local stand-ins.
+
+Starts a fake Bedrock runtime, a fake S3 and a fake stdio MCP server, launches
+the target app under uvicorn, and sends invocations at increasing concurrency.
+Each level reports p50/p95/p99 time to first byte and total time, events per
+second, the target's peak RSS (alone and with its child processes) and how many
+subprocesses it has open during and after the level.
+
+Run it with the target's own environment so its dependencies are importable:
+
+    uv run --project generic-agent-core-runtime python perf/loadtest.py --target generic
+    uv run --project research-agent-core-runtime python perf/loadtest.py --target research
+    uv run --project ../mcp-api python perf/loadtest.py --target mcp-api --concurrency 1
+
+mcp-api serves one request per Lambda instance (it keeps the session in a
+global and clears /tmp/ws per request), so only concurrency 1 is meaningful.
+
+Pass --save-baseline to store the results under perf/baselines, and --compare
+to check them against the stored baseline (exits 1 on a regression).
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from fake_bedrock import SCENARIOS, start_fake_bedrock
+from fake_s3 import start_fake_s3
+
+PERF_DIR = Path(__file__).resolve().parent
+LAMBDA_PYTHON_DIR = PERF_DIR.parent
+BASELINE_DIR = PERF_DIR / "baselines"
+MODEL_ID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
+FILE_BUCKET = "loadtest"
+
+
+@dataclass
+class Target:
+    app_dir: Path
+    health_path: str
+    invoke_path: str
+
+
+TARGETS = {
+    "generic": Target(LAMBDA_PYTHON_DIR / "generic-agent-core-runtime", "/ping", "/invocations"),
+    "research": Target(LAMBDA_PYTHON_DIR / "research-agent-core-runtime", "/ping", "/invocations"),
+    "mcp-api": Target(LAMBDA_PYTHON_DIR.parent / "mcp-api", "/", "/streaming"),
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0), len(ordered) - 1)]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {f"p{q}": round(percentile(values, q) * 1000, 1) for q in (50, 95, 99)}
+
+
+def read_rss(pid: int) -> int:
+    """Resident set size of a process in bytes (0 if it has exited)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def list_descendants(pid: int) -> list[int]:
+    """PIDs of every process below pid, read from /proc"""
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    found = []
+    pending = [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+class ProcessSampler:
+    """Samples the target's RSS and subprocess count in the background"""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.reset()
+
+    def reset(self):
+        self.rss_max = 0
+        self.rss_total_max = 0
+        self.subprocesses_max = 0
+
+    def sample(self) -> tuple[int, int, int]:
+        descendants = list_descendants(self.pid)
+        rss = read_rss(self.pid)
+        rss_total = rss + sum(read_rss(child) for child in descendants)
+        self.rss_max = max(self.rss_max, rss)
+        self.rss_total_max = max(self.rss_total_max, rss_total)
+        self.subprocesses_max = max(self.subprocesses_max, len(descendants))
+        return rss, rss_total, len(descendants)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+def build_request(target_name: str, prompt: str) -> tuple[bytes, dict[str, str]]:
+    """Request body and headers for one invocation of the target"""
+    headers = {"Content-Type": "application/json"}
+    if target_name == "mcp-api":
+        body = {"systemPrompt": "You are a load test.", "userPrompt": prompt, "messages": [], "model": {"modelId": MODEL_ID, "region": "us-east-1"}}
+    else:
+        body = {"messages": [], "prompt": prompt, "model": {"modelId": MODEL_ID, "region": "us-east-1"}}
+        headers["x-amzn-bedrock-agentcore-runtime-session-id"] = str(uuid.uuid4())
+    return json.dumps(body).encode(), headers
+
+
+def invoke(port: int, target_name: str, path: str, timeout: float) -> dict[str, Any]:
+    """Send one invocation and time its stream"""
+    body, headers = build_request(target_name, "Run the load test")
+    started_at = time.perf_counter()
+    ttfb = None
+    events = 0
+    error = None
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("POST", path, body=body, headers=headers)
+        response = conn.getresponse()
+        tail = b""
+        while chunk := response.read1(65536):
+            if ttfb is None:
+                ttfb = time.perf_counter() - started_at
+            data = tail + chunk
+            lines = data.split(b"\n")
+            tail = lines.pop()
+            events += len(lines)
+            if error is None and b"internalServerException" in data:
+                error = "internalServerException"
+        if response.status != 200:
+            error = f"HTTP {response.status}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        conn.close()
+    return {"ttfb": ttfb, "total": time.perf_counter() - started_at, "events": events, "error": error}
+
+
+def run_level(port: int, target_name: str, target: Target, concurrency: int, requests: int, timeout: float, sampler: ProcessSampler) -> dict[str, Any]:
+    """Send requests invocations with the given concurrency and summarize them"""
+    sampler.reset()
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: invoke(port, target_name, target.invoke_path, timeout), range(requests)))
+    elapsed = time.perf_counter() - started_at
+    sampler.sample()
+
+    # Give the target a moment to reap finished work before counting leftover subprocesses
+    time.sleep(1)
+    _, _, subprocesses_after = sampler.sample()
+
+    succeeded = [result for result in results if result["error"] is None]
+    errors: dict[str, int] = {}
+    for result in results:
+        if result["error"] is not None:
+            errors[result["error"]] = errors.get(result["error"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "ttfb_ms": summarize([result["ttfb"] for result in succeeded if result["ttfb"] is not None]),
+        "total_ms": summarize([result["total"] for result in succeeded]),
+        "events_per_sec": round(sum(result["events"] for result in succeeded) / elapsed, 1),
+        "requests_per_sec": round(len(succeeded) / elapsed, 2),
+        "rss_mb_max": round(sampler.rss_max / 2**20, 1),
+        "rss_total_mb_max": round(sampler.rss_total_max / 2**20, 1),
+        "subprocesses_max": sampler.subprocesses_max,
+        "subprocesses_after": subprocesses_after,
+    }
+
+
+def wait_until_healthy(process: subprocess.Popen, port: int, path: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Target exited with code {process.returncode} before becoming healthy")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", path)
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Target did not become healthy within {timeout}s")
+
+
+def start_target(args: argparse.Namespace, target: Target, work_dir: Path, bedrock_url: str, s3_url: str) -> subprocess.Popen:
+    """Launch the target app under uvicorn, wired to the stand-ins"""
+    mcp_server_env = {
+        "FAKE_MCP_STARTUP_DELAY": str(args.mcp_startup_delay),
+        "FAKE_MCP_TOOL_DELAY": str(args.mcp_tool_delay),
+        "FAKE_MCP_RESULT_BYTES": str(args.mcp_result_bytes),
+    }
+    mcp_config = {"mcpServers": {"fake": {"command": args.python, "args": [str(PERF_DIR / "fake_mcp_server.py")], "env": mcp_server_env}}}
+    # mcp-api reads mcp.json from its working directory
+    (work_dir / "mcp.json").write_text(json.dumps(mcp_config))
+
+    env = {
+        **os.environ,
+        "PYTHONUNBUFFERED": "1",
+        "AWS_REGION": "us-east-1",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_ACCESS_KEY_ID": "loadtest",
+        "AWS_SECRET_ACCESS_KEY": "loadtest",
+        "AWS_SESSION_TOKEN": "loadtest",
+        "AWS_ENDPOINT_URL_BEDROCK_RUNTIME": bedrock_url,
+        "AWS_ENDPOINT_URL_S3": s3_url,
+        "S3_ENDPOINT_URL": s3_url,
+        "FILE_BUCKET": FILE_BUCKET,
+        "MCP_CONFIG_PATH": str(work_dir / "mcp.json"),
+        "MCP_TOOL_CACHE_DIR": str(work_dir / "mcp-tool-cache"),
+        "WORKSPACE_DIR": str(work_dir / "ws"),
+        "TRANSCRIPT_DB_PATH": str(work_dir / "transcripts" / "transcripts.db"),
+        # The research runtime's Claude CLI talks to Bedrock directly
+        "CLAUDE_CODE_USE_BEDROCK": "1",
+        "CLAUDE_CODE_SKIP_BEDROCK_AUTH": "1",
+        "ANTHROPIC_BEDROCK_BASE_URL": bedrock_url,
+        "DISABLE_TELEMETRY": "1",
+        "OTEL_SDK_DISABLED": "true",
+    }
+    command = [args.python, "-m", "uvicorn", "app:app", "--app-dir", str(target.app_dir), "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"]
+    log = open(work_dir / "target.log", "wb")
+    return subprocess.Popen(command, cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def compare_with_baseline(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Describe every metric that regressed by more than the threshold"""
+    regressions = []
+    baseline_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in results["levels"]:
+        base = baseline_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        checks = [
+            ("ttfb p95", level["ttfb_ms"]["p95"], base["ttfb_ms"]["p95"], True),
+            ("ttfb p99", level["ttfb_ms"]["p99"], base["ttfb_ms"]["p99"], True),
+            ("total p95", level["total_ms"]["p95"], base["total_ms"]["p95"], True),
+            ("events/s", level["events_per_sec"], base["events_per_sec"], False),
+            ("rss total", level["rss_total_mb_max"], base["rss_total_mb_max"], True),
+        ]
+        for name, current, previous, lower_is_better in checks:
+            if not previous:
+                continue
+            change = (current - previous) / previous
+            if (change > threshold) if lower_is_better else (change < -threshold):
+                regressions.append(f"c={level['concurrency']} {name}: {previous} -> {current} ({change:+.0%})")
+        if level["subprocesses_after"] > base["subprocesses_after"]:
+            regressions.append(f"c={level['concurrency']} subprocesses left after the level: {base['subprocesses_after']} -> {level['subprocesses_after']}")
+    return regressions
+
+
+def print_table(results: dict[str, Any]):
+    print(f"\n{results['target']} ({results['scenario']}, {results['settings']['tokens']} tokens at {results['settings']['token_rate']}/s)")
+    print(f"{'conc':>5} {'reqs':>5} {'err':>4} {'ttfb p50':>9} {'p95':>8} {'p99':>8} {'total p50':>10} {'p95':>8} {'p99':>8} {'events/s':>9} {'rss MB':>7} {'+child':>7} {'procs':>5} {'after':>5}")
+    for level in results["levels"]:
+        ttfb, total = level["ttfb_ms"], level["total_ms"]
+        print(f"{level['concurrency']:>5} {level['requests']:>5} {sum(level['errors'].values()):>4} {ttfb['p50']:>9} {ttfb['p95']:>8} {ttfb['p99']:>8} {total['p50']:>10} {total['p95']:>8} {total['p99']:>8} {level['events_per_sec']:>9} {level['rss_mb_max']:>7} {level['rss_total_mb_max']:>7} {level['subprocesses_max']:>5} {level['subprocesses_after']:>5}")
+        for error, count in level["errors"].items():
+            print(f"      {count} x {error}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=TARGETS, required=True)
+    parser.add_argument("--scenario", choices=SCENARIOS, default="text", help="text: answer only, tool: one MCP call, upload: write a file and upload it to S3")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=0, help="Requests per level (default: 4 per concurrent client)")
+    parser.add_argument("--tokens", type=int, default=200, help="Tokens in each final answer")
+    parser.add_argument("--token-rate", type=float, default=100, help="Tokens per second per stream (0 for unthrottled)")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds the fake model waits before each turn's first token")
+    parser.add_argument("--mcp-startup-delay", type=float, default=0.5, help="Seconds the fake MCP server takes to start")
+    parser.add_argument("--mcp-tool-delay", type=float, default=0.1, help="Seconds each fake MCP tool call takes")
+    parser.add_argument("--mcp-result-bytes", type=int, default=0, help="Size of the fake echo tool's result")
+    parser.add_argument("--timeout", type=float, default=300, help="Per-request timeout in seconds")
+    parser.add_argument("--port", type=int, default=18080, help="Port for the target")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter with the target's dependencies")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline for the target and scenario")
+    parser.add_argument("--compare", action="store_true", help="Compare with the stored baseline and exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change that counts as a regression")
+    args = parser.parse_args()
+
+    target = TARGETS[args.target]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    baseline_path = BASELINE_DIR / f"{args.target}-{args.scenario}.json"
+
+    bedrock, model = start_fake_bedrock(0, args.scenario, args.tokens, args.token_rate, args.first_token_delay)
+    s3, store = start_fake_s3(0)
+    bedrock_url = f"http://127.0.0.1:{bedrock.server_address[1]}"
+    s3_url = f"http://127.0.0.1:{s3.server_address[1]}"
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp:
+        work_dir = Path(tmp)
+        process = start_target(args, target, work_dir, bedrock_url, s3_url)
+        try:
+            wait_until_healthy(process, args.port, target.health_path, 60)
+            sampler = ProcessSampler(process.pid)
+            sampler.start()
+
+            # The first invocation starts MCP servers and warms caches, so it is reported on its own
+            warmup = invoke(args.port, args.target, target.invoke_path, args.timeout)
+            print(f"Warm-up invocation: {warmup['total'] * 1000:.0f} ms, error: {warmup['error']}")
+
+            results = {
+                "target": args.target,
+                "scenario": args.scenario,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "settings": {key: getattr(args, key) for key in ("tokens", "token_rate", "first_token_delay", "mcp_startup_delay", "mcp_tool_delay", "mcp_result_bytes")},
+                "warmup_ms": round(warmup["total"] * 1000, 1),
+                "levels": [],
+            }
+            for concurrency in levels:
+                level = run_level(args.port, args.target, target, concurrency, args.requests or concurrency * 4, args.timeout, sampler)
+                results["levels"].append(level)
+                print_table({**results, "levels": [level]})
+                if level["errors"]:
+                    print((work_dir / "target.log").read_text(errors="replace")[-2000:], file=sys.stderr)
+            sampler.stop()
+        except Exception:
+            print((work_dir / "target.log").read_text(errors="replace")[-4000:], file=sys.stderr)
+            raise
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    results["stand_ins"] = {"model_requests": model.requests, "s3_puts": store.puts}
+    print_table(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved baseline to {baseline_path}")
+    if args.compare:
+        if not baseline_path.exists():
+            print(f"\nNo baseline at {baseline_path}", file=sys.stderr)
+            return 1
+        regressions = compare_with_baseline(results, json.loads(baseline_path.read_text()), args.threshold)
+        if regressions:
+            print(f"\nRegressions against {baseline_path.name}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {baseline_path.name} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,23 @@
 """Main FastAPI application for Research AgentCore Runtime."""
 
+import asyncio
 import json
 import logging
+import time
 import traceback
 
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
 
 from src.agent import AgentManager
-from src.utils import clean_ws_directory, create_error_response, create_ws_directory
+from src.config import get_max_request_bytes, is_sdk_resume_enabled
+from src.metrics import INVOCATIONS_IN_FLIGHT, PHASE_SECONDS, instrument_events, record_error, render_metrics
+from src.prometheus import CONTENT_TYPE
+from src.stream import create_stream_encoder, start_event_channel
+from src.utils import RequestTooLargeError, create_error_response, parse_request_body, read_request_body
+from src.workspace import get_session_workspace_name, get_workspace_manager
 
 # Configure root logger
 logging.basicConfig(
@@ -45,29 +53,42 @@ async def ping():
     return {"status": "healthy", "service": "research-agent-core-runtime"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Operational metrics in the Prometheus text format"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.post("/invocations")
 async def invocations(request: Request):
     """Main invocation endpoint required by AgentCore
 
     Expects request with messages, system_prompt, prompt, and model
     """
+    started_at = time.monotonic()
+
     # Setup session and workspace
     headers = dict(request.headers)
     session_id = headers.get("x-amzn-bedrock-agentcore-runtime-session-id")
     trace_id = headers.get("x-amzn-trace-id")
-    agent_manager.set_session_info(session_id, trace_id)
-    create_ws_directory()
+    workspace_manager = get_workspace_manager()
+    workspace_dir = None
+    streaming = False
+    INVOCATIONS_IN_FLIGHT.inc()
 
     try:
-        # Parse request body
-        body = await request.body()
+        # Parse request body off the event loop so other streams and /ping stay responsive
         try:
-            request_data = json.loads(body.decode())
-            # Handle AWS Lambda integration format
-            if "input" in request_data and isinstance(request_data["input"], dict):
-                request_data = request_data["input"]
+            with PHASE_SECONDS.time(phase="body_parse"):
+                body = await read_request_body(request, get_max_request_bytes())
+                request_data = await asyncio.to_thread(parse_request_body, body)
+        except RequestTooLargeError as e:
+            logger.error(f"Request too large: {e}")
+            record_error(e)
+            return create_error_response(str(e))
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON: {e}")
+            record_error(e)
             return create_error_response("Invalid JSON in request body")
 
         # Extract fields
@@ -87,31 +108,55 @@ async def invocations(request: Request):
         if not prompt and not messages:
             return create_error_response("Either prompt or messages is required")
 
+        # A resumed SDK session is looked up by its cwd, so give each session a stable workspace
+        conversation_id = agent_session_id or session_id
+        workspace_name = get_session_workspace_name(conversation_id) if conversation_id and is_sdk_resume_enabled() else None
+        workspace_dir = workspace_manager.create(workspace_name)
+
         # Stream response
+        encoder = create_stream_encoder(headers)
+
         async def generate():
-            try:
-                async for chunk in agent_manager.process_request_streaming(
-                    messages=messages,
-                    system_prompt=system_prompt,
-                    mode=mode,
-                    prompt=prompt,
-                    model_info=model_info,
-                    user_id=user_id,
-                    mcp_servers=mcp_servers,
-                    session_id=agent_session_id or session_id,
-                    agent_id=agent_id,
-                ):
-                    yield chunk
-            finally:
-                clean_ws_directory()
-
-        return StreamingResponse(generate(), media_type="text/event-stream")
+            events = agent_manager.process_request_streaming(
+                messages=messages,
+                system_prompt=system_prompt,
+                mode=mode,
+                prompt=prompt,
+                model_info=model_info,
+                user_id=user_id,
+                mcp_servers=mcp_servers,
+                session_id=conversation_id,
+                agent_id=agent_id,
+                workspace_dir=workspace_dir,
+                trace_id=trace_id,
+            )
+            events = instrument_events(events, started_at)
+            # The agent runs on its own task so a slow client never stalls the model loop
+            async for chunk in encoder.encode(start_event_channel(events)):
+                yield chunk
+
+        body = generate()
+
+        async def finish():
+            # Runs after the response even if the client disconnected before the stream started, when generate()
+            # never ran; closing it first stops the agent before its workspace is released
+            await body.aclose()
+            workspace_manager.release(workspace_dir)
+            INVOCATIONS_IN_FLIGHT.dec()
+
+        streaming = True
+        return StreamingResponse(body, media_type=encoder.media_type, background=BackgroundTask(finish))
     except Exception as e:
         logger.error(f"Error processing request: {e}")
         logger.error(traceback.format_exc())
+        record_error(e)
         return create_error_response(str(e))
     finally:
-        clean_ws_directory()
+        # The response releases the workspace once the stream finishes
+        if not streaming:
+            if workspace_dir:
+                workspace_manager.release(workspace_dir)
+            INVOCATIONS_IN_FLIGHT.dec()
 
 
 if __name__ == "__main__":
@@ -1,47 +1,31 @@
 """Agent management for the research agent core runtime."""
 
-import json
+import asyncio
 import logging
 import os
+import time
 from collections.abc import AsyncGenerator
 from typing import Any
 
-from src.config import extract_model_info, get_max_iterations
+from src.config import extract_model_info, get_max_iterations, get_transcript_settings, is_sdk_resume_enabled
+from src.context import InvocationContext
 from src.converters import ContentBlockConverter
+from src.metrics import AGENT_ITERATIONS, PHASE_SECONDS, record_error
 from src.tools import ToolManager
+from src.transcript import CHARS_PER_TOKEN, build_transcript, get_transcript_store
 from src.types import Message, ModelInfo
-from src.utils import process_messages, process_prompt
+from src.utils import format_message, process_prompt
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-class IterationLimitExceededError(Exception):
-    """Exception raised when iteration limit is exceeded"""
-    pass
-
-
 class AgentManager:
     """Manages Claude Agent SDK agent creation and execution."""
 
     def __init__(self):
         self.tool_manager = ToolManager()
         self.max_iterations = get_max_iterations()
-        self.iteration_count = 0
-
-    def set_session_info(self, session_id: str, trace_id: str):
-        """Set session and trace IDs"""
-        self.tool_manager.set_session_info(session_id, trace_id)
-
-    def iteration_limit_handler(self, **ev):
-        if ev.get("init_event_loop"):
-            self.iteration_count = 0
-        if ev.get("start_event_loop"):
-            self.iteration_count += 1
-            if self.iteration_count > self.max_iterations:
-                raise IterationLimitExceededError(
-                    f"Event loop reached maximum iteration count ({self.max_iterations})."
-                )
 
     def load_mode_prompt(self, mode: str) -> str:
         """Load system prompt for specified mode"""
@@ -55,6 +39,21 @@ class AgentManager:
             logger.error(f"Failed to load {mode} prompt: {e}")
             return "You are a helpful AWS technical assistant."
 
+    def prepare_history(self, session_id: str | None, messages: list[dict[str, Any]]) -> tuple[str | None, str]:
+        """Get the SDK session to resume, or the transcript to prepend, for the conversation so far"""
+        if not session_id:
+            max_chars = get_transcript_settings()["max_tokens"] * CHARS_PER_TOKEN
+            return None, build_transcript((format_message(message) for message in reversed(messages)), len(messages), max_chars)
+
+        store = get_transcript_store()
+        appended = store.sync(session_id, messages)
+        logger.info(f"Appended {appended} of {len(messages)} messages to the transcript of session {session_id}")
+        if is_sdk_resume_enabled():
+            sdk_session_id = store.get_sdk_session(session_id, messages)
+            if sdk_session_id:
+                return sdk_session_id, ""
+        return None, store.get_transcript(session_id)
+
     async def process_request_streaming(
         self,
         messages: list[Message] | list[dict[str, Any]],
@@ -66,29 +65,37 @@ class AgentManager:
         mcp_servers: list[str] | None = None,
         session_id: str | None = None,
         agent_id: str | None = None,
-    ) -> AsyncGenerator[str]:
+        workspace_dir: str | None = None,
+        trace_id: str | None = None,
+    ) -> AsyncGenerator[dict[str, Any]]:
         """Process a request and yield streaming responses"""
+        started_at = time.monotonic()
+        context = InvocationContext(
+            session_id=session_id,
+            trace_id=session_id or trace_id,
+            workspace_dir=workspace_dir,
+            max_iterations=self.max_iterations,
+        )
         try:
             from claude_agent_sdk import ClaudeAgentOptions, query
 
-            if session_id:
-                self.set_session_info(session_id, session_id)
-
             model_id, region = extract_model_info(model_info)
-            mcp_config = self.tool_manager.get_mcp_config(mcp_servers=mcp_servers)
+            with PHASE_SECONDS.time(phase="tool_loading"):
+                mcp_config = self.tool_manager.get_mcp_config(mcp_servers=mcp_servers)
             logger.info(f"Loaded {len(mcp_config)} MCP servers")
 
-            # Process messages and prompt
-            processed_messages = process_messages(messages)
+            # Process prompt and the conversation so far (only turns not seen before are stored)
             processed_prompt = process_prompt(prompt)
-            
+            with PHASE_SECONDS.time(phase="history"):
+                resume_session_id, history = await asyncio.to_thread(self.prepare_history, context.session_id, messages)
+
             # Combine conversation history
-            if processed_messages:
-                full_prompt = f"{processed_messages}\n\nHuman: {processed_prompt}\nAssistant:"
+            if history:
+                full_prompt = f"{history}\n\nHuman: {processed_prompt}\nAssistant:"
             else:
                 full_prompt = processed_prompt
-            
-            logger.info(f"Initial prompt: {len(full_prompt)} chars, {len(messages)} previous messages")
+
+            logger.info(f"Initial prompt: {len(full_prompt)} chars, {len(messages)} previous messages{f', resuming SDK session {resume_session_id}' if resume_session_id else ''}")
 
             # Load mode-specific system prompt
             effective_mode = mode or 'technical-research'
@@ -99,9 +106,13 @@ class AgentManager:
             options = ClaudeAgentOptions(
                 model=model_id,
                 system_prompt=mode_system_prompt,
-                max_turns=200,
+                max_turns=context.max_iterations,
                 permission_mode="default",  # Use default mode - allows tool execution
                 mcp_servers=mcp_config,
+                cwd=context.workspace_dir,
+                resume=resume_session_id,
+                # Stream text, reasoning and tool input token by token instead of once per completed message
+                include_partial_messages=True,
                 allowed_tools=[
                     # Brave Search MCP server (single instance)
                     "mcp__brave-search__brave_web_search",
@@ -134,35 +145,54 @@ class AgentManager:
                 ],
             )
 
-            converter = ContentBlockConverter()
+            converter = ContentBlockConverter(started_at)
 
             # Send message start
-            yield json.dumps(
-                {"event": {"messageStart": {"role": "assistant"}}}, ensure_ascii=False
-            ) + "\n"
-
-            # Stream from Claude Agent SDK
-            async for message in query(prompt=full_prompt, options=options):
-                for event in converter.convert_message_to_events(message):
-                    yield json.dumps({"event": event}, ensure_ascii=False) + "\n"
+            yield {"event": {"messageStart": {"role": "assistant"}}}
 
-            # Send message stop
-            yield json.dumps(
-                {"event": {"contentBlockStop": {"contentBlockIndex": converter.current_block_index}}},
-                ensure_ascii=False,
-            ) + "\n"
+            sdk_session_id = None
 
-            yield json.dumps(
-                {"event": {"messageStop": {"stopReason": "end_turn"}}}, ensure_ascii=False
-            ) + "\n"
+            async def run_query(query_prompt: str) -> AsyncGenerator[dict[str, Any]]:
+                nonlocal sdk_session_id
+                async for message in query(prompt=query_prompt, options=options):
+                    if type(message).__name__ == "ResultMessage" and not message.is_error:
+                        sdk_session_id = message.session_id
+                    for event in converter.convert_message_to_events(message):
+                        yield {"event": event}
 
-            yield json.dumps(
-                {"event": {"metadata": {"usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0}}}},
-                ensure_ascii=False,
-            ) + "\n"
+            # Stream from Claude Agent SDK
+            streamed = False
+            try:
+                async for event in run_query(full_prompt):
+                    streamed = True
+                    yield event
+            except Exception as e:
+                if options.resume is None or streamed:
+                    raise
+                # The SDK's session files may be gone (e.g. a new container), so fall back to the transcript
+                logger.warning(f"Could not resume SDK session {options.resume}, replaying the transcript instead: {e}")
+                options.resume = None
+                history = await asyncio.to_thread(get_transcript_store().get_transcript, context.session_id)
+                async for event in run_query(f"{history}\n\nHuman: {processed_prompt}\nAssistant:" if history else processed_prompt):
+                    yield event
+
+            # Next turn's history will be this one's plus the prompt and the answer
+            if context.session_id and sdk_session_id:
+                await asyncio.to_thread(get_transcript_store().set_sdk_session, context.session_id, sdk_session_id, len(messages) + 2, prompt)
+
+            # Close a text block sent from a completed message, then send message stop
+            for event in converter.finish():
+                yield {"event": event}
+
+            yield {"event": {"messageStop": {"stopReason": "end_turn"}}}
+
+            metadata = converter.build_metadata()
+            if metadata["metadata"]["metrics"]["turns"]:
+                AGENT_ITERATIONS.observe(metadata["metadata"]["metrics"]["turns"])
+            logger.info(f"Research finished: {metadata['metadata']['usage']} {metadata['metadata']['metrics']}")
+            yield {"event": metadata}
 
         except Exception as e:
             logger.error(f"Error: {e}", exc_info=True)
-            yield json.dumps(
-                {"event": {"internalServerException": {"message": str(e)}}}, ensure_ascii=False
-            ) + "\n"
+            record_error(e)
+            yield {"event": {"internalServerException": {"message": str(e)}}}
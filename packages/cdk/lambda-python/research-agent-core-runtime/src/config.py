@@ -6,7 +6,7 @@ from typing import Tuple
 
 logger = logging.getLogger(__name__)
 
-# Workspace directory
+# Root under which every invocation gets its own workspace directory
 WORKSPACE_DIR = "/tmp/ws"
 
 
@@ -20,3 +20,55 @@ def extract_model_info(model_info: dict) -> Tuple[str, str]:
 def get_max_iterations() -> int:
     """Get maximum iteration count from environment"""
     return int(os.getenv("MAX_ITERATIONS", "200"))
+
+
+def get_max_request_bytes() -> int:
+    """Get the largest accepted /invocations body size from environment"""
+    return int(os.getenv("MAX_REQUEST_BYTES", str(100 * 1024 * 1024)))
+
+
+def get_workspace_settings() -> dict:
+    """Get workspace root, disk quota and orphan cleanup settings from environment"""
+    return {
+        "root": os.getenv("WORKSPACE_DIR", WORKSPACE_DIR),
+        "quota_bytes": int(os.getenv("WORKSPACE_QUOTA_BYTES", str(2 * 1024 * 1024 * 1024))),
+        "orphan_ttl": float(os.getenv("WORKSPACE_ORPHAN_TTL", "3600")),
+    }
+
+
+def get_mcp_artifact_settings() -> dict:
+    """Get the pinned MCP artifact store location and whether servers launch from it from environment"""
+    return {
+        "root": os.getenv("MCP_ARTIFACT_DIR", "/opt/mcp-artifacts"),
+        "enabled": os.getenv("MCP_USE_ARTIFACTS", "true").strip().lower() in ("1", "true", "yes", "on"),
+    }
+
+
+def get_stream_settings() -> dict:
+    """Get response stream batching settings from environment (an interval of 0 sends every event as it arrives)"""
+    return {
+        "flush_interval": float(os.getenv("STREAM_FLUSH_INTERVAL", "0.03")),
+        "flush_bytes": int(os.getenv("STREAM_FLUSH_BYTES", "8192")),
+    }
+
+
+def get_stream_buffer_settings() -> dict:
+    """Get the bound and slow-consumer policy of the buffer between the agent and the response from environment"""
+    return {
+        "max_events": int(os.getenv("STREAM_BUFFER_EVENTS", "1024")),
+        "policy": os.getenv("STREAM_SLOW_CONSUMER_POLICY", "coalesce"),
+        "stall_timeout": float(os.getenv("STREAM_STALL_TIMEOUT", "300")),
+    }
+
+
+def get_transcript_settings() -> dict:
+    """Get transcript store location and prompt budget from environment"""
+    return {
+        "db_path": os.getenv("TRANSCRIPT_DB_PATH", "/tmp/.transcripts/transcripts.db"),
+        "max_tokens": int(os.getenv("TRANSCRIPT_MAX_TOKENS", "50000")),
+    }
+
+
+def is_sdk_resume_enabled() -> bool:
+    """Check if sessions should resume the Claude Agent SDK's own session instead of replaying a transcript"""
+    return os.getenv("TRANSCRIPT_SDK_RESUME", "false").strip().lower() in ("1", "true", "yes", "on")
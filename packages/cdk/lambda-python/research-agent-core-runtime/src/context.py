@@ -0,0 +1,16 @@
+"""Request-scoped state for the research agent core runtime."""
+
+
+class InvocationContext:
+    """State owned by a single /invocations stream.
+
+    Anything that differs between concurrent invocations lives here instead of on
+    the shared AgentManager or ToolManager, so one process can serve overlapping
+    streams.
+    """
+
+    def __init__(self, session_id: str | None, trace_id: str | None, workspace_dir: str | None, max_iterations: int):
+        self.session_id = session_id
+        self.trace_id = trace_id
+        self.workspace_dir = workspace_dir
+        self.max_iterations = max_iterations
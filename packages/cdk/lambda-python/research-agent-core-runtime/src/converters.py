@@ -3,6 +3,7 @@ Claude Agent SDK と Strands Agent 形式の変換ロジック
 """
 import json
 import logging
+import time
 from typing import Any, Iterator, Dict
 
 logger = logging.getLogger(__name__)
@@ -11,8 +12,24 @@ logger = logging.getLogger(__name__)
 class ContentBlockConverter:
     """Claude Agent SDK のコンテンツブロックを Strands 形式に変換"""
     
-    def __init__(self):
+    def __init__(self, started_at: float | None = None):
         self.current_block_index = 0
+        # メタデータ用の計測値 (開始時刻・最初のトークンの時刻・ツール呼び出し数・最後の ResultMessage)
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.first_token_at: float | None = None
+        self.tool_calls = 0
+        self.result: Any = None
+        # ストリーミング中のメッセージの先頭ブロックの index (API の index はメッセージごとに 0 から始まる)
+        self._stream_base_index = 0
+        # ストリーミング中のブロック (API の index → 状態)
+        self._stream_blocks: dict[int, dict[str, Any]] = {}
+        # ストリーミング済みのブロック (メッセージ ID, API の index)。完成した AssistantMessage で二重に送信しないため
+        self._streamed_blocks: set[tuple[str | None, int]] = set()
+        # ストリーミング中のメッセージ ID と、そのメッセージについて完成した AssistantMessage で受け取ったブロック数
+        self._stream_message_id: str | None = None
+        self._delivered_blocks = 0
+        # 完成したメッセージから送信した text が contentBlockStop で閉じられていないか
+        self._text_open = False
     
     def convert_message_to_events(self, message: Any) -> Iterator[Dict[str, Any]]:
         """
@@ -24,18 +41,68 @@ class ContentBlockConverter:
         Yields:
             Dict[str, Any]: Strands 形式のイベント
         """
+        for event in self._convert_message(message):
+            if self.first_token_at is None and "contentBlockDelta" in event:
+                self.first_token_at = time.monotonic()
+            if "toolUse" in event.get("contentBlockStart", {}).get("start", {}):
+                self.tool_calls += 1
+            yield event
+
+    def build_metadata(self) -> dict[str, Any]:
+        """ResultMessage の使用量と計測値から Strands 形式の metadata イベントを作成"""
+        usage = getattr(self.result, "usage", None) or {}
+        input_tokens = usage.get("input_tokens") or 0
+        output_tokens = usage.get("output_tokens") or 0
+        cache_read_tokens = usage.get("cache_read_input_tokens") or 0
+        cache_write_tokens = usage.get("cache_creation_input_tokens") or 0
+
+        metrics = {
+            "latencyMs": int((time.monotonic() - self.started_at) * 1000),
+            "turns": getattr(self.result, "num_turns", None) or 0,
+            "toolCalls": self.tool_calls,
+        }
+        if self.first_token_at is not None:
+            metrics["timeToFirstTokenMs"] = int((self.first_token_at - self.started_at) * 1000)
+
+        return {
+            "metadata": {
+                "usage": {
+                    "inputTokens": input_tokens,
+                    "outputTokens": output_tokens,
+                    # Bedrock と同様にキャッシュの読み書きも合計に含める
+                    "totalTokens": input_tokens + output_tokens + cache_read_tokens + cache_write_tokens,
+                    "cacheReadInputTokens": cache_read_tokens,
+                    "cacheWriteInputTokens": cache_write_tokens,
+                },
+                "metrics": metrics,
+            }
+        }
+
+    def _convert_message(self, message: Any) -> Iterator[Dict[str, Any]]:
+        """Message を変換 (計測は convert_message_to_events で行う)"""
         message_type = type(message).__name__
-        
+
+        if message_type == "ResultMessage":
+            self.result = message
+
         # 内部メッセージ型（クライアントに送信しない）
         internal_message_types = {"SystemMessage", "ResultMessage"}
         
         if message_type in internal_message_types:
             logger.debug(f"Skipping internal message type: {message_type}")
             return
+
+        # 部分メッセージ (include_partial_messages) の場合はトークン単位で変換
+        if message_type == "StreamEvent":
+            yield from self._convert_stream_event(message.event)
+            return
         
         # AssistantMessage の場合（content 配列を持つ）
         if hasattr(message, "content") and message.content:
             for content_block in message.content:
+                if message_type == "AssistantMessage" and self._is_streamed(content_block):
+                    logger.debug(f"Skipping already streamed content block: {type(content_block).__name__}")
+                    continue
                 yield from self._convert_content_block(content_block)
         
         # 単純な text 属性の場合
@@ -58,7 +125,7 @@ class ContentBlockConverter:
         
         handlers = {
             "TextBlock": lambda b: self._convert_text_block(b.text if hasattr(b, "text") else ""),
-            "ThinkingBlock": lambda b: self._convert_thinking_block(b.text if hasattr(b, "text") else ""),
+            "ThinkingBlock": lambda b: self._convert_thinking_block(getattr(b, "thinking", None) or getattr(b, "text", "")),
             "ToolUseBlock": lambda b: self._convert_tool_use_block(b),
             "ToolResultBlock": lambda b: self._convert_tool_result_block(b),
         }
@@ -71,10 +138,125 @@ class ContentBlockConverter:
             if hasattr(block, "text"):
                 yield from self._convert_text_block(block.text)
     
+    def finish(self) -> Iterator[dict[str, Any]]:
+        """完成したメッセージから送信した text ブロックを閉じる"""
+        if self._text_open:
+            self._text_open = False
+            yield {
+                "contentBlockStop": {
+                    "contentBlockIndex": self.current_block_index
+                }
+            }
+            self.current_block_index += 1
+
+    def _is_streamed(self, block: Any) -> bool:
+        """部分メッセージで送信済みのブロックか (送信済みなら記録から取り除く)
+
+        完成した AssistantMessage はストリーミング中のメッセージのブロックを API の index 順に届けるため、
+        受け取った順番をそのメッセージ内の index として (メッセージ ID, index) で照合する
+        """
+        key = (self._stream_message_id, self._delivered_blocks)
+        self._delivered_blocks += 1
+        if key in self._streamed_blocks:
+            self._streamed_blocks.discard(key)
+            return True
+        return False
+
+    def _convert_stream_event(self, event: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        """Anthropic API のストリームイベント → contentBlockStart / contentBlockDelta / contentBlockStop"""
+        event_type = event.get("type")
+
+        if event_type == "message_start":
+            # 完成したメッセージから送信した text が開いたままだと、このメッセージの先頭ブロックと index が重なる
+            yield from self.finish()
+            self._stream_base_index = self.current_block_index
+            self._stream_blocks.clear()
+            self._stream_message_id = (event.get("message") or {}).get("id")
+            self._delivered_blocks = 0
+
+        elif event_type == "content_block_start":
+            api_index = event.get("index", 0)
+            content_block = event.get("content_block") or {}
+            state = {
+                "index": self._stream_base_index + api_index,
+                "type": content_block.get("type"),
+                "id": content_block.get("id"),
+                "parts": [],
+            }
+            self._stream_blocks[api_index] = state
+
+            # テキストと思考はデルタだけを送る (Bedrock の ConverseStream と同じ)
+            if state["type"] in ("tool_use", "server_tool_use"):
+                yield {
+                    "contentBlockStart": {
+                        "contentBlockIndex": state["index"],
+                        "start": {
+                            "toolUse": {
+                                "name": content_block.get("name", "unknown_tool"),
+                                "toolUseId": state["id"] or f"tool_use_{state['index']}",
+                            }
+                        }
+                    }
+                }
+
+        elif event_type == "content_block_delta":
+            state = self._stream_blocks.get(event.get("index", 0))
+            delta = event.get("delta") or {}
+            delta_type = delta.get("type")
+            if state is None:
+                logger.warning(f"Delta for unknown content block: {event.get('index')}")
+                return
+
+            if delta_type == "text_delta" and delta.get("text"):
+                state["parts"].append(delta["text"])
+                converted = {"text": delta["text"]}
+            elif delta_type == "thinking_delta" and delta.get("thinking"):
+                state["parts"].append(delta["thinking"])
+                converted = {"reasoningContent": {"text": delta["thinking"]}}
+            elif delta_type == "signature_delta" and delta.get("signature"):
+                converted = {"reasoningContent": {"signature": delta["signature"]}}
+            elif delta_type == "input_json_delta" and delta.get("partial_json"):
+                converted = {"toolUse": {"input": delta["partial_json"]}}
+            else:
+                return
+
+            yield {
+                "contentBlockDelta": {
+                    "contentBlockIndex": state["index"],
+                    "delta": converted
+                }
+            }
+
+        elif event_type == "content_block_stop":
+            api_index = event.get("index", 0)
+            state = self._stream_blocks.pop(api_index, None)
+            if state is None:
+                return
+
+            self._streamed_blocks.add((self._stream_message_id, api_index))
+            text = "".join(state["parts"])
+            if state["type"] == "text":
+                # 完成したメッセージと同様に、フロントエンドで連結されるテキストを改行で区切る
+                if text and not text.endswith('\n'):
+                    yield {
+                        "contentBlockDelta": {
+                            "contentBlockIndex": state["index"],
+                            "delta": {"text": "\n"}
+                        }
+                    }
+
+            yield {
+                "contentBlockStop": {
+                    "contentBlockIndex": state["index"]
+                }
+            }
+            self.current_block_index = max(self.current_block_index, state["index"] + 1)
+
     def _convert_text_block(self, text: str) -> Iterator[Dict[str, Any]]:
         """TextBlock → contentBlockDelta (text)"""
         if not text.endswith('\n'):
             text = text + '\n'
+        self._text_open = True
         
         # Send as normal text (chat) - frontend will split by <final_report> tags
         yield {
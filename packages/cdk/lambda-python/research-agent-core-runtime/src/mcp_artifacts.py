@@ -0,0 +1,199 @@
+"""Pinned MCP server artifact store for the research agent core runtime.
+
+uvx and npx resolve and download a server's package every time a cold container
+starts it. The store holds the packages of every server in the mcp.json files,
+installed at image build time at the version resolved then, so servers launch
+from local executables with no network resolution. Servers whose package is not
+in the store fall back to the on-demand install.
+
+Only config.py is imported, so the Dockerfile can provision the store before the
+rest of the source is copied:
+
+    python -m src.mcp_artifacts /opt/mcp-artifacts mcp-configs/mcp.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Any
+
+from src.config import get_mcp_artifact_settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+INSTALL_TIMEOUT = 600
+
+
+class ArtifactPackage:
+    """The package a uvx or npx server launch installs, and the arguments passed to it."""
+
+    def __init__(self, installer: str, spec: str, executable: str | None, args: list[str]):
+        self.installer = installer
+        self.spec = spec
+        self.executable = executable
+        self.args = args
+
+    @property
+    def key(self) -> str:
+        return f"{self.installer}:{self.spec}"
+
+
+def parse_server_package(server_config: dict) -> ArtifactPackage | None:
+    """Get the package a stdio server's uvx or npx command installs, if it is one"""
+    command = os.path.basename(server_config.get("command", ""))
+    args = list(server_config.get("args", []))
+
+    if command == "uvx":
+        if args[:1] == ["--from"] and len(args) >= 3:
+            return ArtifactPackage("uvx", args[1], args[2], args[3:])
+        if not args or args[0].startswith("-"):
+            return None
+        # uvx runs the executable named after the package
+        return ArtifactPackage("uvx", args[0], re.split(r"[@=<>!~\[]", args[0], maxsplit=1)[0], args[1:])
+
+    if command == "npx":
+        while args and args[0] in ("-y", "--yes"):
+            args.pop(0)
+        if not args or args[0].startswith("-"):
+            return None
+        # The executable comes from the installed package's bin field
+        return ArtifactPackage("npx", args[0], None, args[1:])
+
+    return None
+
+
+class MCPArtifactStore:
+    """Rewrites server launches to the store's pinned executables.
+
+    The manifest maps each package (installer and spec as written in mcp.json) to
+    its executable, the pinned version and how long the install took at build time,
+    which is the cold-start time a launch from the store saves.
+    """
+
+    def __init__(self, root: str, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+        self.packages: dict[str, dict[str, Any]] = {}
+        manifest_path = os.path.join(root, MANIFEST_FILE)
+        if enabled and os.path.exists(manifest_path):
+            try:
+                with open(manifest_path) as f:
+                    self.packages = json.load(f).get("packages", {})
+                logger.info(f"Loaded {len(self.packages)} pinned MCP server packages from {root}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable MCP artifact manifest {manifest_path}: {e}")
+
+    def resolve(self, server_config: dict) -> tuple[dict, dict[str, Any] | None]:
+        """Get the configuration to launch a server with and its pinned artifact, if any"""
+        if not self.packages or "command" not in server_config:
+            return server_config, None
+        package = parse_server_package(server_config)
+        artifact = self.packages.get(package.key) if package else None
+        if artifact is None:
+            return server_config, None
+        if not os.access(artifact["executable"], os.X_OK):
+            logger.warning(f"Pinned executable {artifact['executable']} for {package.spec} is missing, installing on demand")
+            return server_config, None
+        return {**server_config, "command": artifact["executable"], "args": package.args}, artifact
+
+
+_artifact_store: MCPArtifactStore | None = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_mcp_artifact_store() -> MCPArtifactStore:
+    """Get the process-wide MCP artifact store"""
+    global _artifact_store
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = MCPArtifactStore(**get_mcp_artifact_settings())
+        return _artifact_store
+
+
+# Provisioning (image build time)
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _install_uv_tool(root: str, package: ArtifactPackage) -> dict[str, Any]:
+    env = {**os.environ, "UV_TOOL_DIR": os.path.join(root, "uv", "tools"), "UV_TOOL_BIN_DIR": os.path.join(root, "bin")}
+    subprocess.run(["uv", "tool", "install", "--compile-bytecode", package.spec], env=env, check=True, timeout=INSTALL_TIMEOUT)
+
+    name = _normalize_name(re.split(r"[@=<>!~\[]", package.spec, maxsplit=1)[0])
+    listing = subprocess.run(["uv", "tool", "list"], env=env, check=True, capture_output=True, text=True).stdout
+    version = next((line.split()[1].lstrip("v") for line in listing.splitlines() if line and not line.startswith("-") and _normalize_name(line.split()[0]) == name), "unknown")
+    return {"executable": os.path.join(root, "bin", package.executable), "version": version}
+
+
+def _install_npm_package(root: str, package: ArtifactPackage) -> dict[str, Any]:
+    prefix = os.path.join(root, "npm", re.sub(r"[^A-Za-z0-9._-]", "_", package.spec))
+    subprocess.run(["npm", "install", "--prefix", prefix, "--no-audit", "--no-fund", package.spec], check=True, timeout=INSTALL_TIMEOUT)
+
+    # Strip the version from "name@version" and "@scope/name@version"
+    name = "@" + package.spec[1:].split("@")[0] if package.spec.startswith("@") else package.spec.split("@")[0]
+    with open(os.path.join(prefix, "node_modules", name, "package.json")) as f:
+        package_json = json.load(f)
+    # Like npx: a package's only bin, otherwise the one named after the package
+    bins = package_json.get("bin", {})
+    executable = next(iter(bins)) if isinstance(bins, dict) and len(bins) == 1 else name.split("/")[-1]
+    return {"executable": os.path.join(prefix, "node_modules", ".bin", executable), "version": package_json.get("version", "unknown")}
+
+
+def provision(root: str, config_paths: list[str]) -> dict[str, dict[str, Any]]:
+    """Install the packages of every uvx and npx server in the mcp.json files and write the manifest"""
+    packages: dict[str, ArtifactPackage] = {}
+    servers: dict[str, list[str]] = {}
+    for config_path in config_paths:
+        with open(config_path) as f:
+            for server_name, server_config in json.load(f).get("mcpServers", {}).items():
+                package = parse_server_package(server_config)
+                if package is None:
+                    logger.info(f"Skipping {server_name}: not a uvx or npx server")
+                    continue
+                packages.setdefault(package.key, package)
+                servers.setdefault(package.key, []).append(server_name)
+
+    installed = {}
+    for key, package in packages.items():
+        started_at = time.monotonic()
+        try:
+            artifact = _install_uv_tool(root, package) if package.installer == "uvx" else _install_npm_package(root, package)
+        except (OSError, ValueError, subprocess.SubprocessError) as e:
+            logger.warning(f"Could not pin {package.spec}, {', '.join(servers[key])} will install on demand: {e}")
+            continue
+        # How long this build's install took, an estimate of what an on-demand install costs a cold start
+        artifact["install_seconds"] = round(time.monotonic() - started_at, 2)
+        artifact["servers"] = servers[key]
+        installed[key] = artifact
+
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w") as f:
+        json.dump({"packages": installed}, f, indent=2)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    return installed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Install the MCP server packages in mcp.json files into a pinned artifact store")
+    parser.add_argument("root", help="Directory of the artifact store")
+    parser.add_argument("configs", nargs="+", help="mcp.json files to provision")
+    args = parser.parse_args()
+
+    installed = provision(args.root, args.configs)
+    print(f"{'package':<50} {'version':<12} {'est. install saved':>20}  servers")
+    for key, artifact in installed.items():
+        print(f"{key:<50} {artifact['version']:<12} {artifact['install_seconds']:>19.1f}s  {', '.join(artifact['servers'])}")
+    print(f"Pinned {len(installed)} packages into {args.root}")
+
+
+if __name__ == "__main__":
+    main()
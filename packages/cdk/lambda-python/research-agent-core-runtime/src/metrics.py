@@ -0,0 +1,60 @@
+"""Prometheus metrics for the research agent core runtime."""
+
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from typing import Any
+
+from src.prometheus import Counter, Gauge, Histogram, MetricsRegistry
+
+_registry = MetricsRegistry()
+
+PHASE_SECONDS = _registry.register(Histogram("agentcore_phase_seconds", "Duration of invocation phases in seconds", ("phase",)))
+MCP_TOOL_LOAD_SECONDS = _registry.register(Histogram("agentcore_mcp_tool_load_seconds", "Time to lease a started MCP server and its tools in seconds", ("server",)))
+MCP_SERVER_CONFIG_RESOLUTIONS = _registry.register(Counter("agentcore_mcp_server_config_resolutions_total", "MCP server configs resolved for an invocation by whether they launch from the pinned artifact store", ("server", "source")))
+MCP_ARTIFACT_ESTIMATED_SAVED_SECONDS = _registry.register(Counter("agentcore_mcp_artifact_estimated_saved_seconds_total", "Estimated package install time avoided by invocations whose MCP server configs launch from pinned artifacts in seconds, from each package's build-time install duration", ("server",)))
+TIME_TO_FIRST_EVENT_SECONDS = _registry.register(Histogram("agentcore_time_to_first_event_seconds", "Time from receiving an invocation to its first content delta in seconds"))
+STREAM_SECONDS = _registry.register(Histogram("agentcore_stream_seconds", "Total duration of invocation streams in seconds"))
+AGENT_ITERATIONS = _registry.register(Histogram("agentcore_agent_iterations", "Agent loop iterations per invocation", buckets=(1, 2, 3, 5, 8, 13, 20, 30, 50, 100, 200)))
+TOOL_CALLS = _registry.register(Counter("agentcore_tool_calls_total", "Tool calls requested by the model", ("tool",)))
+ERRORS = _registry.register(Counter("agentcore_errors_total", "Errors by exception type", ("type",)))
+INVOCATIONS_IN_FLIGHT = _registry.register(Gauge("agentcore_invocations_in_flight", "Invocations being parsed or streamed"))
+
+
+def register_gauge(name: str, documentation: str, labelnames: tuple[str, ...], callback: Callable[[], dict[tuple[str, ...], float]]) -> Gauge:
+    """Expose a gauge whose values are read from a callback on every scrape"""
+    return _registry.register(Gauge(name, documentation, labelnames, callback))
+
+
+def render_metrics() -> str:
+    """Render the process's metrics for the /metrics endpoint"""
+    return _registry.render()
+
+
+def record_error(error: BaseException | str):
+    """Count an error by its exception type (or a given name)"""
+    ERRORS.inc(type=error if isinstance(error, str) else type(error).__name__)
+
+
+async def instrument_events(events: AsyncIterator[dict[str, Any]], started_at: float) -> AsyncGenerator[dict[str, Any]]:
+    """Record time to first event, tool calls and total duration of an agent's event stream.
+
+    Args:
+        events: The agent's events
+        started_at: time.monotonic() when the invocation was received
+    """
+    first_event = False
+    try:
+        async for event in events:
+            inner = event.get("event", {})
+            if not first_event and "contentBlockDelta" in inner:
+                first_event = True
+                TIME_TO_FIRST_EVENT_SECONDS.observe(time.monotonic() - started_at)
+            tool_use = inner.get("contentBlockStart", {}).get("start", {}).get("toolUse")
+            if tool_use:
+                TOOL_CALLS.inc(tool=tool_use.get("name", "unknown"))
+            yield event
+    finally:
+        STREAM_SECONDS.observe(time.monotonic() - started_at)
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
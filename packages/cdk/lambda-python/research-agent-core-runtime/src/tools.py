@@ -5,21 +5,15 @@ import os
 from typing import Any, Dict
 import json
 
+from src.mcp_artifacts import get_mcp_artifact_store
+from src.metrics import MCP_ARTIFACT_ESTIMATED_SAVED_SECONDS, MCP_SERVER_CONFIG_RESOLUTIONS
+
 logger = logging.getLogger(__name__)
 
 
 class ToolManager:
     """Manages MCP server configurations."""
 
-    def __init__(self):
-        self.session_id = None
-        self.trace_id = None
-
-    def set_session_info(self, session_id: str, trace_id: str):
-        """Set session and trace IDs for tool operations"""
-        self.session_id = session_id
-        self.trace_id = trace_id
-
     def get_mcp_config(self, mcp_servers: list[str] | None = None) -> Dict[str, Dict[str, Any]]:
         """
         Get MCP server configurations.
@@ -50,14 +44,31 @@ class ToolManager:
         
         # Filter by requested servers if specified
         if mcp_servers is not None:
-            filtered_servers = {
+            available_servers = {
                 name: config
                 for name, config in available_servers.items()
                 if name in mcp_servers
             }
-            return filtered_servers
         
-        return available_servers
+        return self._use_pinned_artifacts(available_servers)
+
+    def _use_pinned_artifacts(self, servers: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """Launch uvx and npx servers from the pinned artifact store instead of installing them
+
+        The Claude Agent SDK spawns the servers itself, so this counts config
+        resolutions (one per server per invocation), not observed server starts.
+        """
+        store = get_mcp_artifact_store()
+        resolved = {}
+        for name, config in servers.items():
+            resolved[name], artifact = store.resolve(config)
+            if "command" not in config:
+                continue
+            MCP_SERVER_CONFIG_RESOLUTIONS.inc(server=name, source="pinned" if artifact else "unpinned")
+            if artifact:
+                MCP_ARTIFACT_ESTIMATED_SAVED_SECONDS.inc(artifact["install_seconds"], server=name)
+                logger.info(f"MCP server {name} will launch from pinned {artifact['version']}, skipping an install of ~{artifact['install_seconds']:.1f}s")
+        return resolved
 
     def _inject_api_keys(self, servers: Dict[str, Dict[str, Any]]):
         """Inject API keys from environment variables into MCP server configs"""
@@ -0,0 +1,125 @@
+"""Per-session conversation transcripts for the research agent core runtime."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any
+
+from src.config import get_transcript_settings
+from src.utils import format_message
+
+logger = logging.getLogger(__name__)
+
+# Rough character-per-token ratio used to turn the token budget into a character budget
+CHARS_PER_TOKEN = 4
+
+
+def _digest(entry: str) -> str:
+    return hashlib.sha256(entry.encode()).hexdigest()
+
+
+def build_transcript(entries_newest_first: Iterable[str], total: int, max_chars: int) -> str:
+    """Join the newest of a session's total transcript entries that fit in the character budget, oldest first"""
+    selected = []
+    used = 0
+    consumed = 0
+    for entry in entries_newest_first:
+        if used + len(entry) > max_chars:
+            break
+        consumed += 1
+        if entry:
+            selected.append(entry)
+            used += len(entry) + 2
+
+    selected.reverse()
+    if consumed < total:
+        selected.insert(0, f"[{total - consumed} earlier messages omitted]")
+    return "\n\n".join(selected)
+
+
+class TranscriptStore:
+    """SQLite-backed transcript of each session, appended one turn at a time.
+
+    The client resends the whole history on every turn. Only messages beyond what
+    is already stored are formatted and written; the stored prefix is verified by
+    the digest of its last entry, and a history that no longer matches (an edited or
+    branched conversation) replaces the stored one. The store also remembers the
+    Claude Agent SDK session that last answered, so a continuing conversation can
+    resume it instead of replaying the transcript.
+    """
+
+    def __init__(self, db_path: str, max_tokens: int):
+        self.db_path = db_path
+        self.max_chars = max_tokens * CHARS_PER_TOKEN
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS turns (session_id TEXT NOT NULL, seq INTEGER NOT NULL, entry TEXT NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (session_id, seq))")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, sdk_session_id TEXT, turns INTEGER NOT NULL, prompt_digest TEXT NOT NULL, updated_at REAL NOT NULL)")
+
+    def sync(self, session_id: str, messages: list[dict[str, Any]]) -> int:
+        """Append the messages not stored yet and return how many were written"""
+        with self._lock:
+            row = self._conn.execute("SELECT seq, digest FROM turns WHERE session_id = ? ORDER BY seq DESC LIMIT 1", (session_id,)).fetchone()
+            stored = row[0] + 1 if row else 0
+            diverged = stored > len(messages) or (row is not None and _digest(format_message(messages[stored - 1])) != row[1])
+
+            new_rows = []
+            for seq in range(0 if diverged else stored, len(messages)):
+                entry = format_message(messages[seq])
+                new_rows.append((session_id, seq, entry, _digest(entry)))
+
+            self._conn.execute("BEGIN")
+            try:
+                if diverged:
+                    logger.info(f"History of session {session_id} diverged from the stored transcript, rebuilding it")
+                    self._conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+                    self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._conn.executemany("INSERT INTO turns (session_id, seq, entry, digest) VALUES (?, ?, ?, ?)", new_rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return len(new_rows)
+
+    def get_transcript(self, session_id: str) -> str:
+        """Build the session's transcript from its newest turns within the token budget"""
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM turns WHERE session_id = ?", (session_id,)).fetchone()
+            rows = self._conn.execute("SELECT entry FROM turns WHERE session_id = ? ORDER BY seq DESC", (session_id,))
+            return build_transcript((entry for (entry,) in rows), total, self.max_chars)
+
+    def get_sdk_session(self, session_id: str, messages: list[dict[str, Any]]) -> str | None:
+        """Get the SDK session to resume if the history is exactly the one it last answered"""
+        with self._lock:
+            row = self._conn.execute("SELECT sdk_session_id, prompt_digest FROM sessions WHERE session_id = ? AND turns = ?", (session_id, len(messages))).fetchone()
+        if row is None or len(messages) < 2 or _digest(format_message(messages[-2])) != row[1]:
+            return None
+        return row[0]
+
+    def set_sdk_session(self, session_id: str, sdk_session_id: str, turns: int, prompt: str | list[dict[str, Any]]):
+        """Record the SDK session that answered the prompt, and the history length it will have next turn"""
+        prompt_entry = format_message({"role": "user", "content": [prompt] if isinstance(prompt, str) else prompt})
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, sdk_session_id, turns, prompt_digest, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, sdk_session_id, turns, _digest(prompt_entry), time.time()),
+            )
+
+
+_transcript_store: TranscriptStore | None = None
+_transcript_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Get the process-wide transcript store"""
+    global _transcript_store
+    with _transcript_store_lock:
+        if _transcript_store is None:
+            _transcript_store = TranscriptStore(**get_transcript_settings())
+        return _transcript_store
@@ -2,27 +2,17 @@
 
 import json
 import logging
-import os
-import shutil
 from typing import Any, Dict, List
 
-from src.config import WORKSPACE_DIR
+from fastapi import Request
 
 logger = logging.getLogger(__name__)
 
 
-def create_ws_directory():
-    """Create workspace directory"""
-    os.makedirs(WORKSPACE_DIR, exist_ok=True)
+class RequestTooLargeError(Exception):
+    """Exception raised when a request body exceeds the size limit"""
 
-
-def clean_ws_directory():
-    """Clean workspace directory"""
-    if os.path.exists(WORKSPACE_DIR):
-        try:
-            shutil.rmtree(WORKSPACE_DIR)
-        except Exception as e:
-            logger.warning(f"Failed to clean workspace directory: {e}")
+    pass
 
 
 def create_error_response(message: str) -> Dict[str, Any]:
@@ -33,6 +23,33 @@ def create_error_response(message: str) -> Dict[str, Any]:
     }
 
 
+def format_message(message: Dict[str, Any]) -> str:
+    """
+    Format a single message as a "Human:"/"Assistant:" transcript entry.
+
+    Args:
+        message: Message dictionary with role and content
+
+    Returns:
+        Formatted entry, or an empty string if the message has no text
+    """
+    role = message.get("role", "user")
+    content = message.get("content", [])
+
+    # Extract text from content blocks
+    text_parts = []
+    for content_block in content:
+        if isinstance(content_block, dict) and "text" in content_block:
+            text_parts.append(content_block["text"])
+        elif isinstance(content_block, str):
+            text_parts.append(content_block)
+
+    if not text_parts:
+        return ""
+    role_label = "Human" if role == "user" else "Assistant"
+    return f"{role_label}: {' '.join(text_parts)}"
+
+
 def process_messages(messages: List[Dict[str, Any]]) -> str:
     """
     Process messages into a conversation history string.
@@ -45,24 +62,8 @@ def process_messages(messages: List[Dict[str, Any]]) -> str:
     """
     if not messages:
         return ""
-    
-    parts = []
-    for message in messages:
-        role = message.get("role", "user")
-        content = message.get("content", [])
-        
-        # Extract text from content blocks
-        text_parts = []
-        for content_block in content:
-            if isinstance(content_block, dict) and "text" in content_block:
-                text_parts.append(content_block["text"])
-            elif isinstance(content_block, str):
-                text_parts.append(content_block)
-        
-        if text_parts:
-            role_label = "Human" if role == "user" else "Assistant"
-            parts.append(f"{role_label}: {' '.join(text_parts)}")
-    
+
+    parts = [entry for entry in map(format_message, messages) if entry]
     return "\n\n".join(parts)
 
 
@@ -89,3 +90,40 @@ def process_prompt(prompt: str | List[Dict[str, Any]]) -> str:
         return "\n".join(text_parts)
     
     return str(prompt)
+
+
+async def read_request_body(request: Request, max_bytes: int) -> bytearray:
+    """Read the request body chunk by chunk into a single buffer, enforcing the size limit"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise RequestTooLargeError(f"Request body of {content_length} bytes exceeds the {max_bytes} byte limit")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise RequestTooLargeError(f"Request body exceeds the {max_bytes} byte limit")
+    return body
+
+
+def parse_request_body(body: bytearray) -> Dict[str, Any]:
+    """
+    Parse an /invocations body, unwrapping the AWS Lambda integration format.
+
+    Large bodies take a while to decode and parse, so callers run this in a worker
+    thread. The raw buffer is cleared as soon as parsing ends so only the parsed
+    request stays alive for the rest of the invocation.
+
+    Args:
+        body: Raw request body, cleared by this call
+
+    Returns:
+        Request data dictionary
+    """
+    request_data = json.loads(body)
+    body.clear()
+
+    # Handle AWS Lambda integration format
+    if "input" in request_data and isinstance(request_data["input"], dict):
+        request_data = request_data["input"]
+    return request_data
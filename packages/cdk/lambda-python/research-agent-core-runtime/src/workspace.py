@@ -0,0 +1,153 @@
+"""Per-invocation workspace directories for the research agent core runtime."""
+
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from uuid import uuid4
+
+from src.config import get_workspace_settings
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 30.0
+
+
+def get_session_workspace_name(session_id: str) -> str:
+    """Get a stable, filesystem-safe workspace name for a session"""
+    return f"session-{hashlib.sha256(session_id.encode()).hexdigest()[:32]}"
+
+
+def _get_directory_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class WorkspaceManager:
+    """Creates a workspace directory per invocation and removes released ones in the background.
+
+    Unnamed workspaces are never shared. A named workspace is shared by the
+    invocations of its session, so each path is reference-counted and becomes
+    reapable only when the last invocation using it releases it. Deletion happens
+    on a reaper thread instead of the request path. The reaper also removes workspaces abandoned
+    by earlier processes and, when the root grows past the disk quota, deletes
+    inactive workspaces oldest first.
+    """
+
+    def __init__(self, root: str, quota_bytes: int, orphan_ttl: float):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.orphan_ttl = orphan_ttl
+        # Invocations using each workspace
+        self._active: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._released: queue.Queue[str] = queue.Queue()
+        self._reaper: threading.Thread | None = None
+        self._last_sweep = 0.0
+
+    def create(self, name: str | None = None) -> str:
+        """Create a workspace directory and return its path
+
+        A name gives the same path to every invocation that passes it (used to keep
+        the Claude Agent SDK's cwd stable across resumed sessions). Otherwise the
+        directory is unique to this invocation.
+        """
+        path = os.path.join(self.root, name or str(uuid4()))
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            self._active[path] = self._active.get(path, 0) + 1
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(target=self._run, name="workspace-reaper", daemon=True)
+                self._reaper.start()
+        return path
+
+    def release(self, path: str):
+        """Release an invocation's use of a workspace, handing it to the reaper once no invocation uses it"""
+        with self._lock:
+            count = self._active.get(path)
+            if count is None:
+                return
+            if count > 1:
+                self._active[path] = count - 1
+                return
+            del self._active[path]
+        self._released.put(path)
+
+    def _run(self):
+        while True:
+            try:
+                self._remove(self._released.get(timeout=SWEEP_INTERVAL))
+            except queue.Empty:
+                pass
+            if time.monotonic() - self._last_sweep >= SWEEP_INTERVAL:
+                self._sweep()
+
+    def _remove(self, path: str):
+        with self._lock:
+            # A named workspace may have been created again since it was released
+            if path in self._active:
+                return
+        try:
+            shutil.rmtree(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to clean workspace directory {path}: {e}")
+
+    def _sweep(self):
+        self._last_sweep = time.monotonic()
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+
+        with self._lock:
+            active = set(self._active)
+
+        now = time.time()
+        usage = 0
+        inactive = []
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if path not in active and now - mtime > self.orphan_ttl:
+                self._remove(path)
+                continue
+            size = _get_directory_size(path) if os.path.isdir(path) else 0
+            usage += size
+            if path not in active:
+                inactive.append((mtime, size, path))
+
+        for _, size, path in sorted(inactive):
+            if usage <= self.quota_bytes:
+                break
+            self._remove(path)
+            usage -= size
+
+        if usage > self.quota_bytes:
+            logger.warning(f"Workspaces use {usage} bytes, above the {self.quota_bytes} byte quota, with {len(active)} active")
+
+
+_workspace_manager: WorkspaceManager | None = None
+_workspace_manager_lock = threading.Lock()
+
+
+def get_workspace_manager() -> WorkspaceManager:
+    """Get the process-wide workspace manager"""
+    global _workspace_manager
+    with _workspace_manager_lock:
+        if _workspace_manager is None:
+            _workspace_manager = WorkspaceManager(**get_workspace_settings())
+        return _workspace_manager
@@ -0,0 +1,53 @@
+"""Tests for converting Claude Agent SDK messages into Strands stream events."""
+
+from claude_agent_sdk.types import AssistantMessage, StreamEvent, TextBlock
+
+from src.converters import ContentBlockConverter
+
+MODEL = "claude-sonnet-4-5"
+
+
+def stream_event(event: dict) -> StreamEvent:
+    return StreamEvent(uuid="uuid", session_id="session", event=event)
+
+
+def streamed_text_message(message_id: str, text: str) -> list:
+    return [
+        stream_event({"type": "message_start", "message": {"id": message_id}}),
+        stream_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}),
+        stream_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}),
+        stream_event({"type": "content_block_stop", "index": 0}),
+        AssistantMessage(content=[TextBlock(text=text)], model=MODEL),
+    ]
+
+
+def convert(messages: list) -> list[dict]:
+    converter = ContentBlockConverter()
+    events = [event for message in messages for event in converter.convert_message_to_events(message)]
+    return events + list(converter.finish())
+
+
+def delta(index: int, text: str) -> dict:
+    return {"contentBlockDelta": {"contentBlockIndex": index, "delta": {"text": text}}}
+
+
+def stop(index: int) -> dict:
+    return {"contentBlockStop": {"contentBlockIndex": index}}
+
+
+def test_streamed_block_after_a_non_streamed_block_keeps_its_first_delta():
+    messages = [AssistantMessage(content=[TextBlock(text="Planning the research.")], model=MODEL), *streamed_text_message("msg_1", "Hello")]
+
+    assert convert(messages) == [
+        delta(0, "Planning the research.\n"),
+        stop(0),
+        delta(1, "Hello"),
+        delta(1, "\n"),
+        stop(1),
+    ]
+
+
+def test_identical_text_in_another_message_is_not_mistaken_for_a_streamed_block():
+    messages = [*streamed_text_message("msg_1", "Done"), *streamed_text_message("msg_2", "Done")]
+
+    assert convert(messages) == [delta(0, "Done"), delta(0, "\n"), stop(0), delta(1, "Done"), delta(1, "\n"), stop(1)]
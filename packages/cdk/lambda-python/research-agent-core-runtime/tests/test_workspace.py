@@ -0,0 +1,47 @@
+"""Tests for per-invocation workspaces."""
+
+import os
+import time
+
+from src.workspace import WorkspaceManager, get_session_workspace_name
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_session_workspace_survives_until_last_overlapping_invocation_releases_it(tmp_path):
+    manager = WorkspaceManager(root=str(tmp_path), quota_bytes=0, orphan_ttl=0)
+    name = get_session_workspace_name("session-1")
+
+    first = manager.create(name)
+    second = manager.create(name)
+    assert first == second
+    with open(os.path.join(second, "notes.md"), "w") as f:
+        f.write("still in use")
+
+    manager.release(first)
+    # Neither the reaper nor a sweep (with no quota or orphan grace left) may remove it while in use
+    manager._sweep()
+    time.sleep(0.1)
+    assert os.path.exists(os.path.join(second, "notes.md"))
+
+    manager.release(second)
+    assert wait_until(lambda: not os.path.exists(second))
+
+
+def test_unnamed_workspaces_are_removed_on_release(tmp_path):
+    manager = WorkspaceManager(root=str(tmp_path), quota_bytes=2**30, orphan_ttl=3600)
+    first = manager.create()
+    second = manager.create()
+    assert first != second
+
+    manager.release(first)
+    assert wait_until(lambda: not os.path.exists(first))
+    assert os.path.exists(second)
+    manager.release(second)
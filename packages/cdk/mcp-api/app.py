@@ -1,3 +1,4 @@
+import asyncio
 import boto3
 import json
 import uvicorn
@@ -5,15 +6,20 @@ import os
 import logging
 import shutil
 import pathlib
+import threading
+import time
 from strands.models import BedrockModel
 from strands import Agent, tool
 from strands.tools.mcp import MCPClient
 from mcp import stdio_client, StdioServerParameters
 from fastapi import FastAPI, Response, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List
 from uuid import uuid4
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 UV_ENV = {
     "UV_NO_CACHE": "1",
@@ -30,6 +36,14 @@ UV_ENV = {
 
 WORKSPACE_DIR = "/tmp/ws"
 
+# strands' MCPClient.start() gives up on a server that has not initialized within 30 seconds
+MCP_STARTUP_TIMEOUT_MAX = 30
+# Seconds each MCP server has to start and list its tools before the service continues without it (at most MCP_STARTUP_TIMEOUT_MAX)
+MCP_STARTUP_TIMEOUT = float(os.environ.get("MCP_STARTUP_TIMEOUT", "30"))
+# Seconds before the first background retry of servers that failed; doubles up to the max
+MCP_RETRY_INTERVAL = float(os.environ.get("MCP_RETRY_INTERVAL", "30"))
+MCP_RETRY_MAX_INTERVAL = 600
+
 FIXED_SYSTEM_PROMPT = f"""## About File Output
 - You are running on AWS Lambda. Therefore, when writing files, always write them under `{WORKSPACE_DIR}`.
 - Similarly, if you need a workspace, please use the `{WORKSPACE_DIR}` directory. Do not ask the user about their current workspace. It's always `{WORKSPACE_DIR}`.
@@ -124,10 +138,19 @@ def upload_file_to_s3_and_retrieve_s3_url(filepath: str) -> str:
     return f"https://{bucket}.s3.{region}.amazonaws.com/{key}"
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the MCP servers while the container waits for its first request
+    start_loading_mcp_tools()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Shared MCP clients
 app.mcp_tools = None
+app.mcp_tools_task = None
+app.mcp_failed_servers = []
 
 
 @app.get("/")
@@ -135,6 +158,18 @@ async def healthcheck():
     return Response(status_code=status.HTTP_200_OK)
 
 
+@app.get("/ready")
+async def ready():
+    if app.mcp_tools is not None:
+        return {
+            "ready": True,
+            "mcp_tools": len(app.mcp_tools),
+            "unavailable_mcp_servers": app.mcp_failed_servers,
+        }
+    state = "failed" if app.mcp_tools_task.done() else "loading"
+    return JSONResponse({"ready": False, "mcp_tools": state}, status_code=503)
+
+
 class UnrecordedMessage(BaseModel):
     role: str
     content: str
@@ -174,9 +209,14 @@ def safe_parse_mcp_json():
             server = mcp_servers[server_name]
             res.append(
                 {
+                    "name": server_name,
                     "command": server["command"],
                     "args": server["args"] if "args" in server else [],
                     "env": server["env"] if "env" in server else {},
+                    "startupTimeout": min(
+                        float(server.get("startupTimeout", MCP_STARTUP_TIMEOUT)),
+                        MCP_STARTUP_TIMEOUT_MAX,
+                    ),
                 }
             )
 
@@ -184,38 +224,170 @@ def safe_parse_mcp_json():
 
 
 def make_mcp_client(server):
-    def spawn():
-        return stdio_client(
-            StdioServerParameters(
-                command=server["command"],
-                args=server["args"],
-                env={
-                    **UV_ENV,
-                    **server["env"],
-                },
+    # The task and loop strands runs the server's transport on, so a server that never finishes
+    # initializing (and so has no session for client.stop() to close) can still be shut down
+    transport = {"cancelled": False}
+    transport_lock = threading.Lock()
+
+    @asynccontextmanager
+    async def spawn():
+        with transport_lock:
+            if transport["cancelled"]:
+                raise RuntimeError(
+                    f"MCP server {server['name']} was abandoned before it started"
+                )
+            transport["loop"] = asyncio.get_running_loop()
+            transport["task"] = asyncio.current_task()
+
+        try:
+            async with stdio_client(
+                StdioServerParameters(
+                    command=server["command"],
+                    args=server["args"],
+                    env={
+                        **UV_ENV,
+                        **server["env"],
+                    },
+                )
+            ) as streams:
+                yield streams
+        except asyncio.CancelledError:
+            # Cancelled by cancel_transport; leaving stdio_client has already terminated the process
+            logging.info(f"Cancelled MCP server {server['name']}")
+
+    def cancel_transport():
+        with transport_lock:
+            transport["cancelled"] = True
+            if "task" not in transport:
+                return
+            try:
+                transport["loop"].call_soon_threadsafe(transport["task"].cancel)
+            except RuntimeError:
+                # The loop has already finished, so the transport is already closed
+                pass
+
+    return MCPClient(spawn), cancel_transport
+
+
+def start_mcp_server(server, client, cancel_transport):
+    try:
+        client.start()
+    except Exception:
+        cancel_transport()
+        raise
+
+    try:
+        tools = client.list_tools_sync()
+    except Exception:
+        stop_mcp_client(server, client)
+        raise
+
+    logging.info(f"Started MCP server {server['name']} with {len(tools)} tools")
+    return tools
+
+
+def stop_mcp_client(server, client):
+    try:
+        client.stop(None, None, None)
+    except Exception as e:
+        logging.warning(f"Failed to stop MCP server {server['name']}: {e}")
+
+
+def abandon_mcp_server(server, cancel_transport):
+    # Cancelling the transport works whether or not the session has initialized, so a server
+    # that is still starting is shut down rather than left waiting for a stop that never comes
+    logging.info(f"Abandoning MCP server {server['name']}")
+    cancel_transport()
+
+
+def start_mcp_servers(mcp_servers):
+    started_at = time.monotonic()
+
+    # One worker per server, so no server spends its deadline waiting for a thread
+    executor = ThreadPoolExecutor(
+        max_workers=max(len(mcp_servers), 1), thread_name_prefix="mcp-start"
+    )
+    attempts = []
+    for server in mcp_servers:
+        client, cancel_transport = make_mcp_client(server)
+        attempts.append(
+            (
+                server,
+                cancel_transport,
+                executor.submit(start_mcp_server, server, client, cancel_transport),
             )
         )
+    executor.shutdown(wait=False)
 
-    return MCPClient(spawn)
+    mcp_tools = []
+    failed = []
 
+    for server, cancel_transport, future in attempts:
+        remaining = started_at + server["startupTimeout"] - time.monotonic()
 
-def load_mcp_tools():
-    mcp_servers = safe_parse_mcp_json()
-    mcp_clients = [make_mcp_client(s) for s in mcp_servers]
+        try:
+            mcp_tools += future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            logging.error(
+                f"MCP server {server['name']} did not start within {server['startupTimeout']}s, stopping it and continuing without it"
+            )
+            abandon_mcp_server(server, cancel_transport)
+            failed.append(server)
+        except Exception as e:
+            logging.error(
+                f"Failed to start MCP server {server['name']}, continuing without it: {e}"
+            )
+            failed.append(server)
 
-    for c in mcp_clients:
-        c.start()
+    return mcp_tools, failed
 
-    # Flatten the tools
-    mcp_tools = sum([c.list_tools_sync() for c in mcp_clients], [])
 
+def load_mcp_tools():
+    # Start every server at once, each bounded by its own deadline
+    mcp_tools, failed = start_mcp_servers(safe_parse_mcp_json())
+
+    # Serve with whichever servers came up and keep trying the rest
     app.mcp_tools = mcp_tools
+    app.mcp_failed_servers = sorted(s["name"] for s in failed)
+
+    if failed:
+        threading.Thread(target=retry_mcp_servers, args=(failed,), daemon=True).start()
+
+
+def retry_mcp_servers(failed):
+    interval = MCP_RETRY_INTERVAL
+
+    while failed:
+        time.sleep(interval)
+        interval = min(interval * 2, MCP_RETRY_MAX_INTERVAL)
+
+        logging.warning(f"Retrying MCP servers {', '.join(s['name'] for s in failed)}")
+        tools, failed = start_mcp_servers(failed)
+
+        if tools:
+            # Later requests build their agents with the added tools
+            app.mcp_tools = app.mcp_tools + tools
+        app.mcp_failed_servers = sorted(s["name"] for s in failed)
+
+
+def log_mcp_tools_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Failed to load MCP tools: {task.exception()}")
+
+
+def start_loading_mcp_tools():
+    # Servers start on a worker thread so the event loop keeps serving requests
+    app.mcp_tools_task = asyncio.create_task(asyncio.to_thread(load_mcp_tools))
+    app.mcp_tools_task.add_done_callback(log_mcp_tools_error)
 
 
 @app.post("/streaming")
 async def streaming(request: StreamingRequest):
     if app.mcp_tools is None:
-        load_mcp_tools()
+        # Retry if loading at startup failed, otherwise wait for it to finish
+        if app.mcp_tools_task is None or app.mcp_tools_task.done():
+            start_loading_mcp_tools()
+        await asyncio.shield(app.mcp_tools_task)
 
     async def generate():
         global session_id